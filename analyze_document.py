@@ -1,33 +1,25 @@
 # analyze_document.py
-
-from multi_agent import Orchestrator
+#
+#   python analyze_document.py                 yeni doküman oturumu
+#   python analyze_document.py --session ID    önceki doküman oturumuna devam
+
+import argparse
+import os
+from typing import Optional
+
+from config import DEBUG, STREAM_OUTPUT
+from console import PanelStreamPrinter, print_panel_result
+from usage_stats import get_usage_stats
+from document_chunks import DocumentChunkIndex
 from document_utils import load_document_for_model
+from session_store import SessionStore
 
 
-def main():
-    print("📄 Doküman Analiz Modu (OpenAI + Gemini + Grok + Claude + DecisionAgent)")
-    print("Desteklenen dosya türleri: .txt, .csv, .xls, .xlsx, .xlsm, .xlsb")
-    print("Çıkmak için dosya yolu sormadan sonra sohbet ekranında 'q' yazabilirsin.\n")
-
-    file_path = input("Analiz etmek istediğin dosyanın TAM yolunu yaz: ").strip()
-    if not file_path:
-        print("Dosya yolu verilmedi, çıkılıyor.")
-        return
-
-    try:
-        doc_main, doc_extra = load_document_for_model(file_path)
-    except Exception as e:
-        print(f"❌ Dosya okunurken / analiz edilirken hata oldu:\n{e}")
-        return
-
-    print("\n✅ Dosya yüklendi. Modele göndereceğim özet içerik aşağıda:\n")
-    print("-" * 80)
-    print(doc_main[:1500])
-    print("\n--- EK ANALİZ / İSTATİSTİKLER ÖZETİ (ilk 1000 karakter) ---\n")
-    print(doc_extra[:1000])
-    print("-" * 80)
-
-    doc_context = (
+def build_document_context(doc_main: str, doc_extra: str) -> str:
+    """
+    Orchestrator.set_document_context'e verilecek, doküman özetlerini içeren sabit önek.
+    """
+    return (
         "Aşağıda kullanıcıdan gelen bir dokümanın (Excel/CSV/TXT) içeriği ve senin için "
         "hazırlanmış özetler var.\n\n"
         "---------------- DOKÜMAN ÖN İZLEME BAŞI ----------------\n"
@@ -41,7 +33,128 @@ def main():
         "yorum / fikir üret. Varsayım yapman gerekiyorsa mantıklı ve açık bir şekilde belirt.\n\n"
     )
 
-    orchestrator = Orchestrator()
+
+def build_question_prompt(
+    question: str,
+    first_turn: bool,
+    chunk_index: Optional[DocumentChunkIndex] = None,
+) -> str:
+    """
+    Doküman sohbetinde kullanıcının sorusunu panele gidecek prompt'a çevirir.
+    chunk_index verilirse sorunun geçtiği en ilgili bölümler başa eklenir.
+    """
+    if first_turn:
+        full_prompt = (
+            "Kullanıcının bu dokümanla ilgili ilk isteği:\n"
+            f"{question}\n\n"
+            "Lütfen önce dokümanı anladığını gösteren kısa bir özet yap. "
+            "Ardından kullanıcının isteğine göre detaylı cevap ver. "
+            "Önemli metrikleri vurgula, trendleri ve riskleri/fırsatları açıkla."
+        )
+    else:
+        full_prompt = (
+            "Aynı doküman üzerinde konuşmaya devam ediyoruz. "
+            "Dokümanı yeniden uzun uzun özetlemek zorunda değilsin; önceki konuşmaları da "
+            "dikkate al.\n\n"
+            "Kullanıcının yeni sorusu / isteği:\n"
+            f"{question}\n\n"
+            "Lütfen önceki cevaplarınla çelişmeden, bu yeni soruya odaklanan, net ve "
+            "tekrara girmeyen bir analiz yap."
+        )
+
+    if chunk_index is not None:
+        passages = chunk_index.retrieve(question)
+        if passages:
+            full_prompt = (
+                "Dokümanın bu soruyla en ilgili bölümleri (tam metinden arandı):\n"
+                "---------------- İLGİLİ BÖLÜMLER BAŞI ----------------\n"
+                f"{passages}\n"
+                "---------------- İLGİLİ BÖLÜMLER SONU ----------------\n\n"
+                + full_prompt
+            )
+    return full_prompt
+
+
+def open_chunk_index(file_path: str) -> Optional[DocumentChunkIndex]:
+    """
+    Büyük .txt dokümanları için parça indeksi; tek parçaya sığan ya da metin olmayan
+    dokümanlarda None.
+    """
+    if os.path.splitext(file_path)[1].lower() != ".txt":
+        return None
+    chunk_index = DocumentChunkIndex(file_path)
+    if chunk_index.n_chunks <= 1:
+        chunk_index.close()
+        return None
+    return chunk_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doküman analiz sohbeti")
+    parser.add_argument("--session", default=None, help="devam edilecek doküman oturumunun kimliği")
+    args = parser.parse_args()
+
+    print("📄 Doküman Analiz Modu (OpenAI + Gemini + Grok + Claude + DecisionAgent)")
+    print("Desteklenen dosya türleri: .txt, .csv, .xls, .xlsx, .xlsm, .xlsb")
+    print("Çıkmak için dosya yolu sormadan sonra sohbet ekranında 'q' yazabilirsin.\n")
+
+    store = SessionStore()
+    if args.session:
+        try:
+            session = store.acquire(args.session)
+        except KeyError:
+            print(f"❌ Oturum bulunamadı: {args.session}")
+            return
+        file_path = session.meta.get("document")
+        if not file_path:
+            print("❌ Bu oturum bir doküman oturumu değil; main.py --session ile devam et.")
+            store.release(session, save=False)
+            return
+        # Doküman özeti oturumla birlikte kaydedildi; sadece parça indeksi yeniden kurulur
+        print(f"Oturuma devam ediliyor: {session.session_id} ({file_path})")
+    else:
+        file_path = input("Analiz etmek istediğin dosyanın TAM yolunu yaz: ").strip()
+        if not file_path:
+            print("Dosya yolu verilmedi, çıkılıyor.")
+            return
+
+        try:
+            doc_main, doc_extra = load_document_for_model(file_path)
+        except Exception as e:
+            print(f"❌ Dosya okunurken / analiz edilirken hata oldu:\n{e}")
+            return
+
+        print("\n✅ Dosya yüklendi. Modele göndereceğim özet içerik aşağıda:\n")
+        print("-" * 80)
+        print(doc_main[:1500])
+        print("\n--- EK ANALİZ / İSTATİSTİKLER ÖZETİ (ilk 1000 karakter) ---\n")
+        print(doc_extra[:1000])
+        print("-" * 80)
+
+        try:
+            session = store.create(meta={"document": os.path.abspath(file_path), "first_turn": True})
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return
+        # Doküman her istekte aynı sabit önek olarak gider (sağlayıcı tarafı prompt cache);
+        # geçmişe yazılmaz, böylece sonraki turlarda tekrar tekrar eklenmez.
+        session.orchestrator.set_document_context(build_document_context(doc_main, doc_extra))
+        store.save(session)
+        print(f"\nOturum: {session.session_id}  "
+              f"(devam etmek için: python analyze_document.py --session {session.session_id})")
+
+    orchestrator = session.orchestrator
+
+    # Büyük metin dokümanlarında modele sadece baş kısım gider; geri kalanı için
+    # her soruda en ilgili parçalar indeksten bulunup soruya eklenir.
+    chunk_index = None
+    if os.path.exists(file_path):
+        chunk_index = open_chunk_index(file_path)
+    elif args.session:
+        print("⚠️  Doküman artık yerinde değil; sadece kayıtlı özet üzerinden devam edilecek.")
+    if chunk_index is not None:
+        session.runtime["chunk_index"] = chunk_index
+        print(f"🔎 Metin {chunk_index.n_chunks} parçaya bölünüp indekslendi; her soruda ilgili bölümler eklenecek.")
 
     print(
         "\nArtık bu doküman hakkında seninle sohbet edeceğiz. 🌟\n"
@@ -49,57 +162,30 @@ def main():
         "- Çıkmak için sadece 'q' yazıp Enter'a bas.\n"
     )
 
-    first_turn = True
-
     while True:
         question = input("Sen: ").strip()
 
         if question.lower() in {"q", "quit", "çı", "çık", "exit"}:
             print("\n👋 Görüşürüz, oturum sonlandırıldı.")
+            if DEBUG:
+                # cached_tokens: doküman önekinin sağlayıcı önbelleğinden okunan kısmı
+                print("[USAGE] Sağlayıcı token kullanımı:", get_usage_stats())
+            store.release(session)
+            session.close()
             break
 
         if not question:
             print("(Boş mesaj algılandı, lütfen bir soru yaz veya 'q' ile çık.)")
             continue
 
-        if first_turn:
-            full_prompt = (
-                doc_context
-                + "Kullanıcının bu dokümanla ilgili ilk isteği:\n"
-                f"{question}\n\n"
-                "Lütfen önce dokümanı anladığını gösteren kısa bir özet yap. "
-                "Ardından kullanıcının isteğine göre detaylı cevap ver. "
-                "Önemli metrikleri vurgula, trendleri ve riskleri/fırsatları açıkla."
-            )
-            first_turn = False
-        else:
-            full_prompt = (
-                "Aynı doküman üzerinde konuşmaya devam ediyoruz. "
-                "Dokümanı yeniden uzun uzun özetlemek zorunda değilsin; önceki konuşmaları da "
-                "dikkate al.\n\n"
-                "Kullanıcının yeni sorusu / isteği:\n"
-                f"{question}\n\n"
-                "Lütfen önceki cevaplarınla çelişmeden, bu yeni soruya odaklanan, net ve "
-                "tekrara girmeyen bir analiz yap."
-            )
-
-        result = orchestrator.ask_panel(full_prompt)
-
-        print("\n--- OpenAI Cevabı ---")
-        print(result["openai"])
-
-        print("\n--- Gemini Cevabı ---")
-        print(result["gemini"])
+        full_prompt = build_question_prompt(question, session.meta.get("first_turn", True), chunk_index)
+        session.meta["first_turn"] = False
 
-        print("\n--- Grok Cevabı ---")
-        print(result["grok"])
-
-        print("\n--- Claude Cevabı ---")
-        print(result["claude"])
-
-        print("\n=== ORTAK SONUÇ (DecisionAgent) ===")
-        print(result["final"])
-        print("====================================\n")
+        if STREAM_OUTPUT:
+            orchestrator.ask_panel(full_prompt, on_event=PanelStreamPrinter())
+        else:
+            print_panel_result(orchestrator.ask_panel(full_prompt))
+        store.save(session)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+# batch_runner.py
+#
+# Soru listesini (JSONL / CSV) panelden toplu geçirir. Her soru kendi (boş geçmişli)
+# Orchestrator'ında çalışır; sonuçlar tamamlandıkça JSONL dosyasına eklenir.
+# Yarıda kesilen çalışma aynı komutla devam ettirilir: çıktıda başarıyla
+# tamamlanmış id'ler atlanır.
+#
+#   python batch_runner.py sorular.jsonl -o sonuclar.jsonl
+#   python batch_runner.py sorular.csv -o sonuclar.jsonl -c 8 --limit claude=2 --providers openai,claude
+#
+# Girdi satırı: {"id": "...", "question": "...", "document": "rapor.xlsx"}
+#   id       : yoksa satır numarası kullanılır
+#   document : isteğe bağlı; verilirse soru o doküman hakkında sorulur (analyze_document gibi)
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Optional, Set
+
+from config import BATCH_CONCURRENCY, BATCH_PROVIDER_LIMITS, PANEL_MAX_WORKERS
+from multi_agent import Orchestrator, is_error_response
+from resilience import set_concurrency_limit
+
+
+def read_questions(path: str) -> Iterator[Dict[str, str]]:
+    """
+    JSONL ya da CSV (uzantıya göre) satırlarını {"id", "question", "document"} olarak verir.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            rows: Iterator[Dict] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for n, row in enumerate(rows, start=1):
+            question = (row.get("question") or "").strip()
+            if not question:
+                print(f"⚠️  {n}. satırda 'question' yok, atlandı.")
+                continue
+            yield {
+                "id": str(row.get("id") or n),
+                "question": question,
+                "document": (row.get("document") or "").strip(),
+            }
+
+
+def completed_ids(output_path: str, include_failed: bool = False) -> Set[str]:
+    """
+    Önceki çalışmanın çıktısından tamamlanmış id'ler. Aynı id birden fazla kez
+    yazılmışsa sonuncusu geçerlidir; yarım kalmış son satır yok sayılır.
+    """
+    status: Dict[str, bool] = {}
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            status[str(record.get("id"))] = bool(record.get("ok"))
+    return {qid for qid, ok in status.items() if ok or include_failed}
+
+
+class ResultWriter:
+    """
+    Sonuçları JSONL'e satır satır ekler; her satır flush + fsync edilir ki
+    kesintide en fazla yazılmakta olan satır kaybolsun.
+    """
+
+    def __init__(self, path: str):
+        # Önceki çalışma satır ortasında kesildiyse yeni kayıt ayrı satırdan başlasın
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class DocumentContexts:
+    """
+    Aynı doküman birden fazla soruda geçiyorsa özet ve parça indeksi bir kez hazırlanır.
+    Farklı dokümanlar paralel hazırlanır; sadece aynı dokümanı bekleyen satırlar birbirini bekler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[str, Future] = {}
+
+    def get(self, path: str):
+        with self._lock:
+            pending = self._items.get(path)
+            loading = pending is None
+            if loading:
+                pending = self._items[path] = Future()
+        if not loading:
+            return pending.result()
+
+        from analyze_document import build_document_context, open_chunk_index
+        from document_utils import load_document_for_model
+
+        try:
+            doc_main, doc_extra = load_document_for_model(path)
+            item = (build_document_context(doc_main, doc_extra), open_chunk_index(path))
+        except BaseException as e:
+            # Hata önbelleğe alınmaz: bekleyenler aynı hatayı alır, sonraki satırlar yeniden dener
+            with self._lock:
+                del self._items[path]
+            pending.set_exception(e)
+            raise
+        pending.set_result(item)
+        return item
+
+    def close(self) -> None:
+        with self._lock:
+            items = [pending.result() for pending in self._items.values() if pending.done()]
+        for _context, chunk_index in items:
+            if chunk_index is not None:
+                chunk_index.close()
+
+
+def run_one(item: Dict[str, str], providers: Optional[List[str]], use_memory: bool,
+            documents: DocumentContexts) -> Dict:
+    started = time.perf_counter()
+    record = {"id": item["id"], "question": item["question"]}
+    if item["document"]:
+        record["document"] = item["document"]
+    try:
+        orchestrator = Orchestrator(providers=providers, use_memory=use_memory)
+        prompt = item["question"]
+        if item["document"]:
+            from analyze_document import build_question_prompt
+
+            doc_context, chunk_index = documents.get(item["document"])
+            orchestrator.set_document_context(doc_context)
+            prompt = build_question_prompt(item["question"], True, chunk_index)
+        result = orchestrator.ask_panel(prompt)
+        final = result.pop("final")
+        record.update(ok=not is_error_response(final), final=final, answers=result)
+    except Exception as e:
+        record.update(ok=False, error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    record["finished_at"] = datetime.datetime.utcnow().isoformat() + "Z"
+    return record
+
+
+def _parse_limits(values: List[str]) -> Dict[str, int]:
+    limits = dict(BATCH_PROVIDER_LIMITS)
+    for value in values:
+        provider, _, limit = value.partition("=")
+        if not limit.isdigit():
+            raise ValueError(f"--limit sağlayıcı=sayı biçiminde olmalı: {value}")
+        limits[provider.strip()] = int(limit)
+    return limits
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Soru listesini panelden toplu geçir (JSONL/CSV -> JSONL)")
+    parser.add_argument("input", help="sorular (.jsonl ya da .csv)")
+    parser.add_argument("-o", "--output", required=True, help="sonuçların ekleneceği JSONL dosyası")
+    parser.add_argument("-c", "--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="aynı anda çalışan panel sayısı")
+    parser.add_argument("--limit", action="append", default=[], metavar="SAĞLAYICI=N",
+                        help="sağlayıcı başına eşzamanlı istek sınırı (0: sınırsız)")
+    parser.add_argument("--providers", default=None, help="panel sağlayıcıları, örn. openai,claude")
+    parser.add_argument("--use-memory", action="store_true",
+                        help="kalıcı Q/A hafızasını oku / yaz (varsayılan: kapalı, sorular bağımsız)")
+    parser.add_argument("--skip-failed", action="store_true",
+                        help="önceki çalışmada hata ile biten id'leri de tekrar çalıştırma")
+    args = parser.parse_args()
+
+    try:
+        limits = _parse_limits(args.limit)
+        items = list(read_questions(args.input))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    done = completed_ids(args.output, include_failed=args.skip_failed)
+    pending = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} soru, {len(items) - len(pending)} tanesi önceden tamamlanmış; {len(pending)} çalıştırılacak.")
+    if not pending:
+        return 0
+
+    providers = [p.strip() for p in args.providers.split(",") if p.strip()] if args.providers else None
+    try:
+        Orchestrator(providers=providers, use_memory=False)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    for provider, limit in limits.items():
+        set_concurrency_limit(provider, limit)
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    from panel_fanout import get_executor
+
+    # Uzman havuzu ilk çağrıda boyutlanır: her panel uzman + hedge denemeleri kadar thread ister
+    get_executor(args.concurrency * PANEL_MAX_WORKERS * 2)
+
+    writer = ResultWriter(args.output)
+    documents = DocumentContexts()
+    executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="batch-panel")
+    queue = iter(pending)
+    in_flight = set()
+    finished = failed = 0
+    started = time.perf_counter()
+    interrupted = False
+
+    def fill() -> None:
+        # Hepsi birden kuyruğa atılmaz; Ctrl+C'de iptal edilecek iş az kalsın
+        while len(in_flight) < args.concurrency * 2:
+            item = next(queue, None)
+            if item is None:
+                return
+            in_flight.add(executor.submit(run_one, item, providers, args.use_memory, documents))
+
+    try:
+        fill()
+        while in_flight:
+            completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in completed:
+                in_flight.discard(future)
+                record = future.result()
+                writer.write(record)
+                finished += 1
+                failed += not record["ok"]
+                elapsed = time.perf_counter() - started
+                eta = elapsed / finished * (len(pending) - finished)
+                mark = "✓" if record["ok"] else "✗"
+                print(f"[{finished}/{len(pending)}] {mark} {record['id']} "
+                      f"({record['seconds']:.1f} sn, kalan ~{eta:.0f} sn)")
+            fill()
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n⏹  Durduruluyor: başlamamış sorular iptal edildi, çalışanlar bitince çıkılacak...")
+        for future in in_flight:
+            future.cancel()
+        for future in in_flight:
+            if not future.cancelled():
+                record = future.result()
+                writer.write(record)
+                finished += 1
+                failed += not record["ok"]
+    finally:
+        executor.shutdown(wait=True)
+        writer.close()
+        documents.close()
+
+    print(f"\nBitti: {finished} soru, {failed} hatalı, {time.perf_counter() - started:.1f} sn.")
+    if interrupted:
+        print("Aynı komutla tekrar çalıştırınca kalan sorulardan devam edilir.")
+        return 130
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# bench_startup.py
+#
+# CLI açılış süresi ölçümü. Her modül ayrı, temiz bir Python sürecinde import edilir;
+# süreden boş yorumlayıcının açılış süresi çıkarılarak sadece bizim import maliyetimiz
+# raporlanır. API anahtarları ortamdan silinir: import anahtar gerektirmemeli.
+#
+#   python bench_startup.py                 # varsayılan modüller, 15 tekrar
+#   python bench_startup.py -n 30 main      # sadece main, 30 tekrar
+#   python bench_startup.py --budget-ms 50  # medyan bütçeyi aşarsa çıkış kodu 1
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+DEFAULT_MODULES = [
+    "config",
+    "multi_agent",
+    "main",
+    "analyze_document",
+    "document_utils",
+]
+
+_KEY_VARS = ("OPENAI_API_KEY", "GEMINI_API_KEY", "ANTHROPIC_API_KEY", "XAI_API_KEY")
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _clean_env() -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k not in _KEY_VARS}
+    return env
+
+
+def _run(code: str, env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=_HERE, env=env, check=True)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def measure(module: str, repeat: int, env: Dict[str, str]) -> List[float]:
+    code = f"import {module}"
+    _run(code, env)  # .pyc dosyaları oluşsun, disk önbelleği ısınsın
+    return [_run(code, env) for _ in range(repeat)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Modül import (CLI açılış) süresi ölçümü")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("-n", "--repeat", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="medyan import süresi bu değeri aşarsa 1 ile çık")
+    args = parser.parse_args()
+
+    env = _clean_env()
+    baseline = statistics.median(_run("pass", env) for _ in range(args.repeat))
+    print(f"Boş yorumlayıcı açılışı: {baseline:.1f} ms (aşağıdaki sürelerden çıkarıldı)\n")
+    print(f"{'modül':<20} {'medyan':>9} {'p90':>9} {'min':>9}")
+
+    over_budget = []
+    for module in args.modules:
+        try:
+            samples = [t - baseline for t in measure(module, args.repeat, env)]
+        except subprocess.CalledProcessError:
+            print(f"{module:<20} import başarısız (yukarıdaki hata çıktısına bak)")
+            over_budget.append(module)
+            continue
+        samples.sort()
+        median = statistics.median(samples)
+        p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+        print(f"{module:<20} {median:>7.1f}ms {p90:>7.1f}ms {samples[0]:>7.1f}ms")
+        if args.budget_ms is not None and median > args.budget_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"\nBütçeyi aşan / hatalı modüller: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,28 +20,311 @@ def _require_env(name: str, prefix: str = None) -> str:
     return value
 
 
+# ========= API anahtarları (ilk kullanımda okunur) =========
+# config'i import etmek anahtar istemez; OPENAI_API_KEY gibi bir isme ilk erişildiğinde
+# ortam değişkeni okunur ve yoksa / formatı yanlışsa o anda RuntimeError fırlatılır.
+# Böylece sadece bazı sağlayıcıları tanımlı bir ortamda da çalışılabilir (bkz. PANEL_PROVIDERS).
+_API_KEYS = {
+    # config adı: (ortam değişkeni, beklenen prefix)
+    "OPENAI_API_KEY": ("OPENAI_API_KEY", "sk-"),
+    "GEMINI_API_KEY": ("GEMINI_API_KEY", "AIza"),
+    "CLAUDE_API_KEY": ("ANTHROPIC_API_KEY", "sk-ant-"),
+}
+
+# Sağlayıcı -> API anahtarının ortam değişkeni
+PROVIDER_ENV_VARS = {
+    "openai": "OPENAI_API_KEY",
+    "gemini": "GEMINI_API_KEY",
+    "grok": "XAI_API_KEY",
+    "claude": "ANTHROPIC_API_KEY",
+}
+
+
+def __getattr__(name: str):
+    if name in _API_KEYS:
+        value = _require_env(*_API_KEYS[name])
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'config' has no attribute {name!r}")
+
+
+# ========= Sağlayıcı adresleri =========
+# Her adres ortam değişkeniyle (OPENAI_BASE_URL, GEMINI_BASE_URL, GEMINI_STREAM_URL,
+# CLAUDE_BASE_URL, GROK_BASE_URL) ezilebilir. PROVIDER_SIM_URL verilirse (örn.
+# "http://127.0.0.1:8089") tüm sağlayıcılar aynı path'lerle yerel simülatöre gider
+# (bkz. provider_simulator.py); API anahtarları yine tanımlı olmalı ama gerçek olmaları gerekmez.
+PROVIDER_SIM_URL = os.getenv("PROVIDER_SIM_URL", "").rstrip("/")
+
+
+def _base_url(env_name: str, default: str) -> str:
+    value = os.getenv(env_name)
+    if value:
+        return value
+    if PROVIDER_SIM_URL:
+        # "https://host/path?query" -> "<simülatör>/path?query"
+        return f"{PROVIDER_SIM_URL}/{default.split('/', 3)[3]}"
+    return default
+
+
 # ========= OpenAI =========
-OPENAI_API_KEY = _require_env("OPENAI_API_KEY", "sk-")
 OPENAI_MODEL = "gpt-4.1-mini"
-OPENAI_BASE_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_BASE_URL = _base_url("OPENAI_BASE_URL", "https://api.openai.com/v1/chat/completions")
 
 # ========= GEMINI =========
-GEMINI_API_KEY = _require_env("GEMINI_API_KEY", "AIza")
 GEMINI_MODEL = "gemini-2.0-flash"
-GEMINI_BASE_URL = (
+GEMINI_BASE_URL = _base_url(
+    "GEMINI_BASE_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/"
+    "gemini-2.0-flash:generateContent",
+)
+GEMINI_STREAM_URL = _base_url(
+    "GEMINI_STREAM_URL",
     "https://generativelanguage.googleapis.com/v1beta/models/"
-    "gemini-2.0-flash:generateContent"
+    "gemini-2.0-flash:streamGenerateContent?alt=sse",
 )
 
 # ========= CLAUDE (Anthropic) =========
-CLAUDE_API_KEY = _require_env("ANTHROPIC_API_KEY", "sk-ant-")
 CLAUDE_MODEL = "claude-sonnet-4-20250514"
-CLAUDE_BASE_URL = "https://api.anthropic.com/v1/messages"
+CLAUDE_BASE_URL = _base_url("CLAUDE_BASE_URL", "https://api.anthropic.com/v1/messages")
 CLAUDE_VERSION = "2023-06-01"
+CLAUDE_MAX_TOKENS = 1024
 
 # ========= GROK / xAI (şimdilik opsiyonel) =========
 GROK_API_KEY = os.getenv("XAI_API_KEY")  # zorunlu değil
 GROK_MODEL = "grok-2-latest"
-GROK_BASE_URL = "https://api.x.ai/v1/chat/completions"
+GROK_BASE_URL = _base_url("GROK_BASE_URL", "https://api.x.ai/v1/chat/completions")
+
+
+
+# ========= Sağlayıcı seçimi =========
+# Panelde çalışacak uzmanlar, örn. "openai,claude". Boşsa API anahtarı tanımlı olanların
+# hepsi (Grok için ayrıca USE_GROK=True gerekir).
+PANEL_PROVIDERS = os.getenv("PANEL_PROVIDERS", "")
+# Final kararı veren sağlayıcı; boşsa "openai" (panelde yoksa paneldeki ilk uzman)
+DECISION_PROVIDER = os.getenv("DECISION_PROVIDER", "")
+
+
+def provider_configured(provider: str) -> bool:
+    """
+    Sağlayıcının API anahtarı ortamda tanımlı mı (formatı ilk kullanımda kontrol edilir).
+    """
+    if provider == "grok" and not USE_GROK:
+        return False
+    return bool(os.getenv(PROVIDER_ENV_VARS[provider], ""))
+
+
+def active_providers() -> list:
+    """
+    Panelde çalışacak uzmanlar, sabit sırayla (openai, gemini, grok, claude).
+    """
+    if PANEL_PROVIDERS.strip():
+        wanted = {p.strip().lower() for p in PANEL_PROVIDERS.split(",") if p.strip()}
+        unknown = wanted - set(PROVIDER_ENV_VARS)
+        if unknown:
+            raise RuntimeError(f"PANEL_PROVIDERS içinde bilinmeyen sağlayıcı: {sorted(unknown)}")
+        return [p for p in PROVIDER_ENV_VARS if p in wanted]
+    return [p for p in PROVIDER_ENV_VARS if provider_configured(p)]
+
+
+def decision_provider(panel: list) -> str:
+    if DECISION_PROVIDER.strip():
+        provider = DECISION_PROVIDER.strip().lower()
+        if provider not in PROVIDER_ENV_VARS:
+            raise RuntimeError(f"DECISION_PROVIDER bilinmeyen sağlayıcı: {provider!r}")
+        return provider
+    if "openai" in panel or not panel:
+        return "openai"
+    return panel[0]
+
+
+# ========= Panel (uzmanların çalıştırılması) =========
+# True: uzmanlar thread havuzunda paralel çağrılır, panel süresi en yavaş uzman kadar olur.
+PANEL_PARALLEL = True
+PANEL_MAX_WORKERS = 4
+
+# Uzmanların konuşma geçmişini nasıl gördüğü:
+#   "snapshot"   : hepsi sorudan önceki geçmişin aynı (değişmez) kopyasını görür.
+#                  Cevaplar sonradan sabit sırayla (OpenAI, Gemini, Grok, Claude) geçmişe eklenir.
+#   "sequential" : eski davranış; her uzman kendinden önceki uzmanların cevaplarını da görür.
+#                  Bu politika uzmanları ister istemez seri çalıştırır.
+PANEL_HISTORY_POLICY = "snapshot"
+
+# Kuyruk gecikmesi kontrolü (sadece "snapshot" + PANEL_PARALLEL ile geçerli):
+#   PANEL_QUORUM        : bu kadar uzman başarılı cevap verince karar aşamasına geçilir (0: hepsi beklenir)
+#   PANEL_SOFT_DEADLINE : saniye; dolduğunda en az bir cevap varsa beklemeden karara geçilir (None: yok)
+#   PANEL_LATE_ANSWERS  : karara yetişmeyen cevaplar için
+#                         "attach" -> tamamlanınca bir sonraki turda geçmişe eklenir
+#                         "cancel" -> akış kesilir / sonuç atılır
+PANEL_QUORUM = 0
+PANEL_SOFT_DEADLINE = None
+PANEL_LATE_ANSWERS = "attach"
+# Hedging: bir uzmanın isteği o sağlayıcının son isteklerdeki p95 süresini aşarsa aynı istek
+# bir kez daha atılır, önce gelen kullanılır. Akışta süre ilk paragrafa kadar ölçülür.
+PANEL_HEDGE = False
+PANEL_HEDGE_PERCENTILE = 0.95
+PANEL_HEDGE_MIN_SAMPLES = 20      # p95 bu kadar ölçümden önce hesaplanmaz (hedge yapılmaz)
+
+# ========= Cevap içi tekrar temizliği (paragraph_dedup.py) =========
+# Her model cevabı bir kez paragraflara bölünüp tekrarlardan temizlenir. Kelime 3'lülerinin
+# Jaccard benzerliği eşiğe ulaşan paragraf, önceki paragrafın başka kelimelerle tekrarı sayılır.
+DEDUP_SIMILARITY_THRESHOLD = 0.8    # 1.0 -> sadece birebir aynı paragraflar atılır
+DEDUP_SHINGLE_WORDS = 3
+DEDUP_MIN_WORDS = 8                 # daha kısa paragraflar sadece birebir tekrarsa atılır
+DEDUP_NUM_HASHES = 64               # MinHash imza uzunluğu (LSH bantları buradan hesaplanır)
+
+# ========= HTTP transport (tüm sağlayıcılar için ortak) =========
+HTTP_TIMEOUT = 120            # saniye; okuma zaman aşımı (iki veri parçası arasında beklenecek en uzun süre)
+HTTP_CONNECT_TIMEOUT = 10     # saniye; TCP + TLS bağlantı kurma zaman aşımı
+HTTP_POOL_MAXSIZE = 8         # host başına boşta tutulacak en fazla bağlantı
+HTTP_POOL_IDLE_TIMEOUT = 60   # saniye; bundan uzun boşta kalan bağlantı kapatılır
+HTTP2_ENABLED = False         # True ise httpx[http2] kuruluysa HTTP/2 kullanılır
+
+# ========= Tekrar deneme ve devre kesici (sağlayıcı başına) =========
+# 429 / 5xx ve bağlantı hatalarında üstel, rastgele (jitter) beklemeli tekrar;
+# sunucu Retry-After gönderirse o süre beklenir (en fazla RETRY_MAX_DELAY).
+RETRY_ATTEMPTS = 3            # ilk denemeye ek olarak en fazla kaç tekrar
+RETRY_BASE_DELAY = 0.5        # saniye; n. tekrarda üst sınır BASE * 2^n
+RETRY_MAX_DELAY = 20.0        # saniye
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504, 529)
+# Art arda bu kadar başarısız çağrıdan sonra sağlayıcı CIRCUIT_COOLDOWN saniye hiç çağrılmaz;
+# süre dolunca tek bir deneme isteğine izin verilir, başarılı olursa devre kapanır.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 60.0
+
+# ========= Sağlayıcı rate limit (istemci tarafı) =========
+# Her sağlayıcı için istek/dakika ve token/dakika kovası; istekler sınır aşılacaksa
+# 429 yemek yerine sırayla bekler. OpenAI, xAI ve Anthropic cevap başlıklarındaki
+# gerçek sınırlar geldikçe bu başlangıç değerlerinin yerine geçer (Gemini başlık göndermez).
+RATE_LIMIT_ENABLED = True
+RATE_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 200_000},
+    "gemini": {"rpm": 1000, "tpm": 1_000_000},
+    "grok": {"rpm": 60, "tpm": 100_000},
+    "claude": {"rpm": 50, "tpm": 40_000},
+}
+RATE_LIMIT_OUTPUT_TOKENS = 1024   # cevap için peşin düşülen tahmini çıktı token'ı
+RATE_LIMIT_RETRY_AFTER = 5.0      # 429 Retry-After göndermezse kuyruğun bekletileceği süre (sn)
+
+# ========= Toplu çalıştırma (batch_runner.py) =========
+BATCH_CONCURRENCY = 4           # aynı anda çalışan panel (soru) sayısı
+# Sağlayıcı başına aynı anda en fazla kaç istek; listede olmayan sağlayıcı sınırsız
+BATCH_PROVIDER_LIMITS = {
+    "openai": 8,
+    "gemini": 8,
+    "grok": 4,
+    "claude": 4,
+}
+
+# ========= HTTP sunucu modu (panel_server.py) =========
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+SERVER_PANEL_WORKERS = 32           # aynı anda çalışan panel (soru); fazlası sırada bekler
+SERVER_SESSION_TTL = 3600           # saniye; bu kadar kullanılmayan oturum bellekten diske atılır
+SERVER_MAX_BODY_BYTES = 1024 * 1024
+# Doküman uç noktası sadece bu klasörün altındaki dosyaları okur
+SERVER_DOCUMENT_DIR = "documents"
+
+# ========= Oturum deposu (session_store.py) =========
+# Oturumlar her turdan sonra SESSION_DIR altına sıkıştırılmış JSON olarak yazılır;
+# bellekte en son kullanılan oturumlar tutulur, sınır aşılınca en eskisi bellekten atılır
+# ve tekrar kullanıldığında diskten yüklenir.
+SESSION_DIR = "sessions"
+SESSION_MAX_IN_MEMORY = 256
+SESSION_MAX_MEMORY_BYTES = 128 * 1024 * 1024   # bellekteki oturumların toplam (tahmini) boyutu
+# Diskteki snapshot'lar: bu kadar süre kullanılmayan oturum silinir; bu sayıya ulaşınca
+# yeni oturum açılmaz (sunucu 503 döner)
+SESSION_RETENTION = 7 * 24 * 3600   # saniye
+SESSION_MAX_STORED = 10_000
+
+# ========= İzleme (tracing) =========
+# Aşama süreleri (hafıza araması, think, HTTP, JSON, dedup, hafızaya yazma) span olarak ölçülür.
+# Özet: python trace_report.py [TRACE_JSONL_PATH]
+TRACE_ENABLED = False
+TRACE_JSONL_PATH = "traces.jsonl"   # her span bir satır; None -> dosyaya yazılmaz
+TRACE_PROM_PATH = None              # örn. "panel_metrics.prom" -> çıkışta Prometheus metin dosyası yazılır
+TRACE_WINDOW = 2000                 # aşama/sağlayıcı başına yüzdelik için tutulan son ölçüm sayısı
+
+# ========= Akış (streaming) çıktısı =========
+# True: CLI'lar uzman cevaplarını geldikçe, DecisionAgent cevabını paragraf paragraf yazar.
+STREAM_OUTPUT = True
+
+# ========= Q/A hafıza indeksi =========
+QA_MEMORY_INDEX_PATH = "qa_memory.idx.sqlite"
+# Çok yaygın bir kelime için taranacak en fazla (en yeni) kayıt sayısı
+QA_MEMORY_INDEX_MAX_POSTINGS = 2000
+# Hafıza kayıtları arka planda toplu yazılır (memory_writer.py)
+QA_MEMORY_BATCH_MAX = 1024          # tek write ile eklenecek en fazla kayıt
+QA_MEMORY_QUEUE_MAX = 100_000       # kuyruk doluysa append() yer açılana kadar bekler
+QA_MEMORY_FSYNC = False             # True: her parti diske zorlanır (daha yavaş, elektrik kesintisine dayanıklı)
+QA_MEMORY_WRITE_ATTEMPTS = 3        # yazılamayan parti bu kadar denenip atılır
+QA_MEMORY_FLUSH_TIMEOUT = 10        # saniye; kapanışta kuyruğun boşalması için beklenecek süre
+# Aktif hafıza dosyası bu boyutu aşınca sıkıştırılmış segmente taşınır (qa_segments.py)
+QA_MEMORY_SEGMENT_DIR = "qa_memory.segments"
+QA_MEMORY_SEGMENT_BYTES = 4 * 1024 * 1024
+QA_MEMORY_BLOCK_BYTES = 64 * 1024   # segment içindeki sıkıştırma bloğu; tek kayıt okumada açılan miktar
+QA_MEMORY_COMPRESS_LEVEL = 6
+# Bu kadar yeni segment birikince tüm segmentler birleştirilir, tekrar eden sorulardan en yenisi kalır
+QA_MEMORY_COMPACT_SEGMENTS = 4
+
+# ========= Sağlayıcı cevap önbelleği =========
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_MAX_ENTRIES = 512
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RESPONSE_CACHE_TTL = 24 * 3600                     # saniye
+RESPONSE_CACHE_DIR = None                          # örn. ".response_cache" -> disk katmanı açılır
+RESPONSE_CACHE_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# ========= Konuşma geçmişi penceresi =========
+# Son kaç tur (kullanıcı sorusu + uzman cevapları + karar) aynen gönderilir; eskiler özete katlanır.
+HISTORY_KEEP_RECENT_TURNS = 3
+# Sağlayıcı başına geçmiş için token bütçesi (şimdiki soru ve rol metni hariç)
+HISTORY_TOKEN_BUDGETS = {
+    "openai": 24000,
+    "gemini": 24000,
+    "grok": 16000,
+    "claude": 24000,
+    "decision": 24000,
+}
+HISTORY_SUMMARY_MAX_TOKENS = 1500
+# False: her uzman geçmişte sadece kendi ham cevaplarını görür (diğer uzmanlarınki gönderilmez)
+HISTORY_INCLUDE_EXPERT_ANSWERS = True
+
+# ========= Token bütçeleri (token_counter ile tahmini) =========
+# Sağlayıcıya gönderilecek tüm istek (rol + geçmiş + soru) için üst sınır
+PROMPT_TOKEN_BUDGETS = {
+    "openai": 120000,
+    "gemini": 120000,
+    "grok": 120000,
+    "claude": 180000,
+}
+DECISION_ANSWER_MAX_TOKENS = 1500   # DecisionAgent prompt'unda uzman cevabı başına
+MEMORY_ANSWER_MAX_TOKENS = 300      # geçmiş soru-cevaplardaki cevap başına
+DOC_TEXT_MAX_TOKENS = 2000          # .txt dokümanlarından modele gidecek kısım
+DOC_STATS_MAX_TOKENS = 3000         # tablo istatistik özeti
+# İstek içinde tekrar eden paragraflar (ör. karar prompt'undaki uzman cevapları, geçmişte de varlar)
+# ilk geçtikleri yerde bırakılıp sonrakiler kısa bir referansa çevrilir (prompt_assembly.py)
+PROMPT_DEDUP_ENABLED = True
+PROMPT_DEDUP_MIN_CHARS = 160        # daha kısa paragraflar referansa çevrilmez
+
+# ========= Büyük tablo özetleme =========
+CSV_CHUNK_ROWS = 100_000     # CSV dosyaları bu kadar satırlık parçalar halinde okunur
+TABLE_SAMPLE_ROWS = 10       # tüm tablodan rastgele seçilecek örnek satır (reservoir sampling)
+QUANTILE_SKETCH_K = 200      # kantil özetinin doğruluk/bellek parametresi
+HLL_PRECISION = 12           # HyperLogLog kayıt sayısı 2^p (~%1.6 hata)
+EXCEL_CHUNK_ROWS = 20_000    # Excel satırları bu kadarlık DataFrame parçalarına toplanır
+EXCEL_MAX_WORKERS = 4        # çok sayfalı çalışma kitaplarında paralel işlenecek sayfa sayısı
 
+# ========= Doküman özet önbelleği =========
+# Aynı dosya tekrar açıldığında CSV/Excel yeniden okunmaz, hazır özet diskten gelir.
+DOC_CACHE_ENABLED = True
+DOC_CACHE_DIR = ".doc_cache"
+DOC_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DOC_CACHE_TTL = 30 * 24 * 3600      # saniye
+# False: anahtar (yol, boyut, mtime); True: dosya içeriğinin SHA-256'sı (taşınan/kopyalanan dosyalar da bulunur)
+DOC_CACHE_HASH_CONTENT = False
 
+# ========= Büyük metin dokümanlarında parça arama =========
+DOC_CHUNK_BYTES = 4000           # parça uzunluğu (bayt)
+DOC_CHUNK_OVERLAP_BYTES = 400    # ardışık parçaların örtüşmesi
+DOC_RETRIEVAL_TOP_K = 4          # her soruda gönderilecek en ilgili parça sayısı
+DOC_RETRIEVAL_MAX_TOKENS = 3000  # gönderilen parçaların toplam token üst sınırı
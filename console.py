@@ -0,0 +1,78 @@
+# console.py
+
+import threading
+from typing import Dict, List, Optional
+
+# (sonuç anahtarı, başlık) — CLI'larda cevapların yazılma sırası
+PANEL_SECTIONS = [
+    ("openai", "\n--- OpenAI Cevabı ---"),
+    ("gemini", "\n--- Gemini Cevabı ---"),
+    ("grok", "\n--- Grok Cevabı ---"),
+    ("claude", "\n--- Claude Cevabı ---"),
+]
+FINAL_HEADER = "\n=== ORTAK SONUÇ (DecisionAgent) ==="
+FINAL_FOOTER = "====================================\n"
+
+
+def print_panel_result(result: Dict[str, str]) -> None:
+    """
+    ask_panel sonucunu (akış olmadan) klasik sırayla yazar.
+    """
+    for key, header in PANEL_SECTIONS:
+        # Panelde olmayan (yapılandırılmamış) uzmanlar atlanır
+        if key not in result:
+            continue
+        print(header)
+        print(result[key])
+
+    print(FINAL_HEADER)
+    print(result["final"])
+    print(FINAL_FOOTER)
+
+
+class PanelStreamPrinter:
+    """
+    ask_panel(on_event=...) için terminal yazıcısı.
+
+    Uzmanlar paralel akarken çıktılar birbirine karışmasın diye ekranı bir
+    seferde tek uzman kullanır: ilk paragrafı gelen uzman canlı yazılır, diğerlerinin
+    paragrafları tamponda bekler ve sıra onlara geldiğinde (bitmiş olanlar önce)
+    toplu yazılıp canlı devam edilir. DecisionAgent cevabı paragraf paragraf yazılır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._headers = dict(PANEL_SECTIONS)
+        self._headers["final"] = FINAL_HEADER
+        self._live: Optional[str] = None
+        self._buffers: Dict[str, List[str]] = {}
+        self._done = set()
+
+    def __call__(self, key: str, paragraph: Optional[str]) -> None:
+        with self._lock:
+            buffer = self._buffers.setdefault(key, [])
+            if paragraph is None:
+                self._done.add(key)
+            else:
+                buffer.append(paragraph)
+            self._drain()
+
+    def _drain(self) -> None:
+        while True:
+            if self._live is None:
+                # Önce tamamen bitmiş uzmanlar, yoksa tamponunda paragraf olan ilk uzman
+                ready = [k for k in self._buffers if k in self._done]
+                ready = ready or [k for k, buffer in self._buffers.items() if buffer]
+                if not ready:
+                    return
+                self._live = ready[0]
+                print(self._headers.get(self._live, f"\n--- {self._live} ---"), flush=True)
+
+            for paragraph in self._buffers.pop(self._live, []):
+                print(paragraph + "\n", flush=True)
+
+            if self._live not in self._done:
+                return
+            if self._live == "final":
+                print(FINAL_FOOTER, flush=True)
+            self._live = None
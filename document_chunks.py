@@ -0,0 +1,192 @@
+# document_chunks.py
+
+import heapq
+import mmap
+import os
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    DEBUG,
+    DOC_CHUNK_BYTES,
+    DOC_CHUNK_OVERLAP_BYTES,
+    DOC_RETRIEVAL_TOP_K,
+    DOC_RETRIEVAL_MAX_TOKENS,
+)
+from text_search import bm25_idf, bm25_term_score, tokenize
+from token_counter import count_tokens, truncate_to_tokens
+
+
+def _is_continuation(byte: int) -> bool:
+    # UTF-8 çok baytlı karakterin ortası (10xxxxxx)
+    return byte & 0xC0 == 0x80
+
+
+class DocumentChunkIndex:
+    """
+    Büyük düz metin dokümanı için bellekte BM25 parça (chunk) indeksi.
+
+    Dosya mmap ile açılır; parçalar ~chunk_bytes bayt uzunluğunda, overlap_bytes
+    kadar örtüşen ve satır/kelime sınırına çekilmiş bayt aralıklarıdır. Her parça
+    ayrı ayrı decode edilip indekslenir, metnin tamamı hiçbir zaman tek seferde
+    belleğe alınmaz. Parça metinleri indekste tutulmaz; arama sonrası mmap'ten okunur.
+
+      postings    : kelime -> (parça id dizisi, kelime sıklığı dizisi)
+      starts/ends : parça id -> başlangıç / bitiş bayt offset'i
+      lengths     : parça id -> kelime sayısı (BM25 doküman uzunluğu)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_bytes: int = DOC_CHUNK_BYTES,
+        overlap_bytes: int = DOC_CHUNK_OVERLAP_BYTES,
+    ):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.overlap_bytes = min(overlap_bytes, chunk_bytes // 2)
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self.lengths = array("I")
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.total_length = 0
+
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Boş dosya mmap'lenemez
+        self._mm: Optional[mmap.mmap] = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        )
+        self.size = size
+        self._build()
+
+    # ---------------- parçalama ----------------
+
+    def _char_boundary(self, pos: int) -> int:
+        while 0 < pos < self.size and _is_continuation(self._mm[pos]):
+            pos -= 1
+        return pos
+
+    def _chunk_end(self, start: int) -> int:
+        end = start + self.chunk_bytes
+        if end >= self.size:
+            return self.size
+        floor = start + self.chunk_bytes // 2
+        # Önce satır sonunda, olmazsa boşlukta kes
+        cut = self._mm.rfind(b"\n", floor, end)
+        if cut < 0:
+            cut = self._mm.rfind(b" ", floor, end)
+        if cut >= 0:
+            return cut + 1
+        return self._char_boundary(end)
+
+    def _next_start(self, start: int, end: int) -> int:
+        if end >= self.size:
+            return self.size
+        pos = max(end - self.overlap_bytes, start + 1)
+        # Örtüşen kısım kelime ortasından başlamasın
+        space = self._mm.find(b" ", pos, end)
+        if space >= 0:
+            return space + 1
+        return max(self._char_boundary(pos), start + 1)
+
+    def _build(self) -> None:
+        if self._mm is None:
+            return
+        start = 0
+        while start < self.size:
+            end = self._chunk_end(start)
+            self._add_chunk(start, end)
+            start = self._next_start(start, end)
+
+        if DEBUG:
+            print(f"[DOC] {self.path}: {len(self.starts)} parça, {len(self.postings)} farklı kelime indekslendi.")
+
+    def _add_chunk(self, start: int, end: int) -> None:
+        chunk_id = len(self.starts)
+        terms = tokenize(self._mm[start:end].decode("utf-8", errors="ignore"))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lengths.append(len(terms))
+        self.total_length += len(terms)
+
+        for term, tf in Counter(terms).items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("I"))
+            entry[0].append(chunk_id)
+            entry[1].append(tf)
+
+    # ---------------- okuma / arama ----------------
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self.starts)
+
+    def chunk_text(self, chunk_id: int) -> str:
+        return self._mm[self.starts[chunk_id]:self.ends[chunk_id]].decode("utf-8", errors="ignore")
+
+    def search(self, query: str, k: int = DOC_RETRIEVAL_TOP_K) -> List[Tuple[float, int]]:
+        """
+        Soruya en ilgili k parçayı BM25 ile bulur: [(skor, parça id), ...] (yüksekten düşüğe).
+        """
+        n_chunks = self.n_chunks
+        if not n_chunks:
+            return []
+        avg_len = self.total_length / n_chunks
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            ids, tfs = entry
+            idf = bm25_idf(n_chunks, len(ids))
+            lengths = self.lengths
+            for chunk_id, tf in zip(ids, tfs):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + bm25_term_score(
+                    tf, lengths[chunk_id], avg_len, idf
+                )
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, chunk_id) for chunk_id, score in best]
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = DOC_RETRIEVAL_TOP_K,
+        max_tokens: int = DOC_RETRIEVAL_MAX_TOKENS,
+    ) -> str:
+        """
+        En ilgili parçaları dokümandaki sırasıyla, toplam max_tokens'a sığacak
+        şekilde birleştirir. Eşleşme yoksa boş metin döner.
+        """
+        hits = self.search(query, k)
+        if not hits:
+            return ""
+
+        # Bütçe en yüksek skorlu parçalardan başlayarak harcanır, çıktı doküman sırasındadır
+        selected = []
+        used = 0
+        for _score, chunk_id in hits:
+            block = (
+                f"[Bölüm {chunk_id + 1}/{self.n_chunks}, "
+                f"bayt {self.starts[chunk_id]}-{self.ends[chunk_id]}]\n"
+                + self.chunk_text(chunk_id).strip()
+            )
+            cost = count_tokens(block)
+            if used + cost > max_tokens:
+                block = truncate_to_tokens(block, max_tokens - used, suffix=" …")
+                if block:
+                    selected.append((chunk_id, block))
+                break
+            selected.append((chunk_id, block))
+            used += cost
+        return "\n\n".join(block for _, block in sorted(selected))
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
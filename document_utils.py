@@ -1,24 +1,57 @@
 # document_utils.py
 
+import hashlib
+import json
 import os
-from typing import Tuple
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple
 
-import pandas as pd
+from config import (
+    DEBUG,
+    DOC_TEXT_MAX_TOKENS,
+    DOC_STATS_MAX_TOKENS,
+    CSV_CHUNK_ROWS,
+    EXCEL_CHUNK_ROWS,
+    EXCEL_MAX_WORKERS,
+    TABLE_SAMPLE_ROWS,
+    QUANTILE_SKETCH_K,
+    HLL_PRECISION,
+    DOC_CACHE_ENABLED,
+    DOC_CACHE_DIR,
+    DOC_CACHE_MAX_BYTES,
+    DOC_CACHE_TTL,
+    DOC_CACHE_HASH_CONTENT,
+)
+from response_cache import ResponseCache
+from token_counter import truncate_to_tokens
 
+# pandas / numpy / openpyxl sadece tablo yüklenirken import edilir (düz metin ve
+# sohbet modunda başlangıç süresine eklenmesinler diye)
+if TYPE_CHECKING:
+    import pandas as pd
 
-def load_text_file(path: str, max_chars: int = 8000) -> str:
+
+def load_text_file(path: str, max_chars: int = 8000, max_tokens: int = None) -> str:
     """
-    Basit .txt dosyasını okur, çok uzunsa kırpar.
+    Basit .txt dosyasının başını okur, çok uzunsa kırpar.
+    max_tokens verilirse kırpma karakter yerine tahmini token bütçesine göre yapılır.
+    Dokümanın geri kalanına document_chunks.DocumentChunkIndex ile erişilir.
     """
     with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        content = f.read()
+        # Kırpılacak metnin tamamını okumaya gerek yok (token başına en fazla ~8 karakter)
+        limit = max_chars + 1 if max_tokens is None else max_tokens * 8 + 1
+        content = f.read(limit)
+    if max_tokens is not None:
+        truncated = truncate_to_tokens(content, max_tokens, suffix="\n\n...[metin kısaltıldı]...")
+        if truncated == content and len(content) == limit:
+            truncated = content[:-1] + "\n\n...[metin kısaltıldı]..."
+        return truncated
     if len(content) > max_chars:
         content = content[:max_chars] + "\n\n...[metin kısaltıldı]..."
     return content
 
 
 def summarize_dataframe(
-    df: pd.DataFrame,
+    df: "pd.DataFrame",
     max_rows_preview: int = 20,
     max_cols_preview: int = 10,
 ) -> Tuple[str, str]:
@@ -78,42 +111,254 @@ def summarize_dataframe(
     return preview_block, extra_block
 
 
-def load_document_for_model(path: str) -> Tuple[str, str]:
+def summarize_csv(
+    path: str,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+    max_rows_preview: int = 20,
+    max_cols_preview: int = 10,
+) -> Tuple[str, str]:
     """
-    Model için kullanılacak metni döndürür.
-    Dönüş:
-      (doc_main_text, extra_analysis_text)
+    CSV dosyasını parça parça okuyarak summarize_dataframe ile aynı biçimde özetler.
+    Dosyanın tamamı belleğe alınmaz; kantiller ve farklı değer sayıları tahminidir.
+    """
+    import pandas as pd
+    from table_stats import StreamingTableSummarizer
 
-    Desteklenen formatlar:
-      - .txt
-      - .csv
-      - .xls, .xlsx, .xlsm, .xlsb (openpyxl ile)
+    summarizer = StreamingTableSummarizer(max_rows_preview, max_cols_preview)
+    with pd.read_csv(path, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            summarizer.update(chunk)
+    return summarizer.render()
+
+
+# ============================================================
+#  EXCEL (SATIR SATIR OKUMA)
+# ============================================================
+
+def _header_names(row: Sequence) -> List[str]:
+    """
+    İlk satırdan kolon adları; boş ve tekrarlanan adlar pandas'taki gibi düzeltilir.
     """
+    names: List[str] = []
+    seen = {}
+    for i, value in enumerate(row):
+        name = f"Unnamed: {i}" if value is None or str(value).strip() == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
 
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Dosya bulunamadı: {path}")
+
+def _rows_to_chunks(rows: Iterator[Sequence], chunk_rows: int) -> Iterator["pd.DataFrame"]:
+    """
+    Satır akışını (ilk satır başlık) DataFrame parçalarına çevirir.
+    """
+    import pandas as pd
+
+    header: Optional[List[str]] = None
+    batch: List[Sequence] = []
+    for row in rows:
+        if header is None:
+            header = _header_names(row)
+            continue
+        if not any(value is not None for value in row):
+            continue
+        batch.append(tuple(row[:len(header)]) + (None,) * (len(header) - len(row)))
+        if len(batch) >= chunk_rows:
+            yield pd.DataFrame.from_records(batch, columns=header).infer_objects()
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch, columns=header).infer_objects()
+
+
+def _iter_sheet_rows(path: str, sheet_name: str) -> Iterator[Sequence]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsb":
+        from pyxlsb import open_workbook
+
+        with open_workbook(path) as wb:
+            with wb.get_sheet(sheet_name) as sheet:
+                for row in sheet.rows():
+                    yield [cell.v for cell in row]
+        return
+
+    from openpyxl import load_workbook
+
+    # read_only: hücreler XML'den akış halinde okunur, çalışma kitabının tamamı belleğe alınmaz
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb[sheet_name].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def list_excel_sheets(path: str) -> List[str]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsb":
+        try:
+            from pyxlsb import open_workbook
+        except ImportError:
+            raise RuntimeError(".xlsb dosyaları için pyxlsb paketi gerekli: pip install pyxlsb")
+        with open_workbook(path) as wb:
+            return list(wb.sheets)
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def summarize_excel_sheet(
+    path: str,
+    sheet_name: str,
+    chunk_rows: int = EXCEL_CHUNK_ROWS,
+) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Tek bir sayfayı satır satır okuyup özetler: (sayfa adı, ön izleme, istatistik).
+    Sayfa boşsa ön izleme ve istatistik None döner.
+    Süreç havuzunda çalıştırılabilmesi için modül seviyesinde tanımlıdır.
+    """
+    from table_stats import StreamingTableSummarizer
+
+    summarizer = StreamingTableSummarizer()
+    for chunk in _rows_to_chunks(_iter_sheet_rows(path, sheet_name), chunk_rows):
+        summarizer.update(chunk)
+    if not summarizer.columns:
+        return sheet_name, None, None
+    preview, stats = summarizer.render()
+    return sheet_name, preview, stats
+
+
+def _summarize_xls(path: str) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Eski .xls formatı openpyxl ile okunamaz; pandas (xlrd) ile tüm sayfalar yüklenir.
+    """
+    import pandas as pd
+    from table_stats import StreamingTableSummarizer
+
+    sheets = pd.read_excel(path, sheet_name=None)
+    results = []
+    for name, df in sheets.items():
+        if df.empty and len(df.columns) == 0:
+            results.append((name, None, None))
+            continue
+        summarizer = StreamingTableSummarizer()
+        summarizer.update(df)
+        results.append((name,) + summarizer.render())
+    return results
+
+
+def summarize_excel(
+    path: str,
+    max_workers: int = EXCEL_MAX_WORKERS,
+) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Çalışma kitabındaki tüm sayfaları özetler. Birden fazla sayfa varsa her sayfa
+    ayrı bir süreçte işlenir; sonuçlar çalışma kitabındaki sayfa sırasıyla döner.
+    """
+    if os.path.splitext(path)[1].lower() == ".xls":
+        return _summarize_xls(path)
+
+    sheets = list_excel_sheets(path)
+    workers = min(max_workers, len(sheets), os.cpu_count() or 1)
+    if workers <= 1:
+        return [summarize_excel_sheet(path, name) for name in sheets]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(summarize_excel_sheet, [path] * len(sheets), sheets))
+
+
+# ============================================================
+#  DOKÜMAN ÖZET ÖNBELLEĞİ
+# ============================================================
+
+# Özet biçimi değişirse eski kayıtlar kullanılmasın diye artırılır
+_DOC_CACHE_VERSION = 1
+
+_doc_cache: Optional[ResponseCache] = None
+
+
+def _file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_cache_key(path: str, hash_content: bool = DOC_CACHE_HASH_CONTENT) -> str:
+    """
+    Dosya kimliği (yol + boyut + mtime ya da içerik hash'i) ve özeti etkileyen
+    ayarlar için SHA-256 anahtarı.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if hash_content:
+        identity = ["sha256", _file_sha256(path)]
+    else:
+        st = os.stat(path)
+        identity = ["stat", os.path.abspath(path), st.st_size, st.st_mtime_ns]
+    settings = [
+        _DOC_CACHE_VERSION,
+        DOC_TEXT_MAX_TOKENS,
+        DOC_STATS_MAX_TOKENS,
+        TABLE_SAMPLE_ROWS,
+        QUANTILE_SKETCH_K,
+        HLL_PRECISION,
+    ]
+    canonical = json.dumps([ext, identity, settings], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _get_doc_cache() -> Optional[ResponseCache]:
+    global _doc_cache
+    if not DOC_CACHE_ENABLED:
+        return None
+    if _doc_cache is None:
+        # Sadece disk katmanı anlamlı; her süreç dosyayı bir kez açar
+        _doc_cache = ResponseCache(
+            max_entries=16,
+            max_bytes=DOC_CACHE_MAX_BYTES,
+            ttl=DOC_CACHE_TTL,
+            disk_dir=DOC_CACHE_DIR,
+            disk_max_bytes=DOC_CACHE_MAX_BYTES,
+        )
+    return _doc_cache
+
+
+def _load_document(path: str) -> Tuple[str, str]:
+    """
+    load_document_for_model'in önbelleksiz hali: dosyayı okuyup özetler.
+    """
 
     ext = os.path.splitext(path)[1].lower()
 
    
     if ext == ".txt":
-        main_text = load_text_file(path)
+        main_text = load_text_file(path, max_tokens=DOC_TEXT_MAX_TOKENS)
         extra = "Bu doküman düz metin (.txt) olarak yüklendi. Ek tablo istatistiği üretilmedi."
         return main_text, extra
 
    
     if ext == ".csv":
         try:
-            df = pd.read_csv(path)
+            preview, stats = summarize_csv(path)
         except Exception as e:
             raise RuntimeError(f"CSV dosyası pandas ile okunamadı: {e}")
 
-        preview, stats = summarize_dataframe(df)
         main_text = (
             "Bu dosya CSV formatında bir tablo olarak yüklendi.\n\n"
             "=== TABLO ÖN İZLEME ===\n"
             f"{preview}\n"
         )
+        stats = truncate_to_tokens(stats, DOC_STATS_MAX_TOKENS, suffix="\n...[istatistikler kısaltıldı]...")
         extra = (
             "=== TABLO İSTATİSTİK ÖZETİ ===\n"
             f"{stats}\n"
@@ -123,21 +368,29 @@ def load_document_for_model(path: str) -> Tuple[str, str]:
 
     if ext in {".xls", ".xlsx", ".xlsm", ".xlsb"}:
         try:
-        
-            df = pd.read_excel(path, engine="openpyxl")
+            sheets = summarize_excel(path)
         except Exception as e:
-            raise RuntimeError(f"Excel dosyası pandas + openpyxl ile okunamadı: {e}")
+            raise RuntimeError(f"Excel dosyası okunamadı: {e}")
+
+        previews = []
+        stats_parts = []
+        for name, preview, stats in sheets:
+            title = f" (Sayfa: {name})" if len(sheets) > 1 else ""
+            if preview is None:
+                previews.append(f"=== TABLO ÖN İZLEME{title} ===\nSayfa boş.\n")
+                continue
+            previews.append(f"=== TABLO ÖN İZLEME{title} ===\n{preview}\n")
+            stats_parts.append(f"=== TABLO İSTATİSTİK ÖZETİ{title} ===\n{stats}\n")
 
-        preview, stats = summarize_dataframe(df)
         main_text = (
             "Bu dosya Excel formatında bir tablo olarak yüklendi "
-            "(pandas + openpyxl ile DataFrame'e dönüştürüldü).\n\n"
-            "=== TABLO ÖN İZLEME ===\n"
-            f"{preview}\n"
+            f"({len(sheets)} sayfa, satır satır okunarak özetlendi).\n\n"
+            + "\n".join(previews)
         )
-        extra = (
-            "=== TABLO İSTATİSTİK ÖZETİ ===\n"
-            f"{stats}\n"
+        extra = truncate_to_tokens(
+            "\n".join(stats_parts) or "Sayısal kolon bulunamadı.\n",
+            DOC_STATS_MAX_TOKENS,
+            suffix="\n...[istatistikler kısaltıldı]...",
         )
         return main_text, extra
 
@@ -145,3 +398,38 @@ def load_document_for_model(path: str) -> Tuple[str, str]:
         f"Şu an sadece .txt, .csv ve Excel (.xls, .xlsx, .xlsm, .xlsb) dosyalarını destekliyorum. "
         f"Verilen uzantı: {ext}"
     )
+
+
+def load_document_for_model(path: str) -> Tuple[str, str]:
+    """
+    Model için kullanılacak metni döndürür.
+    Dönüş:
+      (doc_main_text, extra_analysis_text)
+
+    Desteklenen formatlar:
+      - .txt
+      - .csv
+      - .xlsx, .xlsm (openpyxl read-only ile, tüm sayfalar)
+      - .xlsb (pyxlsb kuruluysa), .xls (pandas/xlrd ile)
+
+    Sonuç DOC_CACHE_DIR altında saklanır; dosya değişmediyse tekrar okunmaz.
+    """
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dosya bulunamadı: {path}")
+
+    cache = _get_doc_cache()
+    if cache is None:
+        return _load_document(path)
+
+    key = document_cache_key(path)
+    cached = cache.get(key)
+    if cached is not None:
+        if DEBUG:
+            print(f"[DOC] Özet önbellekten geldi: {path}")
+        main_text, extra = json.loads(cached)
+        return main_text, extra
+
+    main_text, extra = _load_document(path)
+    cache.put(key, json.dumps([main_text, extra], ensure_ascii=False))
+    return main_text, extra
@@ -0,0 +1,163 @@
+# history_manager.py
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+from config import (
+    HISTORY_KEEP_RECENT_TURNS,
+    HISTORY_SUMMARY_MAX_TOKENS,
+    HISTORY_TOKEN_BUDGETS,
+    HISTORY_INCLUDE_EXPERT_ANSWERS,
+)
+from token_counter import count_tokens
+
+# Geçmişteki "[OpenAI] ..." gibi etiketlerin hangi uzmana ait olduğu
+EXPERT_TAGS = {
+    "OpenAI": "openai",
+    "Gemini": "gemini",
+    "Grok": "grok",
+    "Claude": "claude",
+}
+
+_TAG_RE = re.compile(r"^\[([A-Za-z]+)\] ")
+
+SUMMARY_HEADER = "Önceki konuşmanın özeti (eski turlar kısaltıldı):"
+
+
+def message_tag(message: Dict[str, str]) -> Optional[str]:
+    """
+    "[OpenAI] ..." biçimindeki asistan mesajının etiketini ("OpenAI") döndürür.
+    """
+    if message.get("role") != "assistant":
+        return None
+    match = _TAG_RE.match(message.get("content", ""))
+    return match.group(1) if match else None
+
+
+def split_turns(history: Sequence[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+    """
+    Geçmişi turlara böler; her tur bir kullanıcı mesajıyla başlar.
+    """
+    turns: List[List[Dict[str, str]]] = []
+    for message in history:
+        if message.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    # Mümkünse cümle sonunda kes
+    end = max(cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    if end > max_chars // 2:
+        cut = cut[: end + 1]
+    return cut + " …"
+
+
+def extractive_turn_summary(turn: Sequence[Dict[str, str]]) -> str:
+    """
+    Bir turu tek satırlık özete indirir: kullanıcı sorusu + DecisionAgent kararı.
+    Uzmanların ham cevapları özete alınmaz; ortak sonuç zaten kararın içinde.
+    """
+    question = ""
+    decision = ""
+    for message in turn:
+        tag = message_tag(message)
+        content = message.get("content", "")
+        if message.get("role") == "user" and not question:
+            question = content
+        elif tag == "Decision":
+            decision = _TAG_RE.sub("", content, count=1)
+    line = f"- Soru: {_shorten(question, 300)}"
+    if decision:
+        line += f"\n  Karar: {_shorten(decision, 500)}"
+    return line
+
+
+class HistoryManager:
+    """
+    conversation_history için sağlayıcı başına token bütçeli bağlam penceresi.
+
+      - Son HISTORY_KEEP_RECENT_TURNS tur olduğu gibi tutulur.
+      - Daha eski turlar compact() ile geçmişten çıkarılır ve tur başına bir
+        satırlık özete katlanır; özet HISTORY_SUMMARY_MAX_TOKENS'ı aşarsa en eski
+        satırlar atılır (kayan özet).
+      - build_context() her sağlayıcı için özet + son turları bütçeye sığdırır;
+        istenirse diğer uzmanların ham cevaplarını çıkarır.
+    """
+
+    def __init__(
+        self,
+        keep_recent_turns: int = HISTORY_KEEP_RECENT_TURNS,
+        budgets: Optional[Dict[str, int]] = None,
+        summary_max_tokens: int = HISTORY_SUMMARY_MAX_TOKENS,
+        include_other_experts: bool = HISTORY_INCLUDE_EXPERT_ANSWERS,
+        summarizer: Callable[[Sequence[Dict[str, str]]], str] = extractive_turn_summary,
+    ):
+        self.keep_recent_turns = keep_recent_turns
+        self.budgets = dict(HISTORY_TOKEN_BUDGETS if budgets is None else budgets)
+        self.summary_max_tokens = summary_max_tokens
+        self.include_other_experts = include_other_experts
+        self.summarizer = summarizer
+        self.summary_lines: List[str] = []
+
+    # ---------------- özetleme ----------------
+
+    def compact(self, history: List[Dict[str, str]]) -> int:
+        """
+        Son turlardan eskisini `history` listesinden çıkarıp özete ekler.
+        Katlanan mesaj sayısını döndürür.
+        """
+        turns = split_turns(history)
+        if len(turns) <= self.keep_recent_turns:
+            return 0
+
+        old_turns = turns[: len(turns) - self.keep_recent_turns]
+        for turn in old_turns:
+            self.summary_lines.append(self.summarizer(turn))
+
+        while len(self.summary_lines) > 1 and count_tokens(self.summary_text()) > self.summary_max_tokens:
+            self.summary_lines.pop(0)
+
+        folded = sum(len(turn) for turn in old_turns)
+        del history[:folded]
+        return folded
+
+    def summary_text(self) -> str:
+        return SUMMARY_HEADER + "\n" + "\n".join(self.summary_lines)
+
+    # ---------------- bağlam ----------------
+
+    def build_context(self, history: Sequence[Dict[str, str]], provider: str) -> List[Dict[str, str]]:
+        """
+        `provider` ("openai", "gemini", "grok", "claude" veya "decision") için
+        gönderilecek geçmişi döndürür. Son mesaj (şimdiki soru) her zaman korunur;
+        bütçe aşılırsa en eski mesajlardan başlanarak atılır.
+        """
+        messages = [m for m in history if self._visible_to(m, provider)]
+
+        summary = []
+        if self.summary_lines:
+            summary = [{"role": "system", "content": self.summary_text()}]
+
+        budget = self.budgets.get(provider)
+        if budget is None:
+            return summary + messages
+
+        total = sum(count_tokens(m.get("content", ""), provider) for m in summary + messages)
+        while total > budget and len(messages) > 1:
+            total -= count_tokens(messages.pop(0).get("content", ""), provider)
+        if summary and total > budget:
+            summary = []
+        return summary + messages
+
+    def _visible_to(self, message: Dict[str, str], provider: str) -> bool:
+        if self.include_other_experts:
+            return True
+        tag = message_tag(message)
+        owner = EXPERT_TAGS.get(tag)
+        return owner is None or owner == provider
@@ -0,0 +1,522 @@
+# http_transport.py
+
+import gzip
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import (
+    DEBUG,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_MAXSIZE,
+    HTTP_POOL_IDLE_TIMEOUT,
+    HTTP2_ENABLED,
+)
+
+# http.client / ssl / asyncio ilk bağlantıda import edilir; modülü import etmek
+# (CLI açılışı) bunların ~80 ms'lik yükleme süresini beklemez.
+if TYPE_CHECKING:
+    import http.client
+
+
+# ============================================================
+#  HATA TİPİ
+# ============================================================
+
+class HTTPStatusError(Exception):
+    """
+    Sunucu 4xx/5xx döndürdüğünde fırlatılır.
+    urllib.error.HTTPError ile aynı bilgileri taşır (code, reason, headers) ve
+    gövde zaten okunmuş olarak `body` içinde gelir.
+    """
+
+    def __init__(self, code: int, reason: str, headers: Dict[str, str], body: str):
+        super().__init__(f"HTTP Error {code}: {reason}")
+        self.code = code
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+def _stale_connection_errors() -> Tuple[type, ...]:
+    """
+    Tekrar kullanılan (keep-alive) bağlantı, sunucu tarafından kapatılmışsa
+    isteği bir kez taze bağlantıyla tekrar denemek güvenlidir.
+    """
+    import http.client
+
+    return (
+        http.client.RemoteDisconnected,
+        http.client.BadStatusLine,
+        ConnectionResetError,
+        BrokenPipeError,
+    )
+
+
+# ============================================================
+#  CEVAP NESNESİ
+# ============================================================
+
+class TransportResponse:
+    """
+    Havuzdan alınmış bir bağlantı üzerindeki cevap.
+    Gövde tamamen okunduğunda (read / iter_lines sonu) bağlantı havuza geri döner.
+    gzip içerik otomatik açılır.
+    """
+
+    def __init__(self, pool: "HostPool", conn, resp: "http.client.HTTPResponse", stats: "TransportStats"):
+        self._pool = pool
+        self._conn = conn
+        self._resp = resp
+        self._stats = stats
+        self._released = False
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = {k.lower(): v for k, v in resp.getheaders()}
+        self._gzip = self.headers.get("content-encoding", "").lower() == "gzip"
+        if self._gzip:
+            stats.incr("gzip_responses")
+
+    def read(self) -> bytes:
+        try:
+            raw = self._resp.read()
+        except Exception:
+            self._release(reuse=False)
+            raise
+        self._stats.incr("bytes_received", len(raw))
+        self._release(reuse=True)
+        if self._gzip and raw:
+            return gzip.decompress(raw)
+        return raw
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.read().decode(encoding)
+
+    def iter_lines(self) -> Iterator[str]:
+        """
+        Gövdeyi satır satır (SSE gibi akışlar için) verir.
+        """
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if self._gzip else None
+        pending = b""
+        try:
+            while True:
+                chunk = self._resp.read1(8192) if hasattr(self._resp, "read1") else self._resp.read(8192)
+                if not chunk:
+                    break
+                self._stats.incr("bytes_received", len(chunk))
+                if decoder is not None:
+                    chunk = decoder.decompress(chunk)
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+            if decoder is not None:
+                pending += decoder.flush()
+            if pending:
+                yield pending.rstrip(b"\r").decode("utf-8", errors="replace")
+        except BaseException:
+            self._release(reuse=False)
+            raise
+        self._release(reuse=True)
+
+    def close(self) -> None:
+        """
+        Gövde okunmadan bırakılan cevaplarda bağlantıyı kapatır.
+        """
+        self._release(reuse=False)
+
+    def _release(self, reuse: bool) -> None:
+        if self._released:
+            return
+        self._released = True
+        reusable = reuse and self._resp.isclosed() and not self._resp.will_close
+        if not self._resp.isclosed():
+            self._resp.close()
+        self._pool.release(self._conn, reusable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================
+#  METRİKLER
+# ============================================================
+
+class TransportStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "connections_closed": 0,
+            "stale_retries": 0,
+            "gzip_responses": 0,
+            "bytes_received": 0,
+        }
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+# ============================================================
+#  HOST BAŞINA BAĞLANTI HAVUZU
+# ============================================================
+
+class HostPool:
+    """
+    Tek bir (scheme, host, port) için kalıcı bağlantı havuzu.
+    Boştaki bağlantılar LIFO kullanılır; HTTP_POOL_IDLE_TIMEOUT'tan uzun
+    bekleyenler kapatılır.
+    """
+
+    def __init__(self, scheme: str, host: str, port: int, maxsize: int, stats: TransportStats):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self._stats = stats
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[object, float]] = []
+        self.in_use = 0
+        self.opened = 0
+        self.reused = 0
+        self._ssl_context = None
+
+    def _new_connection(self, timeout: float):
+        """
+        Bağlantı nesnesini oluşturur; soket Transport.request içinde connect() ile,
+        havuz kilidi dışında ve HTTP_CONNECT_TIMEOUT ile açılır.
+        """
+        import http.client
+
+        connect_timeout = min(timeout, HTTP_CONNECT_TIMEOUT)
+        if self.scheme == "https":
+            if self._ssl_context is None:
+                import ssl
+
+                self._ssl_context = ssl.create_default_context()
+            conn = http.client.HTTPSConnection(
+                self.host, self.port, timeout=connect_timeout, context=self._ssl_context
+            )
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=connect_timeout)
+        self.opened += 1
+        self._stats.incr("connections_opened")
+        return conn
+
+    def acquire(self, timeout: float) -> Tuple[object, bool]:
+        """
+        (bağlantı, tekrar_kullanıldı_mı) döndürür.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used > HTTP_POOL_IDLE_TIMEOUT:
+                    conn.close()
+                    self._stats.incr("connections_closed")
+                    continue
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                self.in_use += 1
+                self.reused += 1
+                self._stats.incr("connections_reused")
+                return conn, True
+            self.in_use += 1
+            return self._new_connection(timeout), False
+
+    def release(self, conn, reusable: bool) -> None:
+        with self._lock:
+            self.in_use -= 1
+            if reusable and len(self._idle) < self.maxsize:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+        self._stats.incr("connections_closed")
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+            self._stats.incr("connections_closed")
+
+    def describe(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "opened": self.opened,
+                "reused": self.reused,
+            }
+
+
+# ============================================================
+#  TRANSPORT
+# ============================================================
+
+class Transport:
+    """
+    Tüm sağlayıcı çağrılarının ortak HTTP katmanı.
+      - host başına kalıcı (keep-alive) bağlantı havuzu
+      - gzip cevap açma
+      - HTTP2_ENABLED=True ve httpx[http2] kuruluysa HTTP/2
+      - senkron (request/post) ve asenkron (apost) API
+    """
+
+    def __init__(self, maxsize: int = HTTP_POOL_MAXSIZE, http2: bool = HTTP2_ENABLED):
+        self.maxsize = maxsize
+        self.stats = TransportStats()
+        self._pools: Dict[Tuple[str, str, int], HostPool] = {}
+        self._lock = threading.Lock()
+        self._http2_client = _make_http2_client() if http2 else None
+
+    def _pool_for(self, scheme: str, host: str, port: int) -> HostPool:
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = HostPool(scheme, host, port, self.maxsize, self.stats)
+                self._pools[key] = pool
+            return pool
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = HTTP_TIMEOUT,
+    ):
+        """
+        İsteği gönderir ve gövdesi henüz okunmamış cevabı döndürür.
+        Durum kodu kontrol edilmez; bunun için post() kullanılır.
+        """
+        headers = dict(headers or {})
+        headers.setdefault("Accept-Encoding", "gzip")
+        self.stats.incr("requests")
+
+        if self._http2_client is not None:
+            return _Http2Response.send(self._http2_client, method, url, body, headers, timeout, self.stats)
+
+        parts = urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        pool = self._pool_for(scheme, parts.hostname, port)
+        stale_errors = _stale_connection_errors()
+
+        while True:
+            conn, reused = pool.acquire(timeout)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                    # Bağlantı kuruldu; bundan sonrası okuma zaman aşımına tabi
+                    conn.timeout = timeout
+                    conn.sock.settimeout(timeout)
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except stale_errors:
+                pool.release(conn, reusable=False)
+                if reused:
+                    self.stats.incr("stale_retries")
+                    continue
+                raise
+            except BaseException:
+                pool.release(conn, reusable=False)
+                raise
+            return TransportResponse(pool, conn, resp, self.stats)
+
+    def post(
+        self,
+        url: str,
+        data: bytes,
+        headers: Dict[str, str],
+        timeout: float = HTTP_TIMEOUT,
+    ) -> str:
+        """
+        POST isteği atar, gövdeyi metin olarak döndürür.
+        4xx/5xx durumunda gövdesiyle birlikte HTTPStatusError fırlatır.
+        """
+        resp = self.request("POST", url, body=data, headers=headers, timeout=timeout)
+        text = resp.text()
+        if resp.status >= 400:
+            raise HTTPStatusError(resp.status, resp.reason, resp.headers, text)
+        return text
+
+    async def apost(
+        self,
+        url: str,
+        data: bytes,
+        headers: Dict[str, str],
+        timeout: float = HTTP_TIMEOUT,
+    ) -> str:
+        """
+        post()'un asyncio sürümü; bağlantı havuzunu aynen paylaşır.
+        """
+        import asyncio
+
+        return await asyncio.to_thread(self.post, url, data, headers, timeout)
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            pools = list(self._pools.items())
+        return {f"{scheme}://{host}:{port}": pool.describe() for (scheme, host, port), pool in pools}
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close_all()
+        if self._http2_client is not None:
+            self._http2_client.close()
+
+
+# ============================================================
+#  OPSİYONEL HTTP/2 (httpx[http2])
+# ============================================================
+
+def _make_http2_client():
+    try:
+        import httpx
+        import h2  # noqa: F401  (httpx HTTP/2 için h2 paketine ihtiyaç duyar)
+    except ImportError:
+        if DEBUG:
+            print("[HTTP] HTTP2_ENABLED=True ama httpx[http2] kurulu değil, HTTP/1.1 keep-alive kullanılacak.")
+        return None
+    limits = httpx.Limits(
+        max_keepalive_connections=HTTP_POOL_MAXSIZE,
+        keepalive_expiry=HTTP_POOL_IDLE_TIMEOUT,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    return httpx.Client(http2=True, limits=limits, timeout=timeout)
+
+
+def _httpx_timeout(read_timeout: float):
+    import httpx
+
+    return httpx.Timeout(read_timeout, connect=min(read_timeout, HTTP_CONNECT_TIMEOUT))
+
+
+class _Http2Response:
+    """
+    httpx cevabını TransportResponse ile aynı arayüze uyarlar.
+    """
+
+    def __init__(self, resp, stats: TransportStats):
+        self._resp = resp
+        self._stats = stats
+        self.status = resp.status_code
+        self.reason = resp.reason_phrase
+        self.headers = {k.lower(): v for k, v in resp.headers.items()}
+
+    @classmethod
+    def send(cls, client, method, url, body, headers, timeout, stats):
+        request = client.build_request(
+            method, url, content=body, headers=headers,
+            timeout=_httpx_timeout(timeout),
+        )
+        return cls(client.send(request, stream=True), stats)
+
+    def read(self) -> bytes:
+        try:
+            raw = self._resp.read()
+        finally:
+            self._resp.close()
+        self._stats.incr("bytes_received", len(raw))
+        return raw
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.read().decode(encoding)
+
+    def iter_lines(self) -> Iterator[str]:
+        try:
+            for line in self._resp.iter_lines():
+                yield line
+        finally:
+            self._resp.close()
+
+    def close(self) -> None:
+        self._resp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================
+#  SERVER-SENT EVENTS
+# ============================================================
+
+def iter_sse_events(lines: Iterator[str]) -> Iterator[Tuple[str, str]]:
+    """
+    text/event-stream satırlarını (event, data) çiftlerine çevirir.
+    Birden fazla "data:" satırı "\n" ile birleştirilir; boş satır olayı bitirir.
+    Olay adı verilmemişse "message" kullanılır.
+    """
+    event = "message"
+    data_lines: List[str] = []
+    for line in lines:
+        if not line:
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event = "message"
+            data_lines = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data_lines.append(value)
+    if data_lines:
+        yield event, "\n".join(data_lines)
+
+
+# ============================================================
+#  PAYLAŞILAN ÖRNEK
+# ============================================================
+
+_transport: Optional[Transport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
+
+
+def get_transport_stats() -> Dict[str, object]:
+    """
+    Bağlantı tekrar kullanımı ve havuz durumları:
+      {"counters": {...}, "pools": {"https://api.openai.com:443": {...}, ...}}
+    """
+    transport = get_transport()
+    return {
+        "counters": transport.stats.snapshot(),
+        "pools": transport.pool_stats(),
+    }
@@ -1,38 +1,67 @@
 # main.py
+#
+#   python main.py                 yeni oturum (kimliği başta yazılır)
+#   python main.py --session ID    önceki oturuma kaldığı yerden devam
 
-from multi_agent import Orchestrator
+import argparse
+
+from config import DEBUG, STREAM_OUTPUT, TRACE_ENABLED
+from console import PanelStreamPrinter, print_panel_result
+from http_transport import get_transport_stats
+from memory_writer import get_memory_writer_stats
+from rate_limiter import get_rate_limiter_states
+from resilience import get_breaker_states
+from session_store import SessionStore
+from tracing import get_trace_summary
+from usage_stats import get_usage_stats
 
 def main():
-    orchestrator = Orchestrator()
+    parser = argparse.ArgumentParser(description="Çok modelli panel sohbeti")
+    parser.add_argument("--session", default=None, help="devam edilecek oturum kimliği")
+    args = parser.parse_args()
+
+    store = SessionStore()
+    try:
+        session = store.acquire(args.session) if args.session else store.create()
+    except KeyError:
+        print(f"❌ Oturum bulunamadı: {args.session}")
+        return
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    orchestrator = session.orchestrator
 
     print("OpenAI + Gemini + Grok + Claude Multi-Model Panel 👋")
     print("Modeller tartışacak, DecisionAgent ortak cevap verecek.")
-    print("Çıkmak için 'q' veya 'quit' yaz.\n")
+    print("Çıkmak için 'q' veya 'quit' yaz.")
+    if args.session:
+        turns = sum(1 for m in orchestrator.conversation_history if m["role"] == "user")
+        print(f"Oturuma devam ediliyor: {session.session_id} ({turns} tur hafızada)\n")
+    else:
+        print(f"Oturum: {session.session_id}  (devam etmek için: python main.py --session {session.session_id})\n")
 
     while True:
         user_message = input("Sen: ")
 
         if user_message.strip().lower() in {"q", "quit", "exit"}:
             print("Görüşürüz! 👋")
+            if DEBUG:
+                print("[HTTP] Bağlantı havuzu istatistikleri:", get_transport_stats())
+                print("[USAGE] Sağlayıcı token kullanımı:", get_usage_stats())
+                print("[RETRY] Devre kesici durumları:", get_breaker_states())
+                print("[RATE] Rate limit kuyrukları:", get_rate_limiter_states())
+                print("[QA_MEMORY] Hafıza yazıcısı:", get_memory_writer_stats())
+            if TRACE_ENABLED:
+                print("\n[TRACE] Aşama süreleri:\n" + get_trace_summary())
+            store.release(session)
             break
 
-        result = orchestrator.ask_panel(user_message)
-
-        print("\n--- OpenAI Cevabı ---")
-        print(result["openai"])
-
-        print("\n--- Gemini Cevabı ---")
-        print(result["gemini"])
-
-        print("\n--- Grok Cevabı ---")
-        print(result["grok"])
-
-        print("\n--- Claude Cevabı ---")
-        print(result["claude"])
-
-        print("\n=== ORTAK SONUÇ (DecisionAgent) ===")
-        print(result["final"])
-        print("====================================\n")
+        if STREAM_OUTPUT:
+            orchestrator.ask_panel(user_message, on_event=PanelStreamPrinter())
+        else:
+            print_panel_result(orchestrator.ask_panel(user_message))
+        # Her turdan sonra diske yazılır; program kapansa da oturum kaybolmaz
+        store.save(session)
 
 
 if __name__ == "__main__":
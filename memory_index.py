@@ -0,0 +1,333 @@
+# memory_index.py
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import DEBUG, QA_MEMORY_INDEX_MAX_POSTINGS
+from qa_segments import get_segment_reader, iter_segment_records, list_segments, read_record
+from text_search import bm25_idf, bm25_term_score, tokenize
+
+# Kaydın yeri: (segment, offset). segment 0 aktif JSONL'dir ve offset bayt offset'idir;
+# diğerleri qa_segments'teki mühürlü segmentlerdir ve offset segmentteki kayıt numarasıdır.
+Location = Tuple[int, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id      INTEGER PRIMARY KEY,
+    offset  INTEGER NOT NULL,
+    length  INTEGER NOT NULL,
+    segment INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df   INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term   TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf     INTEGER NOT NULL,
+    dl     INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+"""
+
+
+class MemoryIndex:
+    """
+    qa_memory.jsonl için disk üzerinde (SQLite) ters indeks.
+
+      terms    : kelime -> kaç soruda geçtiği (df)
+      postings : kelime -> (soru id, kelime sıklığı, soru uzunluğu)
+      docs     : soru id -> kaydın yeri (segment, offset)
+
+    Aktif JSONL dosyasının hangi bayta kadar indekslendiği meta tablosunda tutulur;
+    sync() sadece o noktadan sonra eklenen satırları okur. Dosya küçülmüşse
+    (silinmiş / değiştirilmişse) indeks segmentlerden ve aktif dosyadan yeniden kurulur.
+    Aktif dosya mühürlendiğinde kayıtların yeri move_active() ile segmente taşınır,
+    sıkıştırmadan sonra rebuild() çağrılır.
+    Sadece sorular (q) indekslenir, sıralama BM25 ile yapılır.
+    """
+
+    def __init__(self, jsonl_path: str, index_path: str, segment_dir: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.index_path = index_path
+        self.segment_dir = segment_dir
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(index_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(docs)")}
+        if "segment" not in columns:
+            # Segmentlerden önceki indeks: tüm kayıtlar aktif dosyada
+            self._db.execute("ALTER TABLE docs ADD COLUMN segment INTEGER NOT NULL DEFAULT 0")
+
+    # ---------------- meta ----------------
+
+    def _meta(self, key: str) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, key: str, value: int) -> None:
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    # ---------------- yazma ----------------
+
+    def sync(self) -> int:
+        """
+        JSONL'a sonradan eklenmiş satırları indekse ekler, eklenen kayıt sayısını döndürür.
+        """
+        try:
+            size = os.path.getsize(self.jsonl_path)
+        except OSError:
+            return 0
+
+        with self._lock:
+            if size == self._meta("indexed_bytes"):
+                return 0
+
+            # Başka bir süreç de aynı anda senkronize ediyor olabilir: kilidi alıp tekrar bak
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                indexed = self._meta("indexed_bytes")
+                if size < indexed:
+                    if DEBUG:
+                        print("[QA_MEMORY] Hafıza dosyası küçülmüş, indeks yeniden kuruluyor.")
+                    self._reset()
+                    added = self._index_entries(
+                        (segment, record, obj) for segment, record, obj in iter_segment_records(self.segment_dir)
+                    )
+                    indexed = 0
+                else:
+                    added = 0
+                more, indexed = self._index_active_from(indexed)
+                self._set_meta("indexed_bytes", indexed)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return added + more
+
+    def move_active(self, segment: int, moves: Sequence[Tuple[int, int]]) -> None:
+        """
+        Aktif dosya mühürlendi: (aktif offset, segmentteki kayıt no) çiftlerine göre kayıtların
+        yeri segmente taşınır; aktif dosya baştan indekslenecek şekilde işaretlenir.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "UPDATE docs SET segment = ?, offset = ? WHERE segment = 0 AND offset = ?",
+                    ((segment, record, offset) for offset, record in moves),
+                )
+                # Taşınamayan (artık var olmayan) aktif kayıtlar aramada bulunmasın
+                self._delete_active_docs()
+                self._set_meta("indexed_bytes", 0)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _delete_active_docs(self) -> None:
+        """
+        Aktif dosyadaki (segment 0) kayıtları posting'leri ve df / n_docs / total_len
+        katkılarıyla birlikte siler; çağıran işlemin içinde çalışır.
+        """
+        n_removed, removed_len = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE segment = 0"
+        ).fetchone()
+        if not n_removed:
+            return
+        df_delta = self._db.execute(
+            "SELECT term, COUNT(*) FROM postings "
+            "WHERE doc_id IN (SELECT id FROM docs WHERE segment = 0) GROUP BY term"
+        ).fetchall()
+        self._db.executemany(
+            "UPDATE terms SET df = df - ? WHERE term = ?", ((n, term) for term, n in df_delta)
+        )
+        self._db.execute("DELETE FROM terms WHERE df <= 0")
+        self._db.execute("DELETE FROM postings WHERE doc_id IN (SELECT id FROM docs WHERE segment = 0)")
+        self._db.execute("DELETE FROM docs WHERE segment = 0")
+        self._set_meta("n_docs", self._meta("n_docs") - n_removed)
+        self._set_meta("total_len", self._meta("total_len") - removed_len)
+
+    def rebuild(self, segments: Optional[Sequence[int]] = None) -> int:
+        """
+        İndeksi verilen segmentlerden (verilmezse klasördeki tümü) ve aktif dosyadan
+        tek bir işlemde yeniden kurar.
+        """
+        if segments is None:
+            segments = list_segments(self.segment_dir)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._reset()
+                added = self._index_entries(
+                    (segment, record, obj)
+                    for segment in segments
+                    for record, obj in get_segment_reader(self.segment_dir, segment)
+                )
+                more, indexed = self._index_active_from(0)
+                self._set_meta("indexed_bytes", indexed)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return added + more
+
+    def _reset(self) -> None:
+        for table in ("docs", "terms", "postings", "meta"):
+            self._db.execute(f"DELETE FROM {table}")
+
+    def _index_active_from(self, offset: int) -> Tuple[int, int]:
+        """
+        Aktif dosyayı offset'ten itibaren indeksler; (eklenen kayıt, yeni offset) döndürür.
+        """
+        entries = []
+        try:
+            f = open(self.jsonl_path, "rb")
+        except FileNotFoundError:
+            return 0, 0
+        with f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Yazımı henüz bitmemiş son satır; bir sonraki sync'te alınır
+                    break
+                line_offset = offset
+                offset += len(raw)
+                try:
+                    obj = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                entries.append((0, line_offset, obj))
+        return self._index_entries(entries), offset
+
+    def _index_entries(self, entries: Iterable[Tuple[int, int, Dict]]) -> int:
+        added = 0
+        n_docs = self._meta("n_docs")
+        total_len = self._meta("total_len")
+        df_delta: Counter = Counter()
+        postings: List[Tuple[str, int, int, int]] = []
+        docs: List[Tuple[int, int, int, int]] = []
+        doc_id = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM docs").fetchone()[0]
+
+        for segment, offset, obj in entries:
+            if not isinstance(obj, dict):
+                continue
+            tokens = tokenize(obj.get("q", ""))
+            if not tokens:
+                continue
+
+            doc_id += 1
+            docs.append((doc_id, offset, len(tokens), segment))
+            for term, tf in Counter(tokens).items():
+                postings.append((term, doc_id, tf, len(tokens)))
+                df_delta[term] += 1
+            n_docs += 1
+            total_len += len(tokens)
+            added += 1
+
+        self._db.executemany("INSERT INTO docs (id, offset, length, segment) VALUES (?, ?, ?, ?)", docs)
+        self._db.executemany("INSERT INTO postings (term, doc_id, tf, dl) VALUES (?, ?, ?, ?)", postings)
+        self._db.executemany(
+            "INSERT INTO terms (term, df) VALUES (?, ?) "
+            "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+            df_delta.items(),
+        )
+        self._set_meta("n_docs", n_docs)
+        self._set_meta("total_len", total_len)
+        return added
+
+    # ---------------- okuma ----------------
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[float, Location]]:
+        """
+        BM25 skoruna göre en iyi k kaydı (skor, kaydın yeri) olarak döndürür.
+
+        Kelimeler nadirden yaygına doğru işlenir. Yaygın kelimeler
+        (df > QA_MEMORY_INDEX_MAX_POSTINGS) tüm posting listesi taranmadan sadece
+        mevcut adayların skoruna eklenir; hiç aday yoksa en yeni kayıtları taranır.
+        """
+        terms = set(tokenize(query))
+        if not terms or k <= 0:
+            return []
+
+        with self._lock:
+            n_docs = self._meta("n_docs")
+            if n_docs == 0:
+                return []
+            avg_len = self._meta("total_len") / n_docs
+
+            term_dfs = []
+            for term in terms:
+                row = self._db.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+                if row:
+                    term_dfs.append((row[0], term))
+            term_dfs.sort()
+
+            scores: Dict[int, float] = {}
+            for df, term in term_dfs:
+                idf = bm25_idf(n_docs, df)
+                if df > QA_MEMORY_INDEX_MAX_POSTINGS and scores:
+                    rows = self._db.execute(
+                        "SELECT doc_id, tf, dl FROM postings WHERE term = ? AND doc_id IN "
+                        "(SELECT value FROM json_each(?))",
+                        (term, json.dumps(list(scores))),
+                    )
+                else:
+                    rows = self._db.execute(
+                        "SELECT doc_id, tf, dl FROM postings WHERE term = ? "
+                        "ORDER BY doc_id DESC LIMIT ?",
+                        (term, QA_MEMORY_INDEX_MAX_POSTINGS),
+                    )
+                for doc_id, tf, dl in rows:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + bm25_term_score(tf, dl, avg_len, idf)
+
+            # Eşit skorda daha yeni kayıt öne geçsin
+            best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+            result = []
+            for doc_id, score in best:
+                row = self._db.execute("SELECT segment, offset FROM docs WHERE id = ?", (doc_id,)).fetchone()
+                if row:
+                    result.append((score, (row[0], row[1])))
+            return result
+
+    def read_entry(self, location: Location) -> Dict[str, str]:
+        segment, offset = location
+        if segment:
+            return read_record(self.segment_dir, segment, offset)
+        with open(self.jsonl_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_indexes: Dict[Tuple[str, str], MemoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_memory_index(jsonl_path: str, index_path: str, segment_dir: Optional[str] = None) -> MemoryIndex:
+    key = (os.path.abspath(jsonl_path), os.path.abspath(index_path))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = MemoryIndex(jsonl_path, index_path, segment_dir)
+            _indexes[key] = index
+        return index
@@ -0,0 +1,310 @@
+# memory_writer.py
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from config import (
+    QA_MEMORY_BATCH_MAX,
+    QA_MEMORY_FLUSH_TIMEOUT,
+    QA_MEMORY_FSYNC,
+    QA_MEMORY_QUEUE_MAX,
+    QA_MEMORY_WRITE_ATTEMPTS,
+)
+from tracing import record_span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _report(message: str) -> None:
+    # Yazma hataları DEBUG kapalıyken de görünmeli: kaybolan hafıza kaydı sessiz kalmasın
+    print(f"❌ [QA_MEMORY] {message}", file=sys.stderr)
+
+
+class FileLock:
+    """
+    Süreçler arası özel kilit. POSIX'te dosyanın kendisi üzerinde flock; Windows'ta
+    yanındaki .lock dosyasının ilk baytı üzerinde msvcrt.locking.
+    """
+
+    def __init__(self, fd: int, path: str):
+        self._fd = fd
+        self._lock_fd: Optional[int] = None
+        if fcntl is None:
+            self._lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+
+    def __enter__(self) -> "FileLock":
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    os.lseek(self._lock_fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._lock_fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK ~10 sn denedikten sonra vazgeçer; kilit bırakılana kadar beklenir
+                    continue
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._lock_fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._lock_fd, msvcrt.LK_UNLCK, 1)
+
+    def close(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class MemoryWriter:
+    """
+    qa_memory.jsonl için toplu (group commit) yazıcı.
+
+    append() kaydı JSON satırına çevirip kuyruğa koyar ve hemen döner; arka plandaki
+    tek yazıcı thread kuyrukta biriken satırları (en fazla batch_max) tek bir write ile
+    dosyaya ekler. Yazma sürerken gelenler bir sonraki partiye girer, yani yük arttıkça
+    partiler kendiliğinden büyür.
+
+    Aynı dosyaya birden fazla süreç yazabilir: her parti O_APPEND ile açılmış dosyaya
+    özel dosya kilidi altında yazılır. Önceki bir yazıcı satır ortasında öldüyse yeni
+    parti ayrı satırdan başlar. fsync=True ise her parti diske zorlanır.
+
+    Her başarılı partiden sonra on_commit çağrılır (ör. hafıza indeksini güncellemek için).
+    Yazılamayan parti attempts kez denenir, sonra atılır; hatalar her zaman stderr'e yazılır.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_commit: Optional[Callable[[], None]] = None,
+        batch_max: int = QA_MEMORY_BATCH_MAX,
+        queue_max: int = QA_MEMORY_QUEUE_MAX,
+        fsync: bool = QA_MEMORY_FSYNC,
+        attempts: int = QA_MEMORY_WRITE_ATTEMPTS,
+    ):
+        self.path = path
+        self.on_commit = on_commit
+        self.batch_max = batch_max
+        self.queue_max = queue_max
+        self.fsync = fsync
+        self.attempts = max(1, attempts)
+        self._cond = threading.Condition()
+        self._queue: Deque[Tuple[int, bytes]] = deque()
+        self._enqueued = 0      # son kuyruğa giren kaydın sıra numarası
+        self._done = 0          # bu sıra numarasına kadar olanlar yazıldı ya da atıldı
+        self._closed = False
+        self._fd: Optional[int] = None
+        self._file_lock: Optional[FileLock] = None
+        self._counters = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "bytes": 0,
+            "max_batch": 0,
+            "errors": 0,
+            "dropped": 0,
+        }
+        self._thread = threading.Thread(target=self._run, name="qa-memory-writer", daemon=True)
+        self._thread.start()
+
+    # ---------------- üretici tarafı ----------------
+
+    def append(self, entry: Dict) -> int:
+        """
+        Kaydı kuyruğa ekler; sıra numarasını döndürür (flush(seq) ile beklenebilir).
+        Kuyruk doluysa yer açılana kadar bekler.
+        """
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MemoryWriter kapatıldı")
+            while len(self._queue) >= self.queue_max:
+                self._cond.wait()
+            self._enqueued += 1
+            self._queue.append((self._enqueued, line))
+            self._counters["enqueued"] += 1
+            self._cond.notify_all()
+            return self._enqueued
+
+    def flush(self, seq: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """
+        seq numaralı (verilmezse şu ana kadarki tüm) kayıtlar yazılana kadar bekler.
+        Zaman aşımında False döner.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._enqueued if seq is None else seq
+            while self._done < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout: Optional[float] = QA_MEMORY_FLUSH_TIMEOUT) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            left = len(self._queue)
+        if left:
+            _report(f"Kapanışta {left} kayıt yazılamadı (zaman aşımı).")
+        if self._thread.is_alive():
+            # Yazıcı hâlâ dosyayı kullanıyor olabilir; tanımlayıcıyı açık bırak
+            return
+        if self._file_lock is not None:
+            self._file_lock.close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # ---------------- yazıcı thread ----------------
+
+    def _next_batch(self) -> List[Tuple[int, bytes]]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            batch = []
+            while self._queue and len(batch) < self.batch_max:
+                batch.append(self._queue.popleft())
+            # Kuyrukta yer açıldı: bekleyen append'ler devam etsin
+            self._cond.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # kapatıldı ve kuyruk boş
+            self._commit(batch)
+
+    def _commit(self, batch: List[Tuple[int, bytes]]) -> None:
+        data = b"".join(line for _seq, line in batch)
+        started = time.perf_counter()
+        error: Optional[BaseException] = None
+        for attempt in range(self.attempts):
+            try:
+                self._write(data)
+                error = None
+                break
+            except OSError as e:
+                error = e
+                self._reset_fd()
+                if attempt + 1 < self.attempts:
+                    time.sleep(0.1 * (2 ** attempt))
+
+        with self._cond:
+            if error is None:
+                self._counters["written"] += len(batch)
+                self._counters["batches"] += 1
+                self._counters["bytes"] += len(data)
+                self._counters["max_batch"] = max(self._counters["max_batch"], len(batch))
+            else:
+                self._counters["errors"] += 1
+                self._counters["dropped"] += len(batch)
+
+        if error is not None:
+            _report(f"{len(batch)} kayıt {self.attempts} denemede yazılamadı, atıldı: {error}")
+        else:
+            record_span("memory_commit", "", time.perf_counter() - started, entries=len(batch), bytes=len(data))
+            if self.on_commit is not None:
+                try:
+                    self.on_commit()
+                except Exception as e:
+                    _report(f"Yazma sonrası işlem (indeks) başarısız: {e}")
+
+        with self._cond:
+            self._done = batch[-1][0]
+            self._cond.notify_all()
+
+    def _open(self) -> int:
+        if self._fd is None:
+            flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+            self._fd = os.open(self.path, flags, 0o644)
+            self._file_lock = FileLock(self._fd, self.path)
+        return self._fd
+
+    def _reset_fd(self) -> None:
+        if self._file_lock is not None:
+            self._file_lock.close()
+            self._file_lock = None
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _write(self, data: bytes) -> None:
+        fd = self._open()
+        with self._file_lock:
+            size = os.fstat(fd).st_size
+            if size and not self._ends_with_newline(size):
+                # Başka bir yazıcı satır ortasında kesilmiş: yarım satır ayrı kalsın
+                data = b"\n" + data
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if self.fsync:
+                os.fsync(fd)
+
+    def _ends_with_newline(self, size: int) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(size - 1)
+            return f.read(1) == b"\n"
+
+    # ---------------- metrikler ----------------
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            stats = dict(self._counters)
+            stats["queued"] = len(self._queue)
+            return stats
+
+
+_writers: Dict[str, MemoryWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_memory_writer(path: str, on_commit: Optional[Callable[[], None]] = None) -> MemoryWriter:
+    """
+    Dosya başına tek yazıcı (ilk çağrıda oluşturulur); süreç kapanırken kuyruk boşaltılır.
+    """
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            if not _writers:
+                atexit.register(_close_all)
+            writer = _writers[key] = MemoryWriter(path, on_commit)
+        return writer
+
+
+def get_memory_writer_stats() -> Dict[str, Dict[str, int]]:
+    with _writers_lock:
+        writers = list(_writers.values())
+    return {writer.path: writer.stats() for writer in writers}
+
+
+def _close_all() -> None:
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
@@ -2,52 +2,200 @@
 
 import os
 import json
+import threading
+import time
 import datetime
-import urllib.request
-import urllib.error
-from typing import List, Dict
+from typing import Callable, Dict, Iterator, List, Optional
+import config
 from config import (
-    OPENAI_API_KEY,
     OPENAI_MODEL,
     OPENAI_BASE_URL,
-    GEMINI_API_KEY,
+    GEMINI_MODEL,
     GEMINI_BASE_URL,
+    GEMINI_STREAM_URL,
     GROK_API_KEY,
     GROK_MODEL,
     GROK_BASE_URL,
-    CLAUDE_API_KEY,
     CLAUDE_MODEL,
     CLAUDE_BASE_URL,
     CLAUDE_VERSION,
+    CLAUDE_MAX_TOKENS,
     DEBUG,
     USE_GROK,
+    PANEL_PARALLEL,
+    PANEL_MAX_WORKERS,
+    PANEL_HISTORY_POLICY,
+    PANEL_QUORUM,
+    PANEL_SOFT_DEADLINE,
+    PANEL_LATE_ANSWERS,
+    PANEL_HEDGE,
+    QA_MEMORY_FLUSH_TIMEOUT,
+    QA_MEMORY_INDEX_PATH,
+    QA_MEMORY_SEGMENT_DIR,
+    PROMPT_TOKEN_BUDGETS,
+    PROMPT_DEDUP_ENABLED,
+    DECISION_ANSWER_MAX_TOKENS,
+    MEMORY_ANSWER_MAX_TOKENS,
+)
+from history_manager import HistoryManager
+from memory_index import get_memory_index
+from memory_writer import get_memory_writer
+from qa_segments import SegmentedLog, iter_segment_records, list_segments, question_key
+from response_cache import get_response_cache, make_cache_key
+from usage_stats import record_claude_usage, record_gemini_usage, record_openai_usage
+from token_counter import count_message_tokens, count_tokens, trim_messages, truncate_to_tokens
+from http_transport import HTTPStatusError, iter_sse_events
+from resilience import resilient_post, resilient_request
+from tracing import record_span, span
+from paragraph_dedup import ParagraphDeduplicator
+from prompt_assembly import assemble_messages
+from panel_fanout import (
+    LATE_ANSWER_TEXT,
+    PanelEvent,
+    ask_expert,
+    run_experts_parallel,
+    run_experts_quorum,
+    run_experts_serial,
+    snapshot_history,
 )
 
 # Kalıcı soru-cevap hafızası dosyası
 QA_MEMORY_PATH = "qa_memory.jsonl"
 
 
+# Sağlayıcı fonksiyonlarının cevap yerine döndürdüğü hata / devre dışı mesajları
+ERROR_PREFIXES = (
+    "[HATA]",
+    "[Grok devre dışı]",
+    "[Grok kullanılamıyor]",
+    "[Claude devre dışı]",
+    "[Geç kaldı]",
+)
+
+
+def is_error_response(text: str) -> bool:
+    return not isinstance(text, str) or text.startswith(ERROR_PREFIXES)
+
+
 # ============================================================
 #  Q/A HAFIZA YARDIMCI FONKSİYONLARI
 # ============================================================
 
+def _memory_index():
+    return get_memory_index(QA_MEMORY_PATH, QA_MEMORY_INDEX_PATH, QA_MEMORY_SEGMENT_DIR)
+
+
+_segmented_log: Optional[SegmentedLog] = None
+_segmented_log_lock = threading.Lock()
+
+
+def get_segmented_log() -> SegmentedLog:
+    global _segmented_log
+    with _segmented_log_lock:
+        if _segmented_log is None:
+            _segmented_log = SegmentedLog(QA_MEMORY_PATH, QA_MEMORY_SEGMENT_DIR, _memory_index())
+        return _segmented_log
+
+
+def _after_memory_commit() -> None:
+    # Yeni satırları indekse ekle (sadece son indekslenen bayttan sonrası okunur),
+    # aktif dosya büyüdüyse segmente taşı / segmentleri sıkıştır
+    _memory_index().sync()
+    get_segmented_log().maintain()
+
+
+# Bu süreçte kuyruğa konan son hafıza kaydının sıra numarası (0: hiç yok)
+_last_memory_seq = 0
+_last_memory_seq_lock = threading.Lock()
+
+
 def append_qa_memory(question: str, answer: str) -> None:
-    entry = {
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        "q": question,
-        "a": answer,
-    }
-    try:
-        with open(QA_MEMORY_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-    except Exception as e:
-        if DEBUG:
-            print("[QA_MEMORY] Yazma hatası:", e)
+    """
+    Kaydı arka plandaki toplu yazıcının kuyruğuna koyar; dosyaya yazma ve indeks
+    güncellemesi yazıcı thread'inde, parti başına bir kez yapılır. Aynı süreçteki
+    sonraki find_similar_memories çağrısı bu kaydın yazılmasını bekler.
+    """
+    global _last_memory_seq
+    with span("memory_append"):
+        entry = {
+            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+            "q": question,
+            "a": answer,
+        }
+        seq = get_memory_writer(QA_MEMORY_PATH, on_commit=_after_memory_commit).append(entry)
+        with _last_memory_seq_lock:
+            _last_memory_seq = max(_last_memory_seq, seq)
+
+
+def _wait_for_memory_writes() -> None:
+    # Yazıcı asenkron: bu süreçte eklenen cevaplar aramadan önce dosyaya ve indekse girsin
+    with _last_memory_seq_lock:
+        seq = _last_memory_seq
+    if not seq:
+        return
+    writer = get_memory_writer(QA_MEMORY_PATH, on_commit=_after_memory_commit)
+    if not writer.flush(seq, timeout=QA_MEMORY_FLUSH_TIMEOUT) and DEBUG:
+        print("[QA_MEMORY] Bekleyen hafıza kayıtları zamanında yazılamadı; arama onlarsız yapılıyor.")
 
 
 def find_similar_memories(query: str, max_items: int = 3) -> List[Dict[str, str]]:
+    """
+    Geçmiş sorular arasından sorguya en çok benzeyenleri BM25 skoruyla döndürür.
+    Ters indeks kullanılamazsa eski tam tarama yöntemine düşer.
+    """
+    with span("memory_lookup") as s:
+        _wait_for_memory_writes()
+        if not os.path.exists(QA_MEMORY_PATH) and not list_segments(QA_MEMORY_SEGMENT_DIR):
+            return []
+
+        try:
+            index = _memory_index()
+            index.sync()
+            results = []
+            seen = set()
+            # Aynı soru birden fazla kez kayıtlıysa (henüz sıkıştırılmamış) sadece en yenisi alınır
+            for score, location in index.search(query, k=max_items * 3):
+                if len(results) == max_items:
+                    break
+                obj = index.read_entry(location)
+                key = question_key(obj.get("q", ""))
+                if key in seen:
+                    continue
+                seen.add(key)
+                results.append({
+                    "score": score,
+                    "q": obj.get("q", ""),
+                    "a": obj.get("a", ""),
+                })
+            s.set(hits=len(results))
+            return results
+        except Exception as e:
+            if DEBUG:
+                print("[QA_MEMORY] İndeks kullanılamadı, tam taramaya geçiliyor:", e)
+            s.set(fallback="scan")
+            return _scan_similar_memories(query, max_items)
+
+
+def _iter_memory_entries() -> Iterator[Dict[str, str]]:
+    """
+    Tüm hafıza kayıtları: önce mühürlü segmentler, sonra aktif dosya (eskiden yeniye).
+    """
+    for _segment, _record, obj in iter_segment_records(QA_MEMORY_SEGMENT_DIR):
+        yield obj
     if not os.path.exists(QA_MEMORY_PATH):
-        return []
+        return
+    with open(QA_MEMORY_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def _scan_similar_memories(query: str, max_items: int = 3) -> List[Dict[str, str]]:
 
     q_words = set(query.lower().split())
     if not q_words:
@@ -56,29 +204,20 @@ def find_similar_memories(query: str, max_items: int = 3) -> List[Dict[str, str]
     candidates = []
 
     try:
-        with open(QA_MEMORY_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                past_q = obj.get("q", "")
-                past_a = obj.get("a", "")
-
-                past_words = set(past_q.lower().split())
-                overlap = q_words.intersection(past_words)
-                score = len(overlap)
-
-                if score > 0:
-                    candidates.append({
-                        "score": score,
-                        "q": past_q,
-                        "a": past_a,
-                    })
+        for obj in _iter_memory_entries():
+            past_q = obj.get("q", "")
+            past_a = obj.get("a", "")
+
+            past_words = set(past_q.lower().split())
+            overlap = q_words.intersection(past_words)
+            score = len(overlap)
+
+            if score > 0:
+                candidates.append({
+                    "score": score,
+                    "q": past_q,
+                    "a": past_a,
+                })
     except Exception as e:
         if DEBUG:
             print("[QA_MEMORY] Okuma hatası:", e)
@@ -93,23 +232,69 @@ def find_similar_memories(query: str, max_items: int = 3) -> List[Dict[str, str]
 # ============================================================
 
 def deduplicate_paragraphs(text: str) -> str:
+    """
+    Birebir ve yakın tekrar eden paragrafları atar (ayrıntılar paragraph_dedup.py'de).
+    Her model cevabı için bir kez, agent katmanında çağrılır.
+    """
     if not isinstance(text, str):
         return text
 
-    blocks = text.split("\n\n")
-    seen = set()
-    result = []
+    with span("dedup", chars=len(text)) as s:
+        dedup = ParagraphDeduplicator()
+        result = [block for block in text.split("\n\n") if dedup.accept(block)]
+        s.set(dropped=dedup.dropped)
+        return "\n\n".join(result)
+
+
+class ParagraphStreamDeduplicator:
+    """
+    deduplicate_paragraphs'ın akış sürümü.
+    Parçalar geldikçe tamamlanan ("\n\n" ile kapanan) ve daha önce görülmemiş
+    paragrafları döndürür. Akış bitince `text`, ham metnin
+    deduplicate_paragraphs çıktısıyla birebir aynıdır.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._dedup = ParagraphDeduplicator()
+        self._kept: List[str] = []
 
-    for block in blocks:
-        norm = block.strip()
-        if not norm:
-            continue
-        if norm in seen:
-            continue
-        seen.add(norm)
-        result.append(block)
+    def feed(self, chunk: str) -> List[str]:
+        self._buffer += chunk
+        *blocks, self._buffer = self._buffer.split("\n\n")
+        return [block for block in blocks if self._accept(block)]
 
-    return "\n\n".join(result)
+    def finish(self) -> List[str]:
+        block, self._buffer = self._buffer, ""
+        return [block] if self._accept(block) else []
+
+    def _accept(self, block: str) -> bool:
+        if not self._dedup.accept(block):
+            return False
+        self._kept.append(block)
+        return True
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self._kept)
+
+
+def _encode_json(provider: str, payload: Dict) -> bytes:
+    with span("json_encode", provider):
+        return json.dumps(payload).encode("utf-8")
+
+
+def _decode_json(provider: str, body: str):
+    with span("json_decode", provider, bytes=len(body)):
+        return json.loads(body)
+
+
+def _plain_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    OpenAI uyumlu API'ler bilinmeyen alanları kabul etmez; iç işaretleri
+    (ör. "cache") atıp sadece role/content bırakır.
+    """
+    return [{"role": m.get("role", "user"), "content": m.get("content", "")} for m in messages]
 
 
 # ============================================================
@@ -119,31 +304,24 @@ def deduplicate_paragraphs(text: str) -> str:
 def call_openai_chat(messages: List[Dict[str, str]]) -> str:
     payload = {
         "model": OPENAI_MODEL,
-        "messages": messages,
+        "messages": _plain_messages(messages),
     }
 
-    data = json.dumps(payload).encode("utf-8")
+    data = _encode_json("openai", payload)
 
     headers = {
         "Content-Type": "application/json",
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
+        "Authorization": f"Bearer {config.OPENAI_API_KEY}",
     }
 
-    req = urllib.request.Request(
-        OPENAI_BASE_URL,
-        data=data,
-        headers=headers,
-        method="POST",
-    )
-
+    prompt_tokens = count_message_tokens(messages, "openai")
     try:
-        with urllib.request.urlopen(req) as resp:
-            body = resp.read().decode("utf-8")
+        body = resilient_post("openai", OPENAI_BASE_URL, data, headers, prompt_tokens)
     except Exception as e:
         return f"[HATA] OpenAI isteği başarısız oldu: {e}"
 
     try:
-        parsed = json.loads(body)
+        parsed = _decode_json("openai", body)
     except json.JSONDecodeError:
         return f"[HATA] OpenAI cevabı JSON formatında değil: {body}"
 
@@ -152,7 +330,9 @@ def call_openai_chat(messages: List[Dict[str, str]]) -> str:
     except (KeyError, IndexError):
         return f"[HATA] OpenAI cevabı beklenen formatta değil: {parsed}"
 
-    return deduplicate_paragraphs(content)
+    record_openai_usage("openai", parsed.get("usage"))
+
+    return content
 
 
 # ============================================================
@@ -170,7 +350,7 @@ def call_gemini_chat(prompt: str) -> str:
         ]
     }
 
-    data = json.dumps(payload).encode("utf-8")
+    data = _encode_json("gemini", payload)
 
     url = GEMINI_BASE_URL
 
@@ -179,24 +359,17 @@ def call_gemini_chat(prompt: str) -> str:
 
     headers = {
         "Content-Type": "application/json",
-        "X-goog-api-key": GEMINI_API_KEY,
+        "X-goog-api-key": config.GEMINI_API_KEY,
     }
 
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers=headers,
-        method="POST",
-    )
-
+    prompt_tokens = count_tokens(prompt, "gemini")
     try:
-        with urllib.request.urlopen(req) as resp:
-            body = resp.read().decode("utf-8")
+        body = resilient_post("gemini", url, data, headers, prompt_tokens)
     except Exception as e:
         return f"[HATA] Gemini isteği başarısız oldu: {e}"
 
     try:
-        parsed = json.loads(body)
+        parsed = _decode_json("gemini", body)
     except json.JSONDecodeError:
         return f"[HATA] Gemini cevabı JSON formatında değil: {body}"
 
@@ -211,7 +384,9 @@ def call_gemini_chat(prompt: str) -> str:
     except (KeyError, IndexError, TypeError):
         return f"[HATA] Gemini cevabı beklenen formatta değil: {parsed}"
 
-    return deduplicate_paragraphs(content)
+    record_gemini_usage(parsed.get("usageMetadata"))
+
+    return content
 
 
 # ============================================================
@@ -227,32 +402,22 @@ def call_grok_chat(messages: List[Dict[str, str]]) -> str:
 
     payload = {
         "model": GROK_MODEL,
-        "messages": messages,
+        "messages": _plain_messages(messages),
         "stream": False,
     }
 
-    data = json.dumps(payload).encode("utf-8")
+    data = _encode_json("grok", payload)
 
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {GROK_API_KEY}",
     }
 
-    req = urllib.request.Request(
-        GROK_BASE_URL,
-        data=data,
-        headers=headers,
-        method="POST",
-    )
-
+    prompt_tokens = count_message_tokens(messages, "grok")
     try:
-        with urllib.request.urlopen(req) as resp:
-            body = resp.read().decode("utf-8")
-    except urllib.error.HTTPError as e:
-        try:
-            err_body = e.read().decode("utf-8")
-        except Exception:
-            err_body = "<body okunamadı>"
+        body = resilient_post("grok", GROK_BASE_URL, data, headers, prompt_tokens)
+    except HTTPStatusError as e:
+        err_body = e.body or "<body okunamadı>"
 
         if e.code == 403:
             return (
@@ -265,7 +430,7 @@ def call_grok_chat(messages: List[Dict[str, str]]) -> str:
         return f"[HATA] Grok isteği başarısız oldu: {e}"
 
     try:
-        parsed = json.loads(body)
+        parsed = _decode_json("grok", body)
     except json.JSONDecodeError:
         return f"[HATA] Grok cevabı JSON formatında değil: {body}"
 
@@ -274,36 +439,22 @@ def call_grok_chat(messages: List[Dict[str, str]]) -> str:
     except (KeyError, IndexError):
         return f"[HATA] Grok cevabı beklenen formatta değil: {parsed}"
 
-    return deduplicate_paragraphs(content)
+    record_openai_usage("grok", parsed.get("usage"))
+
+    return content
 
 
 # ============================================================
 #  Claude / Anthropic'e HTTP ile istek atan fonksiyon
 # ============================================================
 
-def call_claude_chat(messages: List[Dict[str, str]]) -> str:
+def _build_claude_payload(messages: List[Dict[str, str]]) -> Dict:
     """
-    Anthropic /v1/messages endpoint'i:
-      - URL: CLAUDE_BASE_URL
-      - Header:
-          x-api-key: CLAUDE_API_KEY
-          anthropic-version: CLAUDE_VERSION
-      - Body:
-          {
-            "model": "claude-sonnet-4-20250514",
-            "max_tokens": 1024,
-            "system": "...",
-            "messages": [
-              {"role": "user", "content": [{"type": "text", "text": "..."}]},
-              {"role": "assistant", "content": [{"type": "text", "text": "..."}]},
-              ...
-            ]
-          }
+    OpenAI tarzı mesaj listesini Anthropic /v1/messages gövdesine çevirir.
+    "system" rolündeki mesajlar üst seviyedeki "system" alanında birleşir;
+    "cache": True işaretli mesaj varsa system, cache_control'lü blok listesi olur.
     """
-    if not CLAUDE_API_KEY:
-        return "[Claude devre dışı] CLAUDE_API_KEY tanımlı değil."
-
-    system_parts = []
+    system_blocks = []
     claude_messages = []
 
     for m in messages:
@@ -311,7 +462,11 @@ def call_claude_chat(messages: List[Dict[str, str]]) -> str:
         content = m.get("content", "")
 
         if role == "system":
-            system_parts.append(content)
+            block = {"type": "text", "text": content}
+            if m.get("cache"):
+                # Sabit önek (ör. doküman): Anthropic prompt caching kırılım noktası
+                block["cache_control"] = {"type": "ephemeral"}
+            system_blocks.append(block)
         elif role in ("user", "assistant"):
             claude_messages.append(
                 {
@@ -325,39 +480,59 @@ def call_claude_chat(messages: List[Dict[str, str]]) -> str:
                 }
             )
 
-    system_text = "\n\n".join(system_parts) if system_parts else None
-
     payload = {
         "model": CLAUDE_MODEL,
-        "max_tokens": 1024,
+        "max_tokens": CLAUDE_MAX_TOKENS,
         "messages": claude_messages,
     }
-    if system_text:
-        payload["system"] = system_text
+    if any("cache_control" in block for block in system_blocks):
+        payload["system"] = system_blocks
+    elif system_blocks:
+        payload["system"] = "\n\n".join(block["text"] for block in system_blocks)
+
+    return payload
 
-    data = json.dumps(payload).encode("utf-8")
+
+def call_claude_chat(messages: List[Dict[str, str]]) -> str:
+    """
+    Anthropic /v1/messages endpoint'i:
+      - URL: CLAUDE_BASE_URL
+      - Header:
+          x-api-key: CLAUDE_API_KEY
+          anthropic-version: CLAUDE_VERSION
+      - Body:
+          {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 1024,
+            "system": "...",
+            "messages": [
+              {"role": "user", "content": [{"type": "text", "text": "..."}]},
+              {"role": "assistant", "content": [{"type": "text", "text": "..."}]},
+              ...
+            ]
+          }
+    """
+    if not config.provider_configured("claude"):
+        return "[Claude devre dışı] CLAUDE_API_KEY tanımlı değil."
+
+    payload = _build_claude_payload(messages)
+
+    data = _encode_json("claude", payload)
 
     headers = {
         "Content-Type": "application/json",
-        "x-api-key": CLAUDE_API_KEY,
+        "x-api-key": config.CLAUDE_API_KEY,
         "anthropic-version": CLAUDE_VERSION,
     }
 
-    req = urllib.request.Request(
-        CLAUDE_BASE_URL,
-        data=data,
-        headers=headers,
-        method="POST",
-    )
-
+    prompt_tokens = count_message_tokens(messages, "claude")
     try:
-        with urllib.request.urlopen(req) as resp:
-            body = resp.read().decode("utf-8")
+        body = resilient_post("claude", CLAUDE_BASE_URL, data, headers, prompt_tokens)
     except Exception as e:
         return f"[HATA] Claude isteği başarısız oldu: {e}"
 
     try:
-        parsed = json.loads(body)
+        parsed = _decode_json("claude", body)
     except json.JSONDecodeError:
         return f"[HATA] Claude cevabı JSON formatında değil: {body}"
 
@@ -374,7 +549,159 @@ def call_claude_chat(messages: List[Dict[str, str]]) -> str:
     except (KeyError, TypeError):
         return f"[HATA] Claude cevabı beklenen formatta değil: {parsed}"
 
-    return deduplicate_paragraphs(content)
+    record_claude_usage(parsed.get("usage"))
+
+    return content
+
+
+# ============================================================
+#  AKIŞ (SSE) İLE İSTEK ATAN FONKSİYONLAR
+#  Hepsi metin parçaları (chunk) üreten bir iterator döndürür.
+#  Hata durumunda tek bir "[HATA] ..." parçası üretilir.
+# ============================================================
+
+def _stream_sse(label: str, provider: str, url: str, payload: Dict, headers: Dict[str, str],
+                prompt_tokens: int) -> Iterator[Dict]:
+    """
+    İsteği atar ve her SSE olayını {"event": ..., "data": <json>} olarak verir.
+    Akış başlayana kadarki geçici hatalar tekrar denenir (resilience).
+    prompt_tokens rate limit kovasından peşin düşülür.
+    """
+    data = _encode_json(provider, payload)
+    headers = dict(headers, Accept="text/event-stream")
+
+    resp = resilient_request(provider, "POST", url, data, headers, prompt_tokens)
+
+    # Olay başına span çok pahalı; akış boyunca JSON çözme süresi toplanıp tek span yazılır
+    decode_time = 0.0
+    events = 0
+    try:
+        for event, raw in iter_sse_events(resp.iter_lines()):
+            if raw == "[DONE]":
+                break
+            t0 = time.perf_counter()
+            try:
+                parsed = json.loads(raw)
+            except json.JSONDecodeError:
+                if DEBUG:
+                    print(f"[{label}] JSON olmayan SSE verisi atlandı: {raw[:200]}")
+                continue
+            finally:
+                decode_time += time.perf_counter() - t0
+                events += 1
+            yield {"event": event, "data": parsed}
+    finally:
+        record_span("json_decode", provider, decode_time, events=events, stream=True)
+
+
+def _openai_style_chunks(label: str, url: str, model: str, api_key: str,
+                         messages: List[Dict[str, str]], provider: str,
+                         include_usage: bool = False) -> Iterator[str]:
+    payload = {
+        "model": model,
+        "messages": _plain_messages(messages),
+        "stream": True,
+    }
+    if include_usage:
+        payload["stream_options"] = {"include_usage": True}
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
+    try:
+        prompt_tokens = count_message_tokens(messages, provider)
+        for item in _stream_sse(label, provider, url, payload, headers, prompt_tokens):
+            if item["data"].get("usage"):
+                record_openai_usage(provider, item["data"]["usage"])
+            for choice in item["data"].get("choices") or []:
+                text = (choice.get("delta") or {}).get("content")
+                if text:
+                    yield text
+    except HTTPStatusError as e:
+        yield f"[HATA] {label} HTTP hata döndürdü: {e.code} - {e.body}"
+    except Exception as e:
+        yield f"[HATA] {label} akış isteği başarısız oldu: {e}"
+
+
+def stream_openai_chat(messages: List[Dict[str, str]]) -> Iterator[str]:
+    return _openai_style_chunks(
+        "OpenAI", OPENAI_BASE_URL, OPENAI_MODEL, config.OPENAI_API_KEY, messages, "openai", include_usage=True
+    )
+
+
+def stream_grok_chat(messages: List[Dict[str, str]]) -> Iterator[str]:
+    if not USE_GROK or not GROK_API_KEY:
+        # Devre dışı mesajını call_grok_chat üretiyor
+        yield call_grok_chat(messages)
+        return
+    yield from _openai_style_chunks("Grok", GROK_BASE_URL, GROK_MODEL, GROK_API_KEY, messages, "grok")
+
+
+def stream_gemini_chat(prompt: str) -> Iterator[str]:
+    payload = {
+        "contents": [
+            {
+                "parts": [
+                    {"text": prompt}
+                ]
+            }
+        ]
+    }
+    headers = {
+        "Content-Type": "application/json",
+        "X-goog-api-key": config.GEMINI_API_KEY,
+    }
+    usage = None
+    try:
+        prompt_tokens = count_tokens(prompt, "gemini")
+        for item in _stream_sse("Gemini", "gemini", GEMINI_STREAM_URL, payload, headers, prompt_tokens):
+            # Her parçada kümülatif usageMetadata gelir; sonuncusu geçerli
+            usage = item["data"].get("usageMetadata") or usage
+            for candidate in item["data"].get("candidates", []):
+                for part in (candidate.get("content") or {}).get("parts", []):
+                    text = part.get("text")
+                    if text:
+                        yield text
+        record_gemini_usage(usage)
+    except HTTPStatusError as e:
+        yield f"[HATA] Gemini HTTP hata döndürdü: {e.code} - {e.body}"
+    except Exception as e:
+        yield f"[HATA] Gemini akış isteği başarısız oldu: {e}"
+
+
+def stream_claude_chat(messages: List[Dict[str, str]]) -> Iterator[str]:
+    if not config.provider_configured("claude"):
+        yield "[Claude devre dışı] CLAUDE_API_KEY tanımlı değil."
+        return
+
+    payload = _build_claude_payload(messages)
+    payload["stream"] = True
+    headers = {
+        "Content-Type": "application/json",
+        "x-api-key": config.CLAUDE_API_KEY,
+        "anthropic-version": CLAUDE_VERSION,
+    }
+    usage: Dict = {}
+    try:
+        prompt_tokens = count_message_tokens(messages, "claude")
+        for item in _stream_sse("Claude", "claude", CLAUDE_BASE_URL, payload, headers, prompt_tokens):
+            data = item["data"]
+            if data.get("type") == "error":
+                yield f"[HATA] Claude akış hatası: {data.get('error')}"
+                return
+            if data.get("type") == "message_start":
+                usage.update((data.get("message") or {}).get("usage") or {})
+            elif data.get("type") == "message_delta":
+                usage.update(data.get("usage") or {})
+            elif data.get("type") == "content_block_delta":
+                delta = data.get("delta") or {}
+                if delta.get("type") == "text_delta" and delta.get("text"):
+                    yield delta["text"]
+        record_claude_usage(usage)
+    except HTTPStatusError as e:
+        yield f"[HATA] Claude HTTP hata döndürdü: {e.code} - {e.body}"
+    except Exception as e:
+        yield f"[HATA] Claude akış isteği başarısız oldu: {e}"
 
 
 # ============================================================
@@ -382,42 +709,164 @@ def call_claude_chat(messages: List[Dict[str, str]]) -> str:
 # ============================================================
 
 class BaseAgent:
+    # Önbellek anahtarına giren bilgiler; alt sınıflar doldurur
+    provider = ""
+    model = ""
+    request_params: Dict = {}
+
     def __init__(self, name: str, role_description: str):
         self.name = name
         self.role_description = role_description
+        # Son isteğin tahmini prompt token sayısı (token_counter)
+        self.last_prompt_tokens = 0
+        # Son istekte tekrar olduğu için referansa çevrilen paragraf sayısı (prompt_assembly)
+        self.last_deduped_blocks = 0
+
+    def _build_messages(self, conversation_history: List[Dict[str, str]], user_message: str) -> List[Dict[str, str]]:
+        # "cache": True işaretli mesajlar (ör. doküman) rol metninden bile önce gelir;
+        # böylece tüm agent'larda ve turlarda istek aynı sabit önekle başlar.
+        prefix = [m for m in conversation_history if m.get("cache")]
+        rest = [m for m in conversation_history if not m.get("cache")]
 
-    def think(self, conversation_history: List[Dict[str, str]], user_message: str) -> str:
         messages: List[Dict[str, str]] = []
 
+        messages.extend(prefix)
         messages.append({"role": "system", "content": self.role_description})
-        messages.extend(conversation_history)
+        messages.extend(rest)
         messages.append({"role": "user", "content": user_message})
 
-        if DEBUG:
-            print(f"\n[{self.name}] → modele istek hazırlanıyor...")
-
-        response = self._call_model(messages)
-
-        if DEBUG:
-            print(f"[{self.name}] ← modelden cevap alındı.")
+        budget = PROMPT_TOKEN_BUDGETS.get(self.provider)
+        if budget:
+            messages = trim_messages(messages, budget, self.provider)
+        # Kırpmadan sonra: referans verilen ilk geçiş istekten atılmış olmasın
+        self.last_deduped_blocks = 0
+        if PROMPT_DEDUP_ENABLED:
+            messages, assembler = assemble_messages(messages)
+            self.last_deduped_blocks = assembler.replaced
+        self.last_prompt_tokens = count_message_tokens(messages, self.provider)
+        return messages
 
+    def think(self, conversation_history: List[Dict[str, str]], user_message: str) -> str:
+        with span("think", self.provider, agent=self.name) as s:
+            messages = self._build_messages(conversation_history, user_message)
+            s.set(prompt_tokens=self.last_prompt_tokens, deduped_blocks=self.last_deduped_blocks)
+
+            if DEBUG:
+                print(f"\n[{self.name}] → modele istek hazırlanıyor... (~{self.last_prompt_tokens} token)")
+
+            response = self._cached_call(messages)
+            if is_error_response(response):
+                s.fail(response)
+
+            if DEBUG:
+                print(f"[{self.name}] ← modelden cevap alındı.")
+
+            return response
+
+    def think_stream(
+        self,
+        conversation_history: List[Dict[str, str]],
+        user_message: str,
+        on_paragraph: Callable[[str], None],
+    ) -> str:
+        """
+        think() ile aynı isteği akış olarak atar. Tamamlanan her (tekrar olmayan)
+        paragraf on_paragraph ile hemen bildirilir; dönüş değeri tekrarları
+        temizlenmiş tam cevaptır.
+        """
+        with span("think", self.provider, agent=self.name, stream=True) as s:
+            messages = self._build_messages(conversation_history, user_message)
+            s.set(prompt_tokens=self.last_prompt_tokens, deduped_blocks=self.last_deduped_blocks)
+
+            if DEBUG:
+                print(f"\n[{self.name}] → modele akış isteği hazırlanıyor... (~{self.last_prompt_tokens} token)")
+
+            cache, key = self._cache_lookup_key(messages)
+            cached = cache.get(key) if cache is not None else None
+            chunks = [cached] if cached is not None else self._stream_model(messages)
+            s.set(cached=cached is not None)
+
+            started = time.perf_counter()
+            first_paragraph = True
+            dedup = ParagraphStreamDeduplicator()
+            for chunk in chunks:
+                for paragraph in dedup.feed(chunk):
+                    if first_paragraph:
+                        s.set(first_paragraph_ms=round((time.perf_counter() - started) * 1000.0, 1))
+                        first_paragraph = False
+                    on_paragraph(paragraph)
+            for paragraph in dedup.finish():
+                on_paragraph(paragraph)
+
+            if is_error_response(dedup.text):
+                s.fail(dedup.text)
+            elif cached is None and cache is not None:
+                cache.put(key, dedup.text)
+
+            if DEBUG:
+                print(f"[{self.name}] ← akış tamamlandı.")
+
+            return dedup.text
+
+    def _cache_lookup_key(self, messages: List[Dict[str, str]]):
+        cache = get_response_cache()
+        if cache is None:
+            return None, None
+        return cache, make_cache_key(self.provider, self.model, messages, self.request_params)
+
+    def _cached_call(self, messages: List[Dict[str, str]]) -> str:
+        """
+        _call_model'in önündeki cevap önbelleği. Hata mesajları asla önbelleğe yazılmaz.
+        """
+        cache, key = self._cache_lookup_key(messages)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                if DEBUG:
+                    print(f"[{self.name}] önbellekten cevap verildi.")
+                return cached
+
+        # Tekrar temizliği cevap başına bir kez burada yapılır; önbelleğe temiz metin yazılır
+        response = deduplicate_paragraphs(self._call_model(messages))
+        if cache is not None and not is_error_response(response):
+            cache.put(key, response)
         return response
 
     def _call_model(self, messages: List[Dict[str, str]]) -> str:
         raise NotImplementedError("Her agent kendi _call_model metodunu tanımlamalı.")
 
+    def _stream_model(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        # Akış desteği olmayan agent'lar cevabı tek parça olarak verir
+        yield self._call_model(messages)
+
 
 # ============================================================
 #  Farklı Agent tipleri
 # ============================================================
 
 class OpenAIAgent(BaseAgent):
+    provider = "openai"
+    model = OPENAI_MODEL
+
     def _call_model(self, messages: List[Dict[str, str]]) -> str:
         return call_openai_chat(messages)
 
+    def _stream_model(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        return stream_openai_chat(messages)
+
 
 class GeminiAgent(BaseAgent):
+    provider = "gemini"
+    model = GEMINI_MODEL
+
     def _call_model(self, messages: List[Dict[str, str]]) -> str:
+        return call_gemini_chat(self._to_prompt(messages))
+
+    def _stream_model(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        return stream_gemini_chat(self._to_prompt(messages))
+
+    @staticmethod
+    def _to_prompt(messages: List[Dict[str, str]]) -> str:
         text_blocks = []
         for m in messages:
             role = m.get("role", "user")
@@ -429,24 +878,45 @@ class GeminiAgent(BaseAgent):
             else:
                 text_blocks.append(f"[ASİSTAN]: {content}")
 
-        full_prompt = "\n\n".join(text_blocks)
-        return call_gemini_chat(full_prompt)
+        return "\n\n".join(text_blocks)
 
 
 class GrokAgent(BaseAgent):
+    provider = "grok"
+    model = GROK_MODEL
+
     def _call_model(self, messages: List[Dict[str, str]]) -> str:
         return call_grok_chat(messages)
 
+    def _stream_model(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        return stream_grok_chat(messages)
+
 
 class ClaudeAgent(BaseAgent):
+    provider = "claude"
+    model = CLAUDE_MODEL
+    request_params = {"max_tokens": CLAUDE_MAX_TOKENS}
+
     def _call_model(self, messages: List[Dict[str, str]]) -> str:
         return call_claude_chat(messages)
 
+    def _stream_model(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        return stream_claude_chat(messages)
+
 
 class DecisionAgent(OpenAIAgent):
     pass
 
 
+# Sağlayıcı adı -> agent sınıfı (DECISION_PROVIDER openai değilse karar agent'ı da buradan seçilir)
+AGENT_CLASSES = {
+    "openai": OpenAIAgent,
+    "gemini": GeminiAgent,
+    "grok": GrokAgent,
+    "claude": ClaudeAgent,
+}
+
+
 # ============================================================
 #  ORCHESTRATOR
 # ============================================================
@@ -454,9 +924,14 @@ class DecisionAgent(OpenAIAgent):
 class Orchestrator:
     """
     OpenAI + Gemini + (isteğe bağlı Grok) + Claude + DecisionAgent
+
+    providers verilmezse panel config.active_providers() ile belirlenir
+    (PANEL_PROVIDERS ya da API anahtarı tanımlı sağlayıcılar).
+    use_memory=False ise kalıcı Q/A hafızası ne okunur ne yazılır
+    (ör. toplu çalıştırmada sorular birbirini etkilemesin).
     """
 
-    def __init__(self):
+    def __init__(self, providers: Optional[List[str]] = None, use_memory: bool = True):
         self.openai_agent = OpenAIAgent(
             name="OpenAIExpert",
             role_description=(
@@ -496,10 +971,33 @@ class Orchestrator:
             ),
         )
 
-        self.decision_agent = DecisionAgent(
+        panel = list(providers) if providers is not None else config.active_providers()
+        if not panel:
+            raise RuntimeError(
+                "Hiçbir sağlayıcı yapılandırılmamış. En az bir API anahtarı tanımla "
+                "(OPENAI_API_KEY, GEMINI_API_KEY, ANTHROPIC_API_KEY) veya PANEL_PROVIDERS ayarla."
+            )
+
+        # (sonuç anahtarı, geçmiş etiketi, agent) — geçmişe ekleme sırası da budur
+        all_experts = [
+            ("openai", "OpenAI", self.openai_agent),
+            ("gemini", "Gemini", self.gemini_agent),
+            ("grok", "Grok", self.grok_agent),
+            ("claude", "Claude", self.claude_agent),
+        ]
+        self.experts = [expert for expert in all_experts if expert[0] in panel]
+
+        # Karar rolü sadece paneldeki uzmanları anar: "A, B ve C"
+        names = [agent.name for _, _, agent in self.experts]
+        panel_names = names[0] if len(names) == 1 else ", ".join(names[:-1]) + " ve " + names[-1]
+
+        decision = config.decision_provider(panel)
+        decision_cls = DecisionAgent if decision == "openai" else AGENT_CLASSES[decision]
+
+        self.decision_agent = decision_cls(
             name="DecisionAgent",
             role_description=(
-                "Görevin OpenAIExpert, GeminiExpert, GrokExpert ve ClaudeExpert'in "
+                f"Görevin {panel_names}'in "
                 "cevaplarını okuyup tek, net ve dengeli bir final sonuç üretmek. "
                 "Çelişkileri düzelt, ortak noktaları bul, gerektiğinde artı/eksi analizi yap "
                 "ve sonunda net bir tavsiye ver.\n\n"
@@ -514,105 +1012,184 @@ class Orchestrator:
         )
 
         self.conversation_history: List[Dict[str, str]] = []
+        # Her isteğin başına eklenen sabit bağlam (ör. analiz edilen doküman).
+        # Geçmişten ayrı tutulur: özetlenmez, kırpılmaz ve önbelleklenebilir önek olur.
+        self.pinned_context: List[Dict[str, str]] = []
+        # Eski turları özete katlar, her sağlayıcı için bütçeli bağlam üretir
+        self.history = HistoryManager()
+        self.last_stage_tokens: Dict[str, int] = {}
+        # Karar aşamasına yetişmeyen uzman cevapları (PANEL_LATE_ANSWERS="attach"):
+        # anahtar -> future; tamamlananlar bir sonraki turun başında geçmişe eklenir
+        self.late_answers: Dict[str, object] = {}
+        self.use_memory = use_memory
+
+    def set_document_context(self, text: str) -> None:
+        """
+        Dokümanı tüm agent'lar için sabit, önbelleklenebilir önek olarak ayarlar.
+        """
+        self.pinned_context = [{"role": "system", "content": text, "cache": True}]
+
+    def export_state(self) -> Dict[str, object]:
+        """
+        Oturumu başka bir süreçte sürdürmek için gereken durum (JSON'a yazılabilir).
+        late_answers dahil edilmez: çalışan thread'lere bağlı future'lardır.
+        """
+        return {
+            "providers": [key for key, _tag, _agent in self.experts],
+            "use_memory": self.use_memory,
+            "conversation_history": list(self.conversation_history),
+            "pinned_context": list(self.pinned_context),
+            "summary_lines": list(self.history.summary_lines),
+        }
 
-    def ask_panel(self, user_message: str) -> Dict[str, str]:
-        if DEBUG:
-            print("\n==========================")
-            print("Yeni soru:", user_message)
-            print("==========================")
-
-        self.conversation_history.append({"role": "user", "content": user_message})
-
-        similar_memories = find_similar_memories(user_message, max_items=3)
-
-        memory_context = ""
-        if similar_memories:
-            memory_lines = []
-            for i, mem in enumerate(similar_memories, start=1):
-                memory_lines.append(
-                    f"{i}) Geçmiş soru: {mem['q']}\n   Verilen cevap: {mem['a']}"
+    @classmethod
+    def from_state(cls, state: Dict[str, object]) -> "Orchestrator":
+        orchestrator = cls(providers=state.get("providers"), use_memory=state.get("use_memory", True))
+        orchestrator.conversation_history = list(state.get("conversation_history", []))
+        orchestrator.pinned_context = list(state.get("pinned_context", []))
+        orchestrator.history.summary_lines = list(state.get("summary_lines", []))
+        return orchestrator
+
+    def _context_for(self, history: List[Dict[str, str]], provider: str) -> List[Dict[str, str]]:
+        return self.pinned_context + self.history.build_context(history, provider)
+
+    def _ask_experts(self, base_input: str, on_event: Optional[PanelEvent] = None) -> Dict[str, str]:
+        """
+        Uzmanları PANEL_HISTORY_POLICY / PANEL_PARALLEL ayarlarına göre çalıştırır.
+        Cevaplar her durumda self.experts sırasıyla geçmişe eklenir.
+        """
+        if PANEL_HISTORY_POLICY == "sequential":
+            responses = {}
+            for key, tag, agent in self.experts:
+                context = self._context_for(self.conversation_history, key)
+                resp = ask_expert(key, agent, context, base_input, on_event)
+                self.conversation_history.append(
+                    {"role": "assistant", "content": f"[{tag}] {resp}"}
                 )
-            memory_context = (
-                "Bu kullanıcıyla geçmişte şu soru-cevaplar yaşandı, bunları da dikkate al:\n\n"
-                + "\n\n".join(memory_lines)
-                + "\n\n"
-            )
+                responses[key] = resp
+            return responses
 
-        base_input = (
-            memory_context + "Şimdiki soru: " + user_message
-            if memory_context
-            else user_message
-        )
-
-        # 1) OpenAI
-        openai_resp = self.openai_agent.think(
-            conversation_history=self.conversation_history,
-            user_message=base_input,
-        )
-        openai_resp = deduplicate_paragraphs(openai_resp)
-        self.conversation_history.append(
-            {"role": "assistant", "content": f"[OpenAI] {openai_resp}"}
-        )
-
-        # 2) Gemini
-        gemini_resp = self.gemini_agent.think(
-            conversation_history=self.conversation_history,
-            user_message=base_input,
-        )
-        gemini_resp = deduplicate_paragraphs(gemini_resp)
-        self.conversation_history.append(
-            {"role": "assistant", "content": f"[Gemini] {gemini_resp}"}
-        )
+        if PANEL_HISTORY_POLICY != "snapshot":
+            raise ValueError(
+                f"Bilinmeyen PANEL_HISTORY_POLICY: {PANEL_HISTORY_POLICY!r} "
+                "(geçerli değerler: 'snapshot', 'sequential')"
+            )
 
-        # 3) Grok (opsiyonel ama agent her zaman var, fonksiyon içi USE_GROK'e bakıyor)
-        grok_resp = self.grok_agent.think(
-            conversation_history=self.conversation_history,
-            user_message=base_input,
-        )
-        grok_resp = deduplicate_paragraphs(grok_resp)
-        self.conversation_history.append(
-            {"role": "assistant", "content": f"[Grok] {grok_resp}"}
-        )
+        snapshot = snapshot_history(self.conversation_history)
+        # Önceki turdan hâlâ süren geç cevabı olan uzman bu turda tekrar sorulmaz
+        experts = [expert for expert in self.experts if expert[0] not in self.late_answers]
+        if on_event is not None:
+            for key, _tag, agent in self.experts:
+                if key in self.late_answers:
+                    on_event(key, LATE_ANSWER_TEXT.format(name=agent.name))
+                    on_event(key, None)
+        contexts = {
+            key: self._context_for(snapshot, key)
+            for key, _tag, _agent in experts
+        }
+        tail_control = PANEL_QUORUM or PANEL_SOFT_DEADLINE or PANEL_HEDGE
+        if PANEL_PARALLEL and tail_control:
+            responses, late = run_experts_quorum(
+                experts, contexts, base_input,
+                quorum=PANEL_QUORUM,
+                soft_deadline=PANEL_SOFT_DEADLINE,
+                # Hedge kopyaları ve geç kalan istekler asıl uzmanları bekletmesin:
+                # paylaşılan havuz gerekirse bu boyuta büyütülür (get_executor)
+                max_workers=PANEL_MAX_WORKERS * 2,
+                on_event=on_event,
+                hedge=PANEL_HEDGE,
+                late_policy=PANEL_LATE_ANSWERS,
+                is_success=lambda text: not is_error_response(text),
+            )
+            self.late_answers.update(late)
+        elif PANEL_PARALLEL:
+            responses = run_experts_parallel(
+                experts, contexts, base_input,
+                max_workers=PANEL_MAX_WORKERS, on_event=on_event,
+            )
+        else:
+            responses = run_experts_serial(experts, contexts, base_input, on_event=on_event)
+
+        for key, tag, _agent in self.experts:
+            if key not in responses:
+                continue
+            # Hata / devre dışı mesajları geçmişe girmez, sonraki turların prompt'unu kirletmesin
+            if is_error_response(responses[key]):
+                continue
+            self.conversation_history.append(
+                {"role": "assistant", "content": f"[{tag}] {responses[key]}"}
+            )
+        return responses
+
+    def _attach_late_answers(self) -> None:
+        """
+        Önceki turlarda karara yetişmeyen ve o arada tamamlanmış uzman cevaplarını
+        ait oldukları turun sonuna (yeni soru eklenmeden önce) geçmişe ekler.
+        """
+        tags = {key: tag for key, tag, _agent in self.experts}
+        for key in [key for key, future in self.late_answers.items() if future.done()]:
+            resp = self.late_answers.pop(key).result()
+            if is_error_response(resp):
+                continue
+            self.conversation_history.append(
+                {"role": "assistant", "content": f"[{tags[key]}] (karardan sonra gelen cevap) {resp}"}
+            )
 
-        # 4) Claude
-        claude_resp = self.claude_agent.think(
-            conversation_history=self.conversation_history,
-            user_message=base_input,
-        )
-        claude_resp = deduplicate_paragraphs(claude_resp)
-        self.conversation_history.append(
-            {"role": "assistant", "content": f"[Claude] {claude_resp}"}
+    def _build_memory_context(self, similar_memories: List[Dict[str, str]]) -> str:
+        if not similar_memories:
+            return ""
+        memory_lines = []
+        for i, mem in enumerate(similar_memories, start=1):
+            answer = truncate_to_tokens(mem["a"], MEMORY_ANSWER_MAX_TOKENS, suffix=" …")
+            memory_lines.append(
+                f"{i}) Geçmiş soru: {mem['q']}\n   Verilen cevap:\n\n{answer}"
+            )
+        return (
+            "Bu kullanıcıyla geçmişte şu soru-cevaplar yaşandı, bunları da dikkate al:\n\n"
+            + "\n\n".join(memory_lines)
+            + "\n\n"
         )
 
-        if DEBUG:
-            print("\n--- OpenAIExpert Cevabı ---\n", openai_resp)
-            print("\n--- GeminiExpert Cevabı ---\n", gemini_resp)
-            print("\n--- GrokExpert Cevabı ---\n", grok_resp)
-            print("\n--- ClaudeExpert Cevabı ---\n", claude_resp)
+    def _build_decision_prompt(
+        self,
+        responses: Dict[str, str],
+        similar_memories: List[Dict[str, str]],
+    ) -> str:
+        """
+        DecisionAgent için prompt. Her uzman cevabı DECISION_ANSWER_MAX_TOKENS'a,
+        her geçmiş cevap MEMORY_ANSWER_MAX_TOKENS'a kırpılır.
+        Cevaplar ayrı paragraf olarak başlar; geçmişte zaten bulunan paragraflarını
+        istek hazırlanırken prompt_assembly referansa çevirir.
+        """
+        answers = {
+            key: truncate_to_tokens(
+                resp, DECISION_ANSWER_MAX_TOKENS, self.decision_agent.provider,
+                "\n\n...[cevabın devamı kısaltıldı]...",
+            )
+            for key, resp in responses.items()
+        }
 
-        # DecisionAgent için prompt
+        experts = [(key, tag, agent) for key, tag, agent in self.experts if key in answers]
         decision_prompt = (
-            "Aşağıda dört farklı uzmanın (OpenAI, Gemini, Grok, Claude) cevapları var.\n\n"
-            "1) OpenAIExpert cevabı (sadece referans için):\n"
-            f"{openai_resp}\n\n"
-            "2) GeminiExpert cevabı (sadece referans için):\n"
-            f"{gemini_resp}\n\n"
-            "3) GrokExpert cevabı (sadece referans için):\n"
-            f"{grok_resp}\n\n"
-            "4) ClaudeExpert cevabı (sadece referans için):\n"
-            f"{claude_resp}\n\n"
+            f"Aşağıda {len(experts)} farklı uzmanın "
+            f"({', '.join(tag for _key, tag, _agent in experts)}) cevapları var.\n\n"
         )
+        for i, (key, _tag, agent) in enumerate(experts, start=1):
+            decision_prompt += (
+                f"{i}) {agent.name} cevabı (sadece referans için):\n\n"
+                f"{answers[key]}\n\n"
+            )
 
         if similar_memories:
             decision_prompt += (
                 "Ayrıca bu kullanıcıyla geçmişte şu soru-cevaplar yaşandı (bunları da referans olarak kullan):\n"
             )
             for mem in similar_memories:
-                decision_prompt += f"- Soru: {mem['q']}\n  Cevap: {mem['a']}\n"
-            decision_prompt += "\n"
+                answer = truncate_to_tokens(mem["a"], MEMORY_ANSWER_MAX_TOKENS, suffix=" …")
+                decision_prompt += f"- Soru: {mem['q']}\n  Cevap:\n\n{answer}\n\n"
 
         decision_prompt += (
-            "Görevin bu dört cevabı ve varsa geçmiş soru-cevapları dikkate alarak, "
+            "Görevin bu cevapları ve varsa geçmiş soru-cevapları dikkate alarak, "
             "çelişkileri düzeltmek, en mantıklı noktaları birleştirmek ve kullanıcı için tek, net bir sonuç çıkarmaktır.\n\n"
             "ÖZEL TALİMATLAR:\n"
             "- Diğer uzmanların cevaplarını aynen tekrar etme.\n"
@@ -623,26 +1200,92 @@ class Orchestrator:
             "Şimdi, tek bir temiz, tekrar içermeyen, iyi yapılandırılmış cevap üret."
         )
 
-        final_resp = self.decision_agent.think(
-            conversation_history=self.conversation_history,
-            user_message=decision_prompt,
-        )
+        return decision_prompt
+
+    def ask_panel(self, user_message: str, on_event: Optional[PanelEvent] = None) -> Dict[str, str]:
+        """
+        on_event verilirse tüm cevaplar akış olarak alınır: uzmanların ve
+        DecisionAgent'ın ("final") paragrafları geldikçe on_event(anahtar, paragraf)
+        çağrılır, her cevabın sonunda on_event(anahtar, None) gelir.
+        Uzmanlar paralel çalışıyorsa on_event farklı thread'lerden çağrılabilir.
+        """
+        with span("ask_panel", question_chars=len(user_message)):
+            return self._ask_panel(user_message, on_event)
+
+    def _ask_panel(self, user_message: str, on_event: Optional[PanelEvent]) -> Dict[str, str]:
+        if DEBUG:
+            print("\n==========================")
+            print("Yeni soru:", user_message)
+            print("==========================")
 
-        final_resp = deduplicate_paragraphs(final_resp)
+        self._attach_late_answers()
+        self.conversation_history.append({"role": "user", "content": user_message})
 
-        self.conversation_history.append(
-            {"role": "assistant", "content": f"[Decision] {final_resp}"}
+        similar_memories = find_similar_memories(user_message, max_items=3) if self.use_memory else []
+
+        memory_context = self._build_memory_context(similar_memories)
+
+        base_input = (
+            memory_context + "Şimdiki soru: " + user_message
+            if memory_context
+            else user_message
         )
 
+        with span("experts", experts=len(self.experts)):
+            responses = self._ask_experts(base_input, on_event)
+
+        if DEBUG:
+            for key, _tag, agent in self.experts:
+                if key in responses:
+                    print(f"\n--- {agent.name} Cevabı ---\n", responses[key])
+
+        # Başarısız uzmanlar (hata, devre kesici açık, devre dışı) karara katılmaz
+        answered = {key: resp for key, resp in responses.items() if not is_error_response(resp)}
+
+        if answered:
+            # DecisionAgent için prompt
+            decision_prompt = self._build_decision_prompt(answered, similar_memories)
+
+            with span("decision", self.decision_agent.provider, answers=len(answered)):
+                final_resp = ask_expert(
+                    "final",
+                    self.decision_agent,
+                    self._context_for(self.conversation_history, "decision"),
+                    decision_prompt,
+                    on_event,
+                )
+        else:
+            final_resp = "[HATA] Hiçbir uzman cevap veremedi; karar aşaması atlandı."
+            if on_event is not None:
+                on_event("final", final_resp)
+                on_event("final", None)
+
+        if not is_error_response(final_resp):
+            self.conversation_history.append(
+                {"role": "assistant", "content": f"[Decision] {final_resp}"}
+            )
+
+        # Aşama başına tahmini prompt token'ları
+        self.last_stage_tokens = {"memory": count_tokens(memory_context)}
+        for key, _tag, agent in self.experts:
+            self.last_stage_tokens[key] = agent.last_prompt_tokens
+        self.last_stage_tokens["decision"] = self.decision_agent.last_prompt_tokens
+        if DEBUG:
+            print("\n[TOKEN] Tahmini prompt token'ları:", self.last_stage_tokens)
+
         if DEBUG:
             print("\n=== DecisionAgent Final Cevap ===\n", final_resp)
 
-        append_qa_memory(user_message, final_resp)
+        # Hata mesajları kalıcı hafızaya yazılmaz
+        if self.use_memory and not is_error_response(final_resp):
+            append_qa_memory(user_message, final_resp)
 
-        return {
-            "openai": openai_resp,
-            "gemini": gemini_resp,
-            "grok": grok_resp,
-            "claude": claude_resp,
-            "final": final_resp,
+        # Bütçe dışına taşan eski turları özete katla (geçmiş sınırsız büyümesin)
+        self.history.compact(self.conversation_history)
+
+        result = {
+            key: responses.get(key, LATE_ANSWER_TEXT.format(name=agent.name))
+            for key, _tag, agent in self.experts
         }
+        result["final"] = final_resp
+        return result
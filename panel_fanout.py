@@ -0,0 +1,374 @@
+# panel_fanout.py
+
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from config import PANEL_HEDGE_PERCENTILE, PANEL_HEDGE_MIN_SAMPLES
+from tracing import bind_context
+
+# concurrent.futures (logging vb. ile ~10 ms) ilk panelde import edilir
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+# Uzman tanımı: (sonuç anahtarı, geçmiş etiketi, agent)
+Expert = Tuple[str, str, object]
+
+# Akış olayı: on_event(anahtar, paragraf). paragraf=None o uzmanın bittiğini bildirir.
+PanelEvent = Callable[[str, Optional[str]], None]
+
+_executor: Optional["ThreadPoolExecutor"] = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers: int) -> "ThreadPoolExecutor":
+    """
+    Tüm Orchestrator'ların paylaştığı thread havuzunu döndürür (ilk kullanımda oluşturulur).
+    Daha büyük bir havuz istenirse (ör. hedge / geç kalan istekler için) havuz büyütülür:
+    yeni işler yeni havuza gider, eski havuz elindeki işleri bitirip kapanır.
+    """
+    global _executor, _executor_size
+    with _executor_lock:
+        if _executor is None or _executor_size < max_workers:
+            from concurrent.futures import ThreadPoolExecutor
+
+            old = _executor
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="panel-expert",
+            )
+            _executor_size = max_workers
+            if old is not None:
+                old.shutdown(wait=False)
+        return _executor
+
+
+def snapshot_history(history: Sequence[Dict[str, str]]) -> Tuple[Dict[str, str], ...]:
+    """
+    Konuşma geçmişinin değişmez bir kopyasını alır.
+    Paralel çalışan uzmanlar bu kopyayı okur; asıl liste sonradan güncellenir.
+    """
+    return tuple(dict(m) for m in history)
+
+
+def ask_expert(
+    key: str,
+    agent,
+    history: Sequence[Dict[str, str]],
+    user_message: str,
+    on_event: Optional[PanelEvent] = None,
+) -> str:
+    """
+    Tek bir uzmanı çalıştırır. on_event verilmişse cevap akış olarak alınır ve
+    paragraflar geldikçe bildirilir. Beklenmedik hatalar "[HATA] ..." metnine çevrilir.
+    """
+    try:
+        if on_event is None:
+            return agent.think(conversation_history=history, user_message=user_message)
+        return agent.think_stream(
+            conversation_history=history,
+            user_message=user_message,
+            on_paragraph=lambda paragraph: on_event(key, paragraph),
+        )
+    except Exception as e:
+        error = f"[HATA] {agent.name} beklenmedik bir hata verdi: {e}"
+        if on_event is not None:
+            on_event(key, error)
+        return error
+    finally:
+        if on_event is not None:
+            on_event(key, None)
+
+
+def run_experts_parallel(
+    experts: List[Expert],
+    histories: Dict[str, Sequence[Dict[str, str]]],
+    user_message: str,
+    max_workers: int = 4,
+    on_event: Optional[PanelEvent] = None,
+) -> Dict[str, str]:
+    """
+    Her uzmanın think() çağrısını kendi geçmiş kopyasıyla (histories[anahtar]) paralel çalıştırır.
+    Sonuç sözlüğü, bitiş sırasından bağımsız olarak `experts` sırasıyla doldurulur.
+    """
+    executor = get_executor(max_workers)
+    futures = [
+        (key, executor.submit(bind_context(ask_expert), key, agent, histories[key], user_message, on_event))
+        for key, _tag, agent in experts
+    ]
+    return {key: future.result() for key, future in futures}
+
+
+def run_experts_serial(
+    experts: List[Expert],
+    histories: Dict[str, Sequence[Dict[str, str]]],
+    user_message: str,
+    on_event: Optional[PanelEvent] = None,
+) -> Dict[str, str]:
+    """
+    Uzmanları sırayla ama her biri kendi geçmiş kopyasıyla çalıştırır.
+    """
+    return {
+        key: ask_expert(key, agent, histories[key], user_message, on_event)
+        for key, _tag, agent in experts
+    }
+
+
+# ============================================================
+#  QUORUM + HEDGING
+# ============================================================
+
+# Karar aşamasına yetişmeyen uzman için sonuç sözlüğüne konan metin
+LATE_ANSWER_TEXT = "[Geç kaldı] {name} cevabı karar aşamasına yetişmedi."
+
+
+class LatencyTracker:
+    """
+    Sağlayıcı başına son `window` isteğin süresi; hedging eşiği (p95) buradan hesaplanır.
+    Akışlı ve akışsız istekler farklı anahtarlarla tutulur (ilk paragraf / tam cevap süresi).
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(
+        self,
+        key: str,
+        q: float = PANEL_HEDGE_PERCENTILE,
+        min_samples: int = PANEL_HEDGE_MIN_SAMPLES,
+    ) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+_latency_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    return _latency_tracker
+
+
+class _Cancelled(BaseException):
+    # ask_expert'teki "except Exception" bunu hata metnine çevirmesin diye BaseException
+    pass
+
+
+class _ExpertRun:
+    """
+    Tek uzmanın (asıl + varsa hedge) denemeleri. İlk başarılı cevap `done` future'ına yazılır.
+    Akışta ekrana ilk paragrafı yazan deneme sahip olur; diğer denemeler ilk
+    paragraflarında kesilir. close() sonrası hiçbir olay dışarı verilmez.
+    """
+
+    def __init__(self, key: str, agent, history, user_message: str,
+                 on_event: Optional[PanelEvent], is_success: Callable[[str], bool],
+                 tracker: LatencyTracker):
+        from concurrent.futures import Future
+
+        self.key = key
+        self.agent = agent
+        self.history = history
+        self.user_message = user_message
+        self.on_event = on_event
+        self.is_success = is_success
+        self.tracker = tracker
+        self.latency_key = f"{agent.provider}:{'stream' if on_event else 'call'}"
+        self.done: "Future" = Future()
+        self.started = time.monotonic()
+        self.attempts: List["Future"] = []
+        self.hedged = False
+        self._lock = threading.Lock()
+        self._owner: Optional[int] = None
+        self._closed = False
+        self._cancelled = False
+        # Sonucunu _attempt_done'a bildirmiş deneme sayısı. Future.done(), future'ın
+        # done-callback'leri çalışmadan True olur; "diğer denemeler bitti mi" buna bakılmaz.
+        self._reported = 0
+        self._error: Optional[str] = None
+
+    # ---------------- denemeler ----------------
+
+    def submit(self, executor) -> None:
+        attempt = len(self.attempts)
+        if attempt:
+            self.hedged = True
+        future = executor.submit(bind_context(self._attempt), attempt, time.monotonic())
+        self.attempts.append(future)
+        future.add_done_callback(lambda f, attempt=attempt: self._attempt_done(attempt, f))
+
+    def _attempt(self, attempt: int, started: float) -> str:
+        on_event = None
+        if self.on_event is not None:
+            on_event = lambda key, paragraph: self._emit(attempt, started, paragraph)
+        try:
+            text = ask_expert(self.key, self.agent, self.history, self.user_message, on_event)
+        except _Cancelled:
+            return None
+        if self.on_event is None and self.is_success(text):
+            self.tracker.record(self.latency_key, time.monotonic() - started)
+        return text
+
+    def _emit(self, attempt: int, started: float, paragraph: Optional[str]) -> None:
+        if paragraph is None:
+            # Bitiş olayını _attempt_done tek sefer gönderir
+            return
+        with self._lock:
+            if self._cancelled:
+                raise _Cancelled()
+            if self._owner is None:
+                self._owner = attempt
+                self.tracker.record(self.latency_key, time.monotonic() - started)
+            elif self._owner != attempt:
+                raise _Cancelled()
+            if self._closed:
+                return
+            self.on_event(self.key, paragraph)
+
+    def _attempt_done(self, attempt: int, future: "Future") -> None:
+        if future.cancelled() or future.exception() is not None:
+            text = None
+        else:
+            text = future.result()
+        with self._lock:
+            self._reported += 1
+            others_running = self._reported < len(self.attempts)
+            if self.done.done():
+                return
+            if text is None:
+                # Kesilen / hata veren deneme; sonuncusuysa diğerinin hata cevabı geçerli olur
+                if others_running or self._error is None or self._cancelled:
+                    return
+                text = self._error
+            # Akışta ekrana yazılan (sahip) denemenin cevabı geçerlidir
+            elif self._owner is not None and self._owner != attempt:
+                return
+            elif not self.is_success(text) and others_running and self._owner is None:
+                # Hata ancak tüm denemeler bildirdikten sonra yazılır: hedge başarılı olabilir
+                self._error = text
+                return
+            self.done.set_result(text)
+            notify = self.on_event is not None and not self._closed
+        if notify:
+            self.on_event(self.key, None)
+
+    def maybe_hedge(self, executor, now: float) -> Optional[float]:
+        """
+        Süre eşiği aşıldıysa hedge isteği atar. Hedge için kalan süreyi
+        (henüz zamanı gelmediyse) döndürür, yapılacak bir şey yoksa None.
+        """
+        if self.hedged or self.done.done() or self._owner is not None:
+            return None
+        threshold = self.tracker.percentile(self.latency_key)
+        if threshold is None:
+            return None
+        remaining = self.started + threshold - now
+        if remaining > 0:
+            return remaining
+        submit = False
+        with self._lock:
+            if self._owner is None and not self.done.done():
+                submit = True
+        if submit:
+            self.submit(executor)
+        return None
+
+    # ---------------- geç kalanlar ----------------
+
+    def close(self, cancel: bool) -> bool:
+        """
+        Karar aşaması başladı: bundan sonra olay gönderilmez. cancel=True ise
+        başlamamış denemeler iptal edilir, akıştakiler bir sonraki paragrafta kesilir.
+        Cevap tam bu arada geldiyse hiçbir şey yapmaz ve False döndürür.
+        """
+        with self._lock:
+            if self.done.done():
+                return False
+            self._closed = True
+            if cancel:
+                self._cancelled = True
+        if cancel:
+            for future in self.attempts:
+                future.cancel()
+        return True
+
+
+def run_experts_quorum(
+    experts: List[Expert],
+    histories: Dict[str, Sequence[Dict[str, str]]],
+    user_message: str,
+    quorum: int = 0,
+    soft_deadline: Optional[float] = None,
+    max_workers: int = 4,
+    on_event: Optional[PanelEvent] = None,
+    hedge: bool = False,
+    late_policy: str = "attach",
+    is_success: Callable[[str], bool] = lambda text: True,
+) -> Tuple[Dict[str, str], Dict[str, "Future"]]:
+    """
+    Uzmanları paralel çalıştırır ama hepsini beklemek zorunda değildir:
+      - quorum > 0 ise o kadar başarılı cevap gelince,
+      - soft_deadline (saniye) dolunca en az bir cevap varsa
+    beklemeyi bırakır. hedge=True ise süresi sağlayıcının p95'ini aşan isteğin bir kopyası atılır.
+
+    Dönüş: (zamanında gelen cevaplar `experts` sırasıyla, {anahtar: geç kalan cevabın future'ı}).
+    Geç kalanlar için on_event(anahtar, LATE_ANSWER_TEXT) ve on_event(anahtar, None) gönderilir;
+    late_policy="cancel" ise future'lar döndürülmez, denemeler iptal edilir.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    executor = get_executor(max_workers)
+    tracker = get_latency_tracker()
+    runs = [
+        _ExpertRun(key, agent, histories[key], user_message, on_event, is_success, tracker)
+        for key, _tag, agent in experts
+    ]
+    for run in runs:
+        run.submit(executor)
+
+    deadline = time.monotonic() + soft_deadline if soft_deadline else None
+    while True:
+        finished = [run for run in runs if run.done.done()]
+        if len(finished) == len(runs):
+            break
+        successes = sum(1 for run in finished if is_success(run.done.result()))
+        if quorum and successes >= quorum:
+            break
+        now = time.monotonic()
+        if deadline is not None and now >= deadline and finished:
+            break
+
+        # Bir sonraki uyanma: ilk biten cevap, deadline ya da en yakın hedge zamanı
+        waits = []
+        if deadline is not None and now < deadline:
+            waits.append(deadline - now)
+        if hedge:
+            for run in runs:
+                remaining = run.maybe_hedge(executor, now)
+                if remaining is not None:
+                    waits.append(remaining)
+        timeout = min(waits) if waits else None
+        wait([run.done for run in runs if not run.done.done()], timeout=timeout, return_when=FIRST_COMPLETED)
+
+    responses: Dict[str, str] = {}
+    late: Dict[str, "Future"] = {}
+    for run in runs:
+        if not run.close(cancel=late_policy == "cancel"):
+            responses[run.key] = run.done.result()
+            continue
+        if on_event is not None:
+            on_event(run.key, LATE_ANSWER_TEXT.format(name=run.agent.name))
+            on_event(run.key, None)
+        if late_policy != "cancel":
+            late[run.key] = run.done
+    return responses, late
@@ -0,0 +1,556 @@
+# panel_server.py
+#
+# Paneli (ve doküman analizini) HTTP üzerinden çok kullanıcıya açan asyncio sunucusu.
+# Sadece standart kütüphane kullanır. Her oturumun kendi Orchestrator'ı (geçmiş, doküman
+# bağlamı) vardır; ask_panel engelleyici olduğu için thread havuzunda çalışır, event loop
+# sadece bağlantıları ve akışı yönetir. Böylece yavaş bir soru diğer oturumları bekletmez.
+#
+#   python panel_server.py --port 8080
+#
+#   POST   /sessions                 {"providers": ["openai", "claude"], "use_memory": false}
+#                                    -> {"session_id": "..."}
+#                                    use_memory varsayılanı false: Q/A hafızası tüm kullanıcılar
+#                                    için tek dosyadır, açılırsa başkalarının soru-cevapları da
+#                                    prompt'a girer (sadece tek kullanıcılı kurulumlar için)
+#   POST   /sessions/<id>/ask        {"question": "...", "stream": false}
+#                                    -> {"openai": "...", ..., "final": "..."}
+#                                    stream=true ise text/event-stream:
+#                                      event: paragraph  data: {"key": "openai", "text": "..."}
+#                                      event: done       data: {"key": "openai"}
+#                                      event: result     data: {... ask_panel sonucu ...}
+#                                      event: error      data: {"error": "..."}
+#   POST   /sessions/<id>/document   {"path": "rapor.xlsx"}  (SERVER_DOCUMENT_DIR altında)
+#   DELETE /sessions/<id>
+#   GET    /health, GET /stats
+#
+# Aynı oturuma gelen sorular sırayla çalışır (geçmiş tutarlı kalsın); farklı oturumlar paralel.
+# Oturumlar her istekten sonra SESSION_DIR'e yazılır; sunucu yeniden başlasa da aynı kimlikle
+# devam edilir. SESSION_RETENTION boyunca kullanılmayan oturumlar silinir; diskte
+# SESSION_MAX_STORED oturum varken POST /sessions 503 döner.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    PANEL_MAX_WORKERS,
+    SERVER_DOCUMENT_DIR,
+    SERVER_HOST,
+    SERVER_MAX_BODY_BYTES,
+    SERVER_PANEL_WORKERS,
+    SERVER_PORT,
+    SERVER_SESSION_TTL,
+    SESSION_DIR,
+)
+from http_transport import get_transport_stats
+from multi_agent import AGENT_CLASSES, Orchestrator
+from rate_limiter import get_rate_limiter_states
+from resilience import get_breaker_states
+from session_store import SessionLimitError, SessionStore, StoredSession
+from tracing import bind_context
+from usage_stats import get_usage_stats
+
+_REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+# (yöntem, oturum altındaki yol) -> desteklenen oturum istekleri
+_SESSION_ROUTES = {("GET", None), ("DELETE", None), ("POST", "ask"), ("POST", "document")}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    __slots__ = ("method", "path", "headers", "body", "keep_alive")
+
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes, keep_alive: bool):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+
+    def json(self) -> Dict:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise HTTPError(400, "gövde JSON değil")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "gövde JSON nesnesi olmalı")
+        return data
+
+
+async def read_request(reader: asyncio.StreamReader, max_body: int) -> Optional[Request]:
+    """
+    Tek bir HTTP/1.1 isteğini okur; bağlantı istek başlamadan kapandıysa None.
+    Sadece Content-Length'li gövde desteklenir (chunked istek gövdesi gerekmez).
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HTTPError(400, "istek başlığı yarım kaldı")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "istek başlığı çok büyük")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "geçersiz istek satırı")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(400, "chunked istek gövdesi desteklenmiyor")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "geçersiz Content-Length")
+    if length > max_body:
+        raise HTTPError(413, f"gövde en fazla {max_body} bayt olabilir")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return Request(method.upper(), target.split("?", 1)[0], headers, body, keep_alive)
+
+
+def _head(status: int, headers: List[Tuple[str, str]]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool = True) -> None:
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(_head(status, [
+        ("Content-Type", "application/json; charset=utf-8"),
+        ("Content-Length", str(len(data))),
+        ("Connection", "keep-alive" if keep_alive else "close"),
+    ]) + data)
+    await writer.drain()
+
+
+class EventStream:
+    """
+    text/event-stream cevabı (chunked). Her olay ayrı bir chunk olarak hemen gönderilir.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+
+    async def open(self) -> None:
+        self.writer.write(_head(200, [
+            ("Content-Type", "text/event-stream; charset=utf-8"),
+            ("Cache-Control", "no-cache"),
+            ("Transfer-Encoding", "chunked"),
+        ]))
+        await self.writer.drain()
+
+    async def send(self, event: str, payload) -> None:
+        data = f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+        self.writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        self.writer.write(b"0\r\n\r\n")
+        await self.writer.drain()
+
+
+# ============================================================
+#  OTURUMLAR
+# ============================================================
+
+def describe_session(session: StoredSession) -> Dict[str, object]:
+    return {
+        "session_id": session.session_id,
+        "providers": [key for key, _tag, _agent in session.orchestrator.experts],
+        "document": session.meta.get("document"),
+        "asked": session.meta.get("asked", 0),
+    }
+
+
+def _load_document(path: str):
+    from analyze_document import build_document_context, open_chunk_index
+    from document_utils import load_document_for_model
+
+    doc_main, doc_extra = load_document_for_model(path)
+    return build_document_context(doc_main, doc_extra), open_chunk_index(path)
+
+
+class PanelServer:
+    """
+    Oturumlar SessionStore'da tutulur: her turdan sonra diske yazılır, boşta kalanlar
+    bellekten atılıp tekrar kullanıldıklarında yüklenir; sunucu yeniden başlasa da
+    oturum kimlikleri geçerli kalır. Oturumun asyncio kilidi ve doküman parça indeksi
+    StoredSession.runtime'da durur (diske yazılmaz, gerektiğinde yeniden kurulur).
+    """
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        panel_workers: int = SERVER_PANEL_WORKERS,
+        session_ttl: float = SERVER_SESSION_TTL,
+        document_dir: str = SERVER_DOCUMENT_DIR,
+        store: Optional[SessionStore] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.session_ttl = session_ttl
+        self.document_dir = os.path.realpath(document_dir)
+        self.store = store if store is not None else SessionStore()
+        self.running = 0
+        self.served = 0
+        self._executor = ThreadPoolExecutor(max_workers=panel_workers, thread_name_prefix="server-panel")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sweeper: Optional[asyncio.Task] = None
+
+        from panel_fanout import get_executor
+
+        # Uzman havuzu ilk çağrıda boyutlanır: her panel uzman + hedge denemeleri kadar thread ister
+        get_executor(panel_workers * PANEL_MAX_WORKERS * 2)
+
+    # ---------------- yaşam döngüsü ----------------
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_sessions())
+
+    async def serve_forever(self) -> None:
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.store.evict_idle(0)
+        self._executor.shutdown(wait=False)
+
+    async def _sweep_sessions(self) -> None:
+        interval = max(1.0, min(60.0, self.session_ttl / 4))
+        while True:
+            await asyncio.sleep(interval)
+            await self._run_io(self.store.evict_idle, self.session_ttl)
+            await self._run_io(self.store.purge_expired)
+
+    def _run_in_pool(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, bind_context(fn), *args)
+
+    def _run_io(self, fn, *args):
+        # Kısa disk işleri (oturum yükleme / kaydetme) panel havuzunun arkasında beklemesin
+        return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # ---------------- bağlantı ----------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, SERVER_MAX_BODY_BYTES)
+                except HTTPError as e:
+                    await send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                self.served += 1
+                keep_alive = await self._dispatch(request, writer)
+                if not (keep_alive and request.keep_alive):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        """
+        İsteği işler; bağlantı açık tutulabilecekse True döner.
+        """
+        try:
+            return await self._route(request, writer)
+        except HTTPError as e:
+            await send_json(writer, e.status, {"error": e.message}, request.keep_alive)
+        except ConnectionError:
+            return False
+        except Exception as e:
+            print(f"❌ [SERVER] {request.method} {request.path}: {type(e).__name__}: {e}")
+            await send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"}, request.keep_alive)
+        return True
+
+    async def _route(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        parts = [part for part in request.path.split("/") if part]
+        method = request.method
+
+        if parts == ["health"] and method == "GET":
+            await send_json(writer, 200, "ok", request.keep_alive)
+        elif parts == ["stats"] and method == "GET":
+            await send_json(writer, 200, self.stats(), request.keep_alive)
+        elif parts == ["sessions"] and method == "POST":
+            session = await self._create_session(request.json())
+            await send_json(writer, 201, describe_session(session), request.keep_alive)
+        elif len(parts) in (2, 3) and parts[0] == "sessions":
+            action = parts[2] if len(parts) == 3 else None
+            if action not in (None, "ask", "document"):
+                raise HTTPError(404, f"bilinmeyen yol: {request.path}")
+            if (method, action) not in _SESSION_ROUTES:
+                raise HTTPError(405, f"{method} {request.path} desteklenmiyor")
+            return await self._session_request(parts[1], action, request, writer)
+        elif parts[:1] in (["health"], ["stats"], ["sessions"]):
+            raise HTTPError(405, f"{method} {request.path} desteklenmiyor")
+        else:
+            raise HTTPError(404, f"bilinmeyen yol: {request.path}")
+        return True
+
+    async def _session_request(self, session_id: str, action: Optional[str], request: Request,
+                               writer: asyncio.StreamWriter) -> bool:
+        try:
+            session = await self._run_io(self.store.acquire, session_id)
+        except KeyError:
+            raise HTTPError(404, f"oturum bulunamadı: {session_id}")
+        changed = action is not None
+        try:
+            # Aynı oturumun istekleri sırayla çalışır; kilit oturum bellekteyken yaşar
+            # (kullanımdaki oturum bellekten atılmaz)
+            lock = session.runtime.setdefault("lock", asyncio.Lock())
+            if action == "ask":
+                return await self._ask(session, lock, request, writer)
+            if action == "document":
+                await self._set_document(session, lock, request.json())
+            elif request.method == "DELETE":
+                async with lock:
+                    await self._run_io(self.store.delete, session_id)
+            await send_json(writer, 200, describe_session(session), request.keep_alive)
+            return True
+        finally:
+            # Her istekten sonra oturum diske yazılır (silinmişse yazılmaz)
+            await self._run_io(self.store.release, session, changed)
+
+    # ---------------- uç noktalar ----------------
+
+    async def _create_session(self, body: Dict) -> StoredSession:
+        providers = body.get("providers")
+        if providers is not None and not (
+            isinstance(providers, list) and all(isinstance(p, str) for p in providers)
+        ):
+            raise HTTPError(400, "'providers' metin listesi olmalı")
+        if providers is not None and not set(providers) & set(AGENT_CLASSES):
+            raise HTTPError(400, "panelde bilinen bir sağlayıcı yok")
+        # Ortak Q/A hafızası oturumlar arasında veri sızdırır; açıkça istenmedikçe kapalı
+        try:
+            session = await self._run_io(
+                self.store.create, providers, bool(body.get("use_memory", False)), {"asked": 0}
+            )
+        except SessionLimitError as e:
+            raise HTTPError(503, str(e))
+        except RuntimeError as e:
+            raise HTTPError(400, str(e))
+        await self._run_io(self.store.release, session, False)
+        return session
+
+    def _document_path(self, path: str) -> str:
+        """
+        İstenen yolu SERVER_DOCUMENT_DIR'e göre çözer; klasörün dışına çıkan yollar reddedilir.
+        """
+        full = os.path.realpath(os.path.join(self.document_dir, path))
+        if os.path.commonpath([full, self.document_dir]) != self.document_dir:
+            raise HTTPError(400, "doküman yolu doküman klasörünün dışında")
+        if not os.path.isfile(full):
+            raise HTTPError(404, f"doküman bulunamadı: {path}")
+        return full
+
+    async def _set_document(self, session: StoredSession, lock: asyncio.Lock, body: Dict) -> None:
+        path = body.get("path")
+        if not isinstance(path, str) or not path.strip():
+            raise HTTPError(400, "'path' gerekli")
+        full = self._document_path(path.strip())
+        async with lock:
+            try:
+                doc_context, chunk_index = await self._run_in_pool(_load_document, full)
+            except Exception as e:
+                raise HTTPError(400, f"doküman okunamadı: {e}")
+            old_index = session.runtime.pop("chunk_index", None)
+            if old_index is not None:
+                old_index.close()
+            session.orchestrator.set_document_context(doc_context)
+            session.runtime["chunk_index"] = chunk_index
+            session.meta.update(document=path.strip(), first_turn=True)
+
+    def _build_prompt(self, session: StoredSession, question: str) -> str:
+        document = session.meta.get("document")
+        if document is None:
+            return question
+        from analyze_document import build_question_prompt, open_chunk_index
+
+        if "chunk_index" not in session.runtime:
+            # Oturum diskten yüklendi: doküman özeti geri geldi, parça indeksi yeniden kurulur
+            try:
+                session.runtime["chunk_index"] = open_chunk_index(self._document_path(document))
+            except HTTPError:
+                session.runtime["chunk_index"] = None
+        prompt = build_question_prompt(question, session.meta.get("first_turn", True),
+                                       session.runtime["chunk_index"])
+        session.meta["first_turn"] = False
+        return prompt
+
+    async def _ask(self, session: StoredSession, lock: asyncio.Lock, request: Request,
+                   writer: asyncio.StreamWriter) -> bool:
+        body = request.json()
+        question = body.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(400, "'question' gerekli")
+        stream = bool(body.get("stream"))
+
+        async with lock:
+            prompt = await self._run_in_pool(self._build_prompt, session, question.strip())
+            if not stream:
+                result = await self._run_panel(session, prompt, None)
+                await send_json(writer, 200, result, request.keep_alive)
+                return True
+            return await self._ask_stream(session, prompt, writer)
+
+    async def _run_panel(self, session: StoredSession, prompt: str, on_event) -> Dict[str, str]:
+        self.running += 1
+        try:
+            return await self._run_in_pool(session.orchestrator.ask_panel, prompt, on_event)
+        finally:
+            self.running -= 1
+            session.meta["asked"] = session.meta.get("asked", 0) + 1
+
+    async def _ask_stream(self, session: StoredSession, prompt: str, writer: asyncio.StreamWriter) -> bool:
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def on_event(key: str, paragraph: Optional[str]) -> None:
+            # Uzman thread'lerinden çağrılır; kuyruğa event loop üzerinden konur
+            loop.call_soon_threadsafe(events.put_nowait, (key, paragraph))
+
+        stream = EventStream(writer)
+        await stream.open()
+        panel = loop.create_task(self._run_panel(session, prompt, on_event))
+        connected = True
+        waiter = None
+        while True:
+            waiter = loop.create_task(events.get())
+            done, _ = await asyncio.wait({waiter, panel}, return_when=asyncio.FIRST_COMPLETED)
+            if waiter not in done:
+                waiter.cancel()
+                break
+            key, paragraph = waiter.result()
+            if not connected:
+                continue
+            try:
+                if paragraph is None:
+                    await stream.send("done", {"key": key})
+                else:
+                    await stream.send("paragraph", {"key": key, "text": paragraph})
+            except ConnectionError:
+                # İstemci gitti: panel yine de bitirilir ki oturum geçmişi tutarlı kalsın
+                connected = False
+
+        # Panel bitti; call_soon_threadsafe ile gelmiş ama işlenmemiş olaylar da gönderilsin
+        await asyncio.sleep(0)
+        pending = []
+        while not events.empty():
+            pending.append(events.get_nowait())
+        if not connected:
+            await asyncio.gather(panel, return_exceptions=True)
+            return False
+        try:
+            for key, paragraph in pending:
+                if paragraph is None:
+                    await stream.send("done", {"key": key})
+                else:
+                    await stream.send("paragraph", {"key": key, "text": paragraph})
+            try:
+                result = panel.result()
+            except Exception as e:
+                await stream.send("error", {"error": f"{type(e).__name__}: {e}"})
+            else:
+                await stream.send("result", result)
+            await stream.close()
+        except ConnectionError:
+            return False
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "sessions": self.store.stats(),
+            "running_panels": self.running,
+            "requests": self.served,
+            "transport": get_transport_stats(),
+            "usage": get_usage_stats(),
+            "breakers": get_breaker_states(),
+            "rate_limits": get_rate_limiter_states(),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paneli HTTP üzerinden sunan asyncio sunucusu")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_PANEL_WORKERS,
+                        help="aynı anda çalışan panel sayısı")
+    parser.add_argument("--document-dir", default=SERVER_DOCUMENT_DIR,
+                        help="doküman uç noktasının okuyabileceği klasör")
+    parser.add_argument("--session-dir", default=SESSION_DIR, help="oturum snapshot'larının klasörü")
+    args = parser.parse_args()
+
+    try:
+        Orchestrator()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    server = PanelServer(args.host, args.port, panel_workers=args.workers, document_dir=args.document_dir,
+                         store=SessionStore(args.session_dir))
+
+    async def run() -> None:
+        await server.start()
+        print(f"Panel sunucusu: http://{server.host}:{server.port}  (durdurmak için Ctrl+C)")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
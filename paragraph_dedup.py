@@ -0,0 +1,143 @@
+# paragraph_dedup.py
+#
+# Cevap içindeki tekrar eden paragrafları bulur.
+#   - Birebir aynı paragraflar (baş/son boşluk hariç) bir küme ile yakalanır.
+#   - Başka kelimelerle tekrarlananlar kelime n'lilerinin (shingle) Jaccard benzerliğiyle
+#     yakalanır. Her paragrafın shingle kümesinden tek geçişte MinHash imzası çıkarılır
+#     (one permutation hashing: shingle başına tek hash, boş kovalar sağdaki dolu
+#     kovadan doldurulur). İmza bantlara bölünür (LSH); aynı kovaya düşen önceki
+#     paragraflar aday olur ve sadece adaylarla gerçek Jaccard benzerliği hesaplanır.
+# Paragraf başına iş shingle sayısıyla doğrusaldır; tüm paragraflar birbiriyle kıyaslanmaz.
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import (
+    DEDUP_MIN_WORDS,
+    DEDUP_NUM_HASHES,
+    DEDUP_SHINGLE_WORDS,
+    DEDUP_SIMILARITY_THRESHOLD,
+)
+from text_search import tokenize
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def lsh_bands(num_hashes: int, threshold: float, recall: float = 0.99) -> Tuple[int, int]:
+    """
+    İmzanın (bant sayısı, bant başına satır) bölünmesi. Benzerliği tam eşikte olan bir
+    çiftin en az bir bantta çakışma olasılığı recall'ın altına düşmeyen en seçici bölme
+    seçilir; fazladan adaylar zaten gerçek Jaccard ile elenir.
+    """
+    best = (num_hashes, 1)
+    for rows in range(1, num_hashes + 1):
+        bands = num_hashes // rows
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+def shingle_hashes(words: List[str], size: int) -> Set[int]:
+    if len(words) <= size:
+        return {hash(tuple(words))}
+    return {hash(shingle) for shingle in zip(*(words[i:] for i in range(size)))}
+
+
+def minhash_signature(hashes: Set[int], num_hashes: int) -> List[int]:
+    """
+    One permutation hashing: her hash, değerine göre num_hashes kovadan birine düşer ve
+    kovada en küçük değer tutulur. Boş kova sağındaki ilk dolu kovanın değerini uzaklık
+    kadar kaydırarak alır; böylece küçük kümelerde de iki imzanın aynı konumda eşit olma
+    olasılığı Jaccard benzerliğine eşit kalır.
+    """
+    bins: List[Optional[int]] = [None] * num_hashes
+    for h in hashes:
+        h &= _HASH_MASK
+        i = h % num_hashes
+        value = h // num_hashes
+        current = bins[i]
+        if current is None or value < current:
+            bins[i] = value
+
+    offset = _HASH_MASK // num_hashes + 1
+    signature = [0] * num_hashes
+    nearest = 0
+    distance = 0
+    # İki tur geriye doğru: son kovaların sağındaki dolu kova baştan (dairesel) bulunur
+    for step in range(2 * num_hashes - 1, -1, -1):
+        i = step % num_hashes
+        if bins[i] is not None:
+            nearest = bins[i]
+            distance = 0
+        else:
+            distance += 1
+        if step < num_hashes:
+            signature[i] = nearest + distance * offset
+    return signature
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class ParagraphDeduplicator:
+    """
+    Paragrafları sırayla alır; daha önce kabul edilmiş bir paragrafın birebir ya da
+    yakın tekrarı olanları reddeder.
+      threshold     : shingle kümelerinin Jaccard benzerliği bu değere ulaşırsa tekrar
+                      sayılır; >= 1.0 ise sadece birebir tekrarlar atılır
+      shingle_words : shingle uzunluğu (kelime)
+      min_words     : daha kısa paragraflar sadece birebir tekrarsa atılır
+      num_hashes    : MinHash imza uzunluğu
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_SIMILARITY_THRESHOLD,
+        shingle_words: int = DEDUP_SHINGLE_WORDS,
+        min_words: int = DEDUP_MIN_WORDS,
+        num_hashes: int = DEDUP_NUM_HASHES,
+    ):
+        self.threshold = threshold
+        self.shingle_words = max(1, shingle_words)
+        self.min_words = min_words
+        self.num_hashes = num_hashes
+        self.bands, self.rows = lsh_bands(num_hashes, threshold) if threshold < 1.0 else (0, 0)
+        self.dropped = 0
+        self._seen: Set[str] = set()
+        self._shingles: List[Set[int]] = []
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+
+    def accept(self, block: str) -> bool:
+        norm = block.strip()
+        if not norm:
+            return False
+        if norm in self._seen:
+            self.dropped += 1
+            return False
+        self._seen.add(norm)
+
+        if not self.bands:
+            return True
+        words = tokenize(norm)
+        if len(words) < self.min_words:
+            return True
+
+        shingles = shingle_hashes(words, self.shingle_words)
+        signature = minhash_signature(shingles, self.num_hashes)
+        rows = self.rows
+        keys = [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+        candidates: Set[int] = set()
+        for key in keys:
+            candidates.update(self._buckets.get(key, ()))
+        for candidate in candidates:
+            if jaccard(shingles, self._shingles[candidate]) >= self.threshold:
+                self.dropped += 1
+                return False
+
+        index = len(self._shingles)
+        self._shingles.append(shingles)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(index)
+        return True
@@ -0,0 +1,116 @@
+# prompt_assembly.py
+#
+# Bir isteğin mesajlarını gönderim sırasıyla (doküman, rol metni, geçmiş, kullanıcı
+# mesajı) dolaşıp içerikleri paragraf bloklarına böler. Her blok, boşlukları
+# normalize edilmiş metninin hash'iyle izlenir: ilk geçtiği yerde olduğu gibi kalır,
+# sonraki geçişleri ilk geçtiği mesajı gösteren kısa bir referansla değiştirilir.
+# Ardışık tekrar bloklar tek referansta birleşir.
+#
+# Tipik kazanç DecisionAgent isteğinde: uzman cevapları geçmişte "[OpenAI] ..." olarak
+# zaten varken karar prompt'unda tekrar gönderiliyordu; benzer hafıza cevapları da
+# önceki turların "[Decision] ..." mesajlarıyla aynı metin.
+#
+# Önceki mesajların hali sonradan eklenen mesajlardan etkilenmez; geçmiş büyüdükçe
+# istek öneki aynı kalır (sağlayıcı prompt önbelleği bozulmaz).
+
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from config import PROMPT_DEDUP_MIN_CHARS
+from history_manager import message_tag
+
+BLOCK_SEPARATOR = "\n\n"
+
+
+def block_key(block: str) -> Optional[bytes]:
+    """
+    Bloğun izleme anahtarı; referanstan kısa kalacak kadar küçük bloklar için None.
+    """
+    norm = " ".join(block.split())
+    if len(norm) < PROMPT_DEDUP_MIN_CHARS:
+        return None
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).digest()
+
+
+def _source_label(message: Dict[str, str]) -> str:
+    tag = message_tag(message)
+    if tag:
+        return f"[{tag}] mesajında"
+    role = message.get("role")
+    if role == "user":
+        return "kullanıcı mesajında"
+    if role == "system":
+        return "sistem mesajında"
+    return "asistan mesajında"
+
+
+def _reference(count: int, label: str) -> str:
+    what = "Bu paragraf" if count == 1 else f"Bu {count} paragraf"
+    return f"[{what} yukarıda {label} geçti; tekrar edilmedi.]"
+
+
+class PromptAssembler:
+    """
+    Mesajları sırayla add() ile alır; tekrar eden blokları referansa çevrilmiş
+    mesajı döndürür. Mesajın diğer alanları (ör. "cache") korunur.
+      replaced    : referansa çevrilen blok sayısı
+      saved_chars : referanslar sonrası düşen karakter sayısı
+    """
+
+    def __init__(self):
+        self._first_seen: Dict[bytes, int] = {}
+        self._labels: List[str] = []
+        self.replaced = 0
+        self.saved_chars = 0
+
+    def add(self, message: Dict[str, str]) -> Dict[str, str]:
+        content = message.get("content", "")
+        index = len(self._labels)
+        self._labels.append(_source_label(message))
+        if not isinstance(content, str) or not content:
+            return message
+
+        # "[OpenAI] ..." etiketi içerik değil; karşılaştırmaya girmez, mesajda kalır
+        tag = message_tag(message)
+        prefix = f"[{tag}] " if tag else ""
+        blocks = content[len(prefix):].split(BLOCK_SEPARATOR)
+
+        result: List[str] = []
+        run: Optional[Tuple[int, int, int]] = None   # (kaynak mesaj, blok sayısı, karakter)
+        for block in blocks:
+            key = block_key(block)
+            source = self._first_seen.get(key) if key is not None else None
+            if source is not None:
+                if run is not None and run[0] == source:
+                    run = (source, run[1] + 1, run[2] + len(block))
+                else:
+                    self._close_run(run, index, result)
+                    run = (source, 1, len(block))
+                continue
+            self._close_run(run, index, result)
+            run = None
+            if key is not None:
+                self._first_seen[key] = index
+            result.append(block)
+        self._close_run(run, index, result)
+
+        new_content = prefix + BLOCK_SEPARATOR.join(result)
+        if new_content == content:
+            return message
+        return dict(message, content=new_content)
+
+    def _close_run(self, run: Optional[Tuple[int, int, int]], index: int, result: List[str]) -> None:
+        if run is None:
+            return
+        source, count, chars = run
+        label = "bu mesajda" if source == index else self._labels[source]
+        reference = _reference(count, label)
+        result.append(reference)
+        self.replaced += count
+        # Blokları ayıran "\n\n"ler de düşer
+        self.saved_chars += chars + len(BLOCK_SEPARATOR) * (count - 1) - len(reference)
+
+
+def assemble_messages(messages: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], PromptAssembler]:
+    assembler = PromptAssembler()
+    return [assembler.add(message) for message in messages], assembler
@@ -0,0 +1,576 @@
+# provider_simulator.py
+#
+# OpenAI, Gemini, xAI (Grok) ve Anthropic (Claude) uç noktalarının yerel taklidi.
+# Gerçek sağlayıcılara para ödemeden / rate limit'e takılmadan yük ve gecikme
+# denemeleri yapmak için. İstek ve cevap (akış dahil) biçimleri multi_agent.py'deki
+# call_* / stream_* fonksiyonlarının beklediğiyle aynıdır.
+#
+#   python provider_simulator.py --port 8089 --latency-ms 800 --error-rate 0.02 --rpm 60
+#   PROVIDER_SIM_URL=http://127.0.0.1:8089 OPENAI_API_KEY=sk-sim GEMINI_API_KEY=AIzasim \
+#       ANTHROPIC_API_KEY=sk-ant-sim python main.py
+#
+# Sağlayıcı başına farklı ayarlar için --config dosyası (JSON):
+#   {"claude": {"latency_ms": 2000, "error_rate": 0.1}, "gemini": {"rpm": 30}}
+#
+# GET /stats : sağlayıcı ve durum kodu başına istek sayıları
+# GET /health: "ok"
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROVIDERS = ("openai", "gemini", "grok", "claude")
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+
+_LOREM = (
+    "Bu cevap yerel sağlayıcı simülatörü tarafından üretildi. Gerçek bir modelden gelmiyor; "
+    "sadece istek ve cevap biçimlerini, gecikmeyi ve hata davranışını taklit ediyor."
+)
+
+# Hata oranına takılan isteklerde dönülen durum kodları
+_ERROR_STATUSES = {
+    "openai": (500, 502, 503),
+    "gemini": (500, 503),
+    "grok": (500, 503),
+    "claude": (500, 529),
+}
+
+
+class ProviderProfile:
+    """
+    Bir sağlayıcının simülasyon ayarları.
+      latency_ms      : ilk parçaya (akışsızda cevaba) kadar geçen sürenin medyanı
+      latency_dist    : fixed | uniform | lognormal | exponential
+      latency_spread  : uniform'da ±oran, lognormal'de sigma
+      chunk_delay_ms  : akışta iki parça arası (akışsızda toplam süreye eklenir)
+      chunk_words     : parça başına kelime
+      error_rate      : 5xx dönme olasılığı
+      rate_limit_rate : rastgele 429 olasılığı (rpm sınırından bağımsız)
+      rpm             : dakikalık istek sınırı (sürekli dolan kova, gerçek sağlayıcılar gibi);
+                        aşılınca 429 + Retry-After (0: sınırsız)
+      drop_rate       : akışın yarıda kesilme olasılığı
+      response        : echo (son kullanıcı mesajını tekrarlar) | canned (sabit metin)
+      canned          : response=canned iken dönülecek metin
+      words           : canned metin bu kelime sayısına kadar tekrarlanır
+    """
+
+    FIELDS = {
+        "latency_ms": 800.0,
+        "latency_dist": "lognormal",
+        "latency_spread": 0.5,
+        "chunk_delay_ms": 30.0,
+        "chunk_words": 4,
+        "error_rate": 0.0,
+        "rate_limit_rate": 0.0,
+        "rpm": 0,
+        "drop_rate": 0.0,
+        "response": "canned",
+        "canned": _LOREM,
+        "words": 60,
+    }
+
+    def __init__(self, **overrides):
+        unknown = set(overrides) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen simülatör ayarı: {', '.join(sorted(unknown))}")
+        for name, default in self.FIELDS.items():
+            setattr(self, name, type(default)(overrides.get(name, default)))
+        if self.latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist şunlardan biri olmalı: {', '.join(LATENCY_DISTRIBUTIONS)}")
+        if self.response not in ("echo", "canned"):
+            raise ValueError("response 'echo' ya da 'canned' olmalı")
+
+    def with_overrides(self, overrides: Dict) -> "ProviderProfile":
+        values = {name: getattr(self, name) for name in self.FIELDS}
+        values.update(overrides)
+        return ProviderProfile(**values)
+
+
+class SimulatorState:
+    """
+    Profiller, rastgele sayı üreteci, rpm pencereleri ve sayaçlar (tüm istek thread'leri paylaşır).
+    """
+
+    def __init__(self, profiles: Dict[str, ProviderProfile], seed: Optional[int] = None):
+        self.profiles = profiles
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # sağlayıcı -> [kovadaki istek hakkı, son güncelleme]; ilk istekte dolu başlar
+        self._buckets: Dict[str, List[float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {p: {} for p in PROVIDERS}
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def choice(self, seq):
+        with self._lock:
+            return self._rng.choice(seq)
+
+    def latency(self, profile: ProviderProfile) -> float:
+        median = profile.latency_ms / 1000.0
+        with self._lock:
+            if profile.latency_dist == "fixed":
+                return median
+            if profile.latency_dist == "uniform":
+                return max(0.0, self._rng.uniform(median * (1 - profile.latency_spread),
+                                                  median * (1 + profile.latency_spread)))
+            if profile.latency_dist == "exponential":
+                # Medyanı latency_ms olan üstel dağılım
+                return self._rng.expovariate(math.log(2) / median) if median > 0 else 0.0
+            return self._rng.lognormvariate(math.log(median), profile.latency_spread) if median > 0 else 0.0
+
+    def chunk_delay(self, profile: ProviderProfile) -> float:
+        return profile.chunk_delay_ms / 1000.0
+
+    def admit(self, provider: str, profile: ProviderProfile) -> Tuple[bool, int, float]:
+        """
+        rpm kovasında yer var mı. Dönüş: (kabul, kalan istek, kovanın dolmasına / bir hakkın
+        açılmasına kalan sn).
+        """
+        if profile.rpm <= 0:
+            return True, 0, 0.0
+        now = time.monotonic()
+        per_second = profile.rpm / 60.0
+        with self._lock:
+            bucket = self._buckets.setdefault(provider, [float(profile.rpm), now])
+            level = min(float(profile.rpm), bucket[0] + (now - bucket[1]) * per_second)
+            bucket[1] = now
+            if level < 1.0:
+                bucket[0] = level
+                return False, 0, (1.0 - level) / per_second
+            bucket[0] = level - 1.0
+            return True, int(bucket[0]), (profile.rpm - bucket[0]) / per_second
+
+    def count(self, provider: str, status: int) -> None:
+        with self._lock:
+            counts = self._counts[provider]
+            counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {p: dict(c) for p, c in self._counts.items() if c}
+
+
+# ============================================================
+#  İSTEK / CEVAP BİÇİMLERİ
+# ============================================================
+
+def _route(path: str, body: Dict) -> Tuple[Optional[str], bool]:
+    """
+    Path ve gövdeden (sağlayıcı, akış mı) çıkarır. Tanınmazsa (None, False).
+    """
+    path = path.split("?", 1)[0]
+    if path.endswith("/chat/completions"):
+        provider = "grok" if str(body.get("model", "")).startswith("grok") else "openai"
+        return provider, bool(body.get("stream"))
+    if path.endswith(":generateContent"):
+        return "gemini", False
+    if path.endswith(":streamGenerateContent"):
+        return "gemini", True
+    if path.endswith("/messages"):
+        return "claude", bool(body.get("stream"))
+    return None, False
+
+
+def _prompt_text(provider: str, body: Dict) -> Tuple[str, str]:
+    """
+    (son kullanıcı mesajı, tüm prompt metni) — echo cevabı ve token tahmini için.
+    """
+    if provider == "gemini":
+        texts = [
+            part.get("text", "")
+            for content in body.get("contents") or []
+            for part in content.get("parts") or []
+        ]
+        return (texts[-1] if texts else ""), "\n".join(texts)
+
+    texts: List[str] = []
+    last_user = ""
+    system = body.get("system")
+    if isinstance(system, list):
+        texts.extend(block.get("text", "") for block in system if isinstance(block, dict))
+    elif isinstance(system, str):
+        texts.append(system)
+    for message in body.get("messages") or []:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "\n".join(block.get("text", "") for block in content if isinstance(block, dict))
+        texts.append(content)
+        if message.get("role") == "user":
+            last_user = content
+    return last_user, "\n".join(texts)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _answer_text(provider: str, profile: ProviderProfile, body: Dict, last_user: str) -> str:
+    if profile.response == "echo":
+        model = body.get("model") or provider
+        return f"[{model}] {last_user}"
+    words = profile.canned.split()
+    if not words:
+        return ""
+    repeated = (words * (profile.words // len(words) + 1))[:max(profile.words, 1)]
+    return " ".join(repeated)
+
+
+def _split_chunks(text: str, chunk_words: int) -> List[str]:
+    words = text.split(" ")
+    step = max(1, chunk_words)
+    return [
+        " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+        for i in range(0, len(words), step)
+    ]
+
+
+def _error_body(provider: str, status: int, message: str) -> Dict:
+    if provider == "claude":
+        kind = {429: "rate_limit_error", 529: "overloaded_error", 401: "authentication_error"}.get(status, "api_error")
+        return {"type": "error", "error": {"type": kind, "message": message}}
+    if provider == "gemini":
+        kind = {429: "RESOURCE_EXHAUSTED", 401: "UNAUTHENTICATED", 503: "UNAVAILABLE"}.get(status, "INTERNAL")
+        return {"error": {"code": status, "message": message, "status": kind}}
+    kind = {429: "rate_limit_exceeded", 401: "invalid_api_key"}.get(status)
+    return {"error": {"message": message, "type": "server_error" if status >= 500 else "invalid_request_error",
+                      "code": kind}}
+
+
+def _rate_limit_headers(provider: str, profile: ProviderProfile, remaining: int, reset: float) -> Dict[str, str]:
+    if profile.rpm <= 0:
+        return {}
+    if provider in ("openai", "grok"):
+        return {
+            "x-ratelimit-limit-requests": str(profile.rpm),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset:.3f}s",
+        }
+    if provider == "claude":
+        reset_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + reset))
+        return {
+            "anthropic-ratelimit-requests-limit": str(profile.rpm),
+            "anthropic-ratelimit-requests-remaining": str(remaining),
+            "anthropic-ratelimit-requests-reset": reset_at,
+        }
+    return {}
+
+
+def _full_response(provider: str, model: str, text: str, prompt_tokens: int) -> Dict:
+    output_tokens = _estimate_tokens(text)
+    if provider == "gemini":
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+        }
+    if provider == "claude":
+        return {
+            "id": f"msg_sim_{uuid.uuid4().hex[:20]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": output_tokens},
+        }
+    return {
+        "id": f"chatcmpl-sim-{uuid.uuid4().hex[:20]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+
+
+def _stream_events(provider: str, model: str, body: Dict, chunks: List[str],
+                   prompt_tokens: int) -> Iterator[Tuple[Optional[str], bool, object]]:
+    """
+    (event adı, data, metin parçası mı) üçlüleri. Metin parçaları arasında
+    chunk_delay kadar beklenir.
+    """
+    output_tokens = _estimate_tokens("".join(chunks))
+    if provider == "gemini":
+        produced = ""
+        for chunk in chunks:
+            produced += chunk
+            yield None, True, {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": chunk}]}}],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": _estimate_tokens(produced),
+                    "totalTokenCount": prompt_tokens + _estimate_tokens(produced),
+                },
+            }
+        return
+
+    if provider == "claude":
+        message_id = f"msg_sim_{uuid.uuid4().hex[:20]}"
+        yield "message_start", False, {"type": "message_start", "message": {
+            "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": 1},
+        }}
+        yield "content_block_start", False, {"type": "content_block_start", "index": 0,
+                                             "content_block": {"type": "text", "text": ""}}
+        for chunk in chunks:
+            yield "content_block_delta", True, {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": chunk}}
+        yield "content_block_stop", False, {"type": "content_block_stop", "index": 0}
+        yield "message_delta", False, {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                       "usage": {"output_tokens": output_tokens}}
+        yield "message_stop", False, {"type": "message_stop"}
+        return
+
+    completion_id = f"chatcmpl-sim-{uuid.uuid4().hex[:20]}"
+    created = int(time.time())
+    for i, chunk in enumerate(chunks):
+        delta = {"role": "assistant", "content": chunk} if i == 0 else {"content": chunk}
+        yield None, True, {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+    yield None, False, {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                 "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    if (body.get("stream_options") or {}).get("include_usage"):
+        yield None, False, {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                            "model": model, "choices": [], "usage": {
+                         "prompt_tokens": prompt_tokens, "completion_tokens": output_tokens,
+                         "total_tokens": prompt_tokens + output_tokens,
+                     }}
+    yield None, False, "[DONE]"
+
+
+def _has_credentials(provider: str, headers) -> bool:
+    if provider == "gemini":
+        return bool(headers.get("x-goog-api-key"))
+    if provider == "claude":
+        return bool(headers.get("x-api-key"))
+    return headers.get("authorization", "").startswith("Bearer ") and len(headers["authorization"]) > 7
+
+
+# ============================================================
+#  HTTP SUNUCUSU
+# ============================================================
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ProviderSimulator/1.0"
+    state: SimulatorState  # make_server sınıf özelliği olarak bağlar
+    quiet = True
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    # ---------------- yardımcılar ----------------
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    # ---------------- uç noktalar ----------------
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, "ok")
+        elif self.path == "/stats":
+            self._send_json(200, self.state.stats())
+        else:
+            self._send_json(404, {"error": {"message": f"bilinmeyen yol: {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "gövde JSON değil"}})
+            return
+
+        provider, stream = _route(self.path, body)
+        if provider is None:
+            self._send_json(404, {"error": {"message": f"bilinmeyen yol: {self.path}"}})
+            return
+
+        state = self.state
+        profile = state.profiles[provider]
+
+        if not _has_credentials(provider, self.headers):
+            state.count(provider, 401)
+            self._send_json(401, _error_body(provider, 401, "API anahtarı eksik"))
+            return
+
+        admitted, remaining, reset = state.admit(provider, profile)
+        limit_headers = _rate_limit_headers(provider, profile, remaining, reset)
+        if not admitted or (profile.rate_limit_rate and state.random() < profile.rate_limit_rate):
+            retry_after = max(1, math.ceil(reset)) if not admitted else 1
+            state.count(provider, 429)
+            self._send_json(429, _error_body(provider, 429, "Rate limit aşıldı (simülatör)"),
+                            dict(limit_headers, **{"Retry-After": str(retry_after)}))
+            return
+
+        latency = state.latency(profile)
+        if profile.error_rate and state.random() < profile.error_rate:
+            time.sleep(latency)
+            status = state.choice(_ERROR_STATUSES[provider])
+            state.count(provider, status)
+            self._send_json(status, _error_body(provider, status, "Simüle edilmiş sunucu hatası"), limit_headers)
+            return
+
+        last_user, prompt = _prompt_text(provider, body)
+        model = body.get("model") or self.path.rsplit("/", 1)[-1].split(":")[0]
+        text = _answer_text(provider, profile, body, last_user)
+        chunks = _split_chunks(text, profile.chunk_words)
+        prompt_tokens = _estimate_tokens(prompt)
+        state.count(provider, 200)
+
+        if not stream:
+            time.sleep(latency + state.chunk_delay(profile) * max(0, len(chunks) - 1))
+            self._send_json(200, _full_response(provider, model, text, prompt_tokens), limit_headers)
+            return
+
+        time.sleep(latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in limit_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        drop_at = -1
+        if profile.drop_rate and state.random() < profile.drop_rate:
+            drop_at = int(state.random() * max(1, len(chunks)))
+
+        text_sent = 0
+        for event, is_text, data in _stream_events(provider, model, body, chunks, prompt_tokens):
+            if is_text:
+                if text_sent == drop_at:
+                    # Akış yarıda kopar: bağlantı son parça (0-chunk) gönderilmeden kapanır
+                    self.close_connection = True
+                    return
+                if text_sent:
+                    time.sleep(state.chunk_delay(profile))
+                text_sent += 1
+            payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+            frame = (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
+            self._write_chunk(frame.encode("utf-8"))
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8089,
+                profiles: Optional[Dict[str, ProviderProfile]] = None,
+                seed: Optional[int] = None, quiet: bool = True) -> ThreadingHTTPServer:
+    """
+    Simülatör sunucusunu oluşturur (başlatmaz). Testlerde port=0 ile boş bir port alınır:
+        server = make_server(port=0); threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+    """
+    if profiles is None:
+        profiles = {provider: ProviderProfile() for provider in PROVIDERS}
+    state = SimulatorState(profiles, seed)
+    handler = type("BoundSimulatorHandler", (SimulatorHandler,), {"state": state, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _build_profiles(args) -> Dict[str, ProviderProfile]:
+    base = ProviderProfile(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_spread=args.latency_spread,
+        chunk_delay_ms=args.chunk_delay_ms,
+        chunk_words=args.chunk_words,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm,
+        drop_rate=args.drop_rate,
+        response=args.response,
+        canned=args.canned if args.canned is not None else _LOREM,
+        words=args.words,
+    )
+    overrides: Dict[str, Dict] = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(PROVIDERS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen sağlayıcı: {', '.join(sorted(unknown))}")
+    return {provider: base.with_overrides(overrides.get(provider, {})) for provider in PROVIDERS}
+
+
+def main() -> int:
+    defaults = ProviderProfile.FIELDS
+    parser = argparse.ArgumentParser(description="OpenAI / Gemini / xAI / Anthropic yerel simülatörü")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=defaults["latency_ms"])
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default=defaults["latency_dist"])
+    parser.add_argument("--latency-spread", type=float, default=defaults["latency_spread"])
+    parser.add_argument("--chunk-delay-ms", type=float, default=defaults["chunk_delay_ms"])
+    parser.add_argument("--chunk-words", type=int, default=defaults["chunk_words"])
+    parser.add_argument("--error-rate", type=float, default=defaults["error_rate"])
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults["rate_limit_rate"])
+    parser.add_argument("--rpm", type=int, default=defaults["rpm"])
+    parser.add_argument("--drop-rate", type=float, default=defaults["drop_rate"])
+    parser.add_argument("--response", choices=("echo", "canned"), default=defaults["response"])
+    parser.add_argument("--canned", default=None, help="sabit cevap metni; @dosya ile dosyadan okunur")
+    parser.add_argument("--words", type=int, default=defaults["words"])
+    parser.add_argument("--config", default=None, help="sağlayıcı başına ayarlar (JSON)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-v", "--verbose", action="store_true", help="her isteği logla")
+    args = parser.parse_args()
+
+    if args.canned and args.canned.startswith("@"):
+        with open(args.canned[1:], "r", encoding="utf-8") as f:
+            args.canned = f.read()
+
+    try:
+        profiles = _build_profiles(args)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    server = make_server(args.host, args.port, profiles, args.seed, quiet=not args.verbose)
+    print(f"Sağlayıcı simülatörü: http://{args.host}:{server.server_port}")
+    print(f"  PROVIDER_SIM_URL=http://{args.host}:{server.server_port} ile kullan. Durdurmak için Ctrl+C.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\nİstek sayıları:", json.dumps(server.RequestHandlerClass.state.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+# qa_segments.py
+#
+# Q/A hafızasının segmentli saklanması.
+#
+#   qa_memory.jsonl              : aktif segment; yeni kayıtlar buraya eklenir (memory_writer)
+#   qa_memory.segments/seg-N.qaz : mühürlenmiş, sıkıştırılmış ve değişmeyen segmentler
+#
+# Aktif dosya QA_MEMORY_SEGMENT_BYTES'ı aşınca mühürlenir: kayıtları yeni bir .qaz
+# segmentine yazılır ve aktif dosya boşaltılır. Yeni mühürlenmiş segment sayısı
+# QA_MEMORY_COMPACT_SEGMENTS'a ulaşınca tüm segmentler sıkıştırılır (compaction):
+# aynı soru (kelimeleri aynı) birden fazla kez geçiyorsa sadece en yeni cevabı kalır.
+#
+# .qaz biçimi: [zlib blok]...[zlib JSON blok indeksi][uint32 indeks uzunluğu]["QAZ1"]
+# Her blok ~QA_MEMORY_BLOCK_BYTES'lık JSONL satırıdır; tek bir kaydı okumak için sadece
+# onun bloğu açılır.
+#
+#   python qa_segments.py stats
+#   python qa_segments.py compact      # aktif dosyayı mühürleyip hemen sıkıştırır
+
+import argparse
+import bisect
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import (
+    DEBUG,
+    QA_MEMORY_BLOCK_BYTES,
+    QA_MEMORY_COMPACT_SEGMENTS,
+    QA_MEMORY_COMPRESS_LEVEL,
+    QA_MEMORY_SEGMENT_BYTES,
+    QA_MEMORY_SEGMENT_DIR,
+)
+from memory_writer import FileLock
+from text_search import tokenize
+
+_MAGIC = b"QAZ1"
+_TRAILER = struct.Struct("<I4s")
+_SEGMENT_RE = re.compile(r"^seg-(\d{6,})\.qaz$")
+
+# Sıkıştırmada oluşan segmentler level=1, aktif dosyadan mühürlenenler level=0
+LEVEL_SEALED = 0
+LEVEL_COMPACTED = 1
+
+
+def segment_path(segment_dir: str, segment: int) -> str:
+    return os.path.join(segment_dir, f"seg-{segment:06d}.qaz")
+
+
+def list_segments(segment_dir: Optional[str]) -> List[int]:
+    if not segment_dir or not os.path.isdir(segment_dir):
+        return []
+    numbers = []
+    for name in os.listdir(segment_dir):
+        match = _SEGMENT_RE.match(name)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+
+def question_key(question: str) -> str:
+    """
+    Tekrar eden soruları bulmak için: büyük/küçük harf, boşluk ve noktalama farkı yok sayılır.
+    """
+    return " ".join(tokenize(question)) or question.strip()
+
+
+# ============================================================
+#  SEGMENT YAZMA / OKUMA
+# ============================================================
+
+def write_segment(path: str, lines: List[bytes], level: int,
+                  block_bytes: int = QA_MEMORY_BLOCK_BYTES,
+                  compress_level: int = QA_MEMORY_COMPRESS_LEVEL) -> int:
+    """
+    JSONL satırlarını (her biri \\n ile biten) bloklara bölüp sıkıştırarak yazar.
+    Geçici dosyaya yazılıp fsync'lenir, sonra yerine konur. Yazılan bayt sayısını döndürür.
+    """
+    blocks = []  # [dosya offset'i, sıkıştırılmış uzunluk, ilk kayıt no, kayıt sayısı]
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        start = 0
+        while start < len(lines):
+            end = start
+            size = 0
+            while end < len(lines) and (end == start or size + len(lines[end]) <= block_bytes):
+                size += len(lines[end])
+                end += 1
+            data = zlib.compress(b"".join(lines[start:end]), compress_level)
+            blocks.append([f.tell(), len(data), start, end - start])
+            f.write(data)
+            start = end
+        index = zlib.compress(json.dumps({
+            "version": 1,
+            "level": level,
+            "records": len(lines),
+            "raw_bytes": sum(len(line) for line in lines),
+            "created": time.time(),
+            "blocks": blocks,
+        }).encode("utf-8"))
+        f.write(index)
+        f.write(_TRAILER.pack(len(index), _MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+        written = f.tell()
+    os.replace(tmp_path, path)
+    return written
+
+
+class SegmentReader:
+    """
+    Tek bir .qaz segmentinden rastgele (kayıt numarasıyla) ya da sırayla okuma.
+    Segmentler değişmez; okuyucular dosya yolu başına önbelleklenir.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            f.seek(-_TRAILER.size, os.SEEK_END)
+            index_len, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"Geçersiz Q/A segmenti: {path}")
+            f.seek(-_TRAILER.size - index_len, os.SEEK_END)
+            index = json.loads(zlib.decompress(f.read(index_len)))
+        self.level = index.get("level", LEVEL_SEALED)
+        self.records = index["records"]
+        self.raw_bytes = index.get("raw_bytes", 0)
+        self.blocks = index["blocks"]
+        self._firsts = [block[2] for block in self.blocks]
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, List[bytes]]" = OrderedDict()
+
+    def _block_lines(self, block_no: int) -> List[bytes]:
+        with self._lock:
+            lines = self._cache.get(block_no)
+            if lines is not None:
+                self._cache.move_to_end(block_no)
+                return lines
+        offset, length, _first, _count = self.blocks[block_no]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            lines = zlib.decompress(f.read(length)).split(b"\n")
+        with self._lock:
+            self._cache[block_no] = lines
+            if len(self._cache) > 8:
+                self._cache.popitem(last=False)
+        return lines
+
+    def read(self, record: int) -> Dict:
+        if not 0 <= record < self.records:
+            raise IndexError(f"{self.path}: kayıt {record} yok")
+        block_no = bisect.bisect_right(self._firsts, record) - 1
+        return json.loads(self._block_lines(block_no)[record - self._firsts[block_no]])
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict]]:
+        for block_no, (_offset, _length, first, count) in enumerate(self.blocks):
+            lines = self._block_lines(block_no)
+            for i in range(count):
+                yield first + i, json.loads(lines[i])
+
+
+_readers: Dict[str, SegmentReader] = {}
+_readers_lock = threading.Lock()
+
+
+def get_segment_reader(segment_dir: str, segment: int) -> SegmentReader:
+    path = segment_path(segment_dir, segment)
+    with _readers_lock:
+        reader = _readers.get(path)
+    if reader is None:
+        reader = SegmentReader(path)
+        with _readers_lock:
+            _readers[path] = reader
+    return reader
+
+
+def _forget_reader(segment_dir: str, segment: int) -> None:
+    with _readers_lock:
+        _readers.pop(segment_path(segment_dir, segment), None)
+
+
+def read_record(segment_dir: str, segment: int, record: int) -> Dict:
+    return get_segment_reader(segment_dir, segment).read(record)
+
+
+def iter_segment_records(segment_dir: Optional[str]) -> Iterator[Tuple[int, int, Dict]]:
+    """
+    Tüm mühürlü segmentlerin kayıtları, eskiden yeniye: (segment no, kayıt no, kayıt).
+    """
+    for segment in list_segments(segment_dir):
+        for record, obj in get_segment_reader(segment_dir, segment):
+            yield segment, record, obj
+
+
+# ============================================================
+#  MÜHÜRLEME / SIKIŞTIRMA
+# ============================================================
+
+class SegmentedLog:
+    """
+    Aktif JSONL + mühürlü segmentler. Mühürleme ve sıkıştırma, yazıcılarla aynı dosya
+    kilidi (memory_writer.FileLock) altında yapılır; birden fazla süreç aynı hafızayı
+    paylaşsa da aynı anda tek süreç segmentlere dokunur.
+
+    index: memory_index.MemoryIndex; segment kayıtlarının yeri değiştikçe güncellenir.
+    """
+
+    def __init__(self, jsonl_path: str, segment_dir: str = QA_MEMORY_SEGMENT_DIR, index=None,
+                 segment_bytes: int = QA_MEMORY_SEGMENT_BYTES,
+                 compact_segments: int = QA_MEMORY_COMPACT_SEGMENTS):
+        self.jsonl_path = jsonl_path
+        self.segment_dir = segment_dir
+        self.index = index
+        self.segment_bytes = segment_bytes
+        self.compact_segments = compact_segments
+
+    def maintain(self) -> None:
+        """
+        Gerekiyorsa mühürler ve sıkıştırır. Yazıcı her partiden sonra çağırır; çoğu
+        çağrıda sadece bir stat maliyeti vardır.
+        """
+        try:
+            size = os.path.getsize(self.jsonl_path)
+        except OSError:
+            return
+        if size < self.segment_bytes:
+            return
+        with self._locked() as fd:
+            if self._seal(fd) and self._fresh_segments() >= self.compact_segments:
+                self._compact(fd)
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Aktif dosyayı mühürler ve tüm segmentleri hemen sıkıştırır.
+        """
+        with self._locked() as fd:
+            self._seal(fd)
+            return self._compact(fd)
+
+    # ---------------- iç işler ----------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[int]:
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fd = os.open(self.jsonl_path, flags, 0o644)
+        lock = FileLock(fd, self.jsonl_path)
+        try:
+            with lock:
+                yield fd
+        finally:
+            lock.close()
+            os.close(fd)
+
+    def _next_segment(self) -> int:
+        segments = list_segments(self.segment_dir)
+        return segments[-1] + 1 if segments else 1
+
+    def _fresh_segments(self) -> int:
+        return sum(
+            1 for segment in list_segments(self.segment_dir)
+            if get_segment_reader(self.segment_dir, segment).level == LEVEL_SEALED
+        )
+
+    def _seal(self, fd: int) -> bool:
+        """
+        Aktif dosyanın tamamlanmış satırlarını yeni bir segmente taşır. Kilit altında çağrılır.
+        Sıra: segment yazılır -> aktif dosya kısaltılır -> indeks güncellenir. Kesintide
+        indeks aktif dosyadan büyük bir offset görür ve kendini segmentlerden yeniden kurar.
+        """
+        if self.index is not None:
+            # Mühürlenecek satırların hepsi indekste olsun ki yerleri taşınabilsin
+            self.index.sync()
+        with open(self.jsonl_path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return False
+
+        lines: List[bytes] = []
+        moves: List[Tuple[int, int]] = []  # (aktif dosyadaki offset, segmentteki kayıt no)
+        offset = 0
+        for raw in data[:end].splitlines(keepends=True):
+            try:
+                obj = json.loads(raw)
+            except json.JSONDecodeError:
+                obj = None
+            if isinstance(obj, dict):
+                moves.append((offset, len(lines)))
+                lines.append(raw if raw.endswith(b"\n") else raw + b"\n")
+            offset += len(raw)
+
+        segment = self._next_segment()
+        if lines:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            write_segment(segment_path(self.segment_dir, segment), lines, LEVEL_SEALED)
+
+        # Kilit altındayken son satırdan sonra yazılmış yarım veri olamaz; yine de korunur
+        rest = data[end:]
+        os.ftruncate(fd, 0)
+        if rest:
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, rest)
+        os.fsync(fd)
+
+        if self.index is not None:
+            self.index.move_active(segment, moves)
+        if DEBUG:
+            print(f"[QA_MEMORY] Aktif hafıza mühürlendi: segment {segment}, {len(lines)} kayıt.")
+        return bool(lines)
+
+    def _compact(self, fd: int) -> Dict[str, int]:
+        old_segments = list_segments(self.segment_dir)
+        latest: "OrderedDict[str, bytes]" = OrderedDict()
+        before = 0
+        for segment in old_segments:
+            for _record, obj in get_segment_reader(self.segment_dir, segment):
+                before += 1
+                key = question_key(obj.get("q", ""))
+                # Aynı soru tekrar geldiyse eskisi çıkar, en yeni cevap en yeni konumda kalır
+                latest.pop(key, None)
+                latest[key] = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+        lines = list(latest.values())
+        new_segments: List[int] = []
+        segment = self._next_segment()
+        start = 0
+        os.makedirs(self.segment_dir, exist_ok=True)
+        while start < len(lines):
+            end = start
+            size = 0
+            while end < len(lines) and (end == start or size + len(lines[end]) <= self.segment_bytes):
+                size += len(lines[end])
+                end += 1
+            write_segment(segment_path(self.segment_dir, segment), lines[start:end], LEVEL_COMPACTED)
+            new_segments.append(segment)
+            segment += 1
+            start = end
+
+        # Önce indeks yeni segmentlere geçer, eski segmentler ondan sonra silinir:
+        # arada okuyan süreçler eski indeksle eski dosyaları bulmaya devam eder
+        if self.index is not None:
+            self.index.rebuild(new_segments)
+        for segment in old_segments:
+            _forget_reader(self.segment_dir, segment)
+            try:
+                os.remove(segment_path(self.segment_dir, segment))
+            except OSError:
+                pass
+
+        result = {"records_before": before, "records_after": len(lines),
+                  "segments_before": len(old_segments), "segments_after": len(new_segments)}
+        if DEBUG:
+            print("[QA_MEMORY] Hafıza sıkıştırıldı:", result)
+        return result
+
+
+def segment_stats(segment_dir: str = QA_MEMORY_SEGMENT_DIR) -> Dict[str, int]:
+    stats = {"segments": 0, "records": 0, "raw_bytes": 0, "disk_bytes": 0, "compacted_segments": 0}
+    for segment in list_segments(segment_dir):
+        reader = get_segment_reader(segment_dir, segment)
+        stats["segments"] += 1
+        stats["records"] += reader.records
+        stats["raw_bytes"] += reader.raw_bytes
+        stats["disk_bytes"] += os.path.getsize(reader.path)
+        stats["compacted_segments"] += reader.level == LEVEL_COMPACTED
+    return stats
+
+
+def main() -> int:
+    from multi_agent import QA_MEMORY_PATH, get_segmented_log
+
+    parser = argparse.ArgumentParser(description="Q/A hafıza segmentleri")
+    parser.add_argument("command", choices=("stats", "compact"))
+    args = parser.parse_args()
+
+    log = get_segmented_log()
+    if args.command == "compact":
+        print(json.dumps(log.compact()))
+    active = os.path.getsize(QA_MEMORY_PATH) if os.path.exists(QA_MEMORY_PATH) else 0
+    stats = segment_stats(log.segment_dir)
+    stats["active_bytes"] = active
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
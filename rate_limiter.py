@@ -0,0 +1,204 @@
+# rate_limiter.py
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from config import DEBUG, RATE_LIMIT_ENABLED, RATE_LIMITS
+
+
+class _Bucket:
+    """
+    Dakikalık sınır için token kovası: kapasite = sınır, dolum hızı = sınır / 60 sn.
+    capacity 0 ise sınırsızdır.
+    """
+
+    __slots__ = ("capacity", "level", "rate", "updated")
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.capacity:
+            return 0.0
+        # Kapasiteden büyük istek sonsuza dek beklemesin: en fazla dolu kova kadar istenir
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+    def sync(self, limit: Optional[int], remaining: Optional[int]) -> None:
+        """
+        Sunucunun bildirdiği sınır ve kalan miktar. Kalan, yerel tahminden azsa ona inilir;
+        fazlaysa yerel değer korunur (henüz sunucuya ulaşmamış istekler yerelde düşülmüş olabilir).
+        """
+        if limit:
+            if limit != self.capacity:
+                self.level = min(self.level, float(limit)) if self.capacity else float(limit)
+            self.capacity = float(limit)
+            self.rate = limit / 60.0
+        if remaining is not None and self.capacity:
+            self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """
+    Sağlayıcı başına istek (RPM) ve token (TPM) kovaları.
+    acquire() sırayla (FIFO) bekletir: kuyruğun başındaki istek geçmeden arkadakiler geçmez,
+    böylece büyük istekler küçüklerin arkasında aç kalmaz.
+    Sınırlar cevap başlıklarından (observe) güncellenir; 429 gelirse Retry-After süresince
+    tüm kuyruk durdurulur (penalize).
+    """
+
+    def __init__(self, provider: str, rpm: int = 0, tpm: int = 0):
+        self.provider = provider
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._queue: Deque[object] = deque()
+        self.waited = 0.0
+        self.throttled = 0
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(
+            self.blocked_until - now,
+            self.requests.wait_time(1),
+            self.tokens.wait_time(tokens),
+        )
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Sıra gelene ve kovalarda yer açılana kadar bekler; beklenen süreyi döndürür.
+        """
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._queue[0] is ticket:
+                        timeout = self._wait_time(tokens, time.monotonic())
+                        if timeout <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            break
+                    self._cond.wait(timeout)
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                self.waited += waited
+                self.throttled += 1
+        return waited
+
+    def observe(self, headers: Dict[str, str]) -> None:
+        limits = parse_rate_limit_headers(headers)
+        if not limits:
+            return
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            self.requests.sync(*limits.get("requests", (None, None)))
+            self.tokens.sync(*limits.get("tokens", (None, None)))
+            self._cond.notify_all()
+
+    def penalize(self, seconds: float) -> None:
+        with self._cond:
+            until = time.monotonic() + seconds
+            if until > self.blocked_until:
+                self.blocked_until = until
+                if DEBUG:
+                    print(f"[RATE] {self.provider}: 429 alındı, kuyruk {seconds:.1f} sn durduruldu.")
+
+    def describe(self) -> Dict[str, object]:
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "rpm": int(self.requests.capacity),
+                "tpm": int(self.tokens.capacity),
+                "requests_left": int(self.requests.level),
+                "tokens_left": int(self.tokens.level),
+                "queued": len(self._queue),
+                "throttled": self.throttled,
+                "waited_s": round(self.waited, 2),
+            }
+
+
+# ============================================================
+#  CEVAP BAŞLIKLARI
+# ============================================================
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def parse_rate_limit_headers(headers: Dict[str, str]) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+    """
+    OpenAI / xAI (x-ratelimit-*) ve Anthropic (anthropic-ratelimit-*) başlıklarından
+    {"requests": (limit, kalan), "tokens": (limit, kalan)}. Başlık küçük harfli beklenir.
+    Gemini bu başlıkları göndermez; onun için config.RATE_LIMITS kullanılır.
+    """
+    result: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+    for kind in ("requests", "tokens"):
+        limit = _parse_int(headers.get(f"x-ratelimit-limit-{kind}"))
+        remaining = _parse_int(headers.get(f"x-ratelimit-remaining-{kind}"))
+        if limit is None and remaining is None:
+            limit = _parse_int(headers.get(f"anthropic-ratelimit-{kind}-limit"))
+            remaining = _parse_int(headers.get(f"anthropic-ratelimit-{kind}-remaining"))
+        if kind == "tokens" and limit is None and remaining is None:
+            # Anthropic bazı hesaplarda sadece girdi token sınırını bildirir
+            limit = _parse_int(headers.get("anthropic-ratelimit-input-tokens-limit"))
+            remaining = _parse_int(headers.get("anthropic-ratelimit-input-tokens-remaining"))
+        if limit is not None or remaining is not None:
+            result[kind] = (limit, remaining)
+    return result
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> Optional[RateLimiter]:
+    """
+    Sağlayıcının sınırlayıcısı; RATE_LIMIT_ENABLED kapalıysa None.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limits = RATE_LIMITS.get(provider, {})
+            limiter = _limiters[provider] = RateLimiter(provider, limits.get("rpm", 0), limits.get("tpm", 0))
+        return limiter
+
+
+def get_rate_limiter_states() -> Dict[str, Dict[str, object]]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.provider: limiter.describe() for limiter in limiters}
@@ -0,0 +1,312 @@
+# resilience.py
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from config import (
+    DEBUG,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    RETRY_STATUS_CODES,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_COOLDOWN,
+    RATE_LIMIT_OUTPUT_TOKENS,
+    RATE_LIMIT_RETRY_AFTER,
+)
+from http_transport import HTTPStatusError, get_transport
+from rate_limiter import get_rate_limiter
+from tracing import span
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """
+    Sağlayıcının devre kesicisi açıkken (soğuma süresinde) yapılan çağrıda fırlatılır.
+    """
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(
+            f"{provider} art arda başarısız olduğu için geçici olarak devre dışı "
+            f"(devre kesici açık, ~{retry_in:.0f} sn sonra tekrar denenecek)"
+        )
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+# ============================================================
+#  DEVRE KESİCİ
+# ============================================================
+
+class CircuitBreaker:
+    """
+    Sağlayıcı başına devre kesici.
+      closed    : normal çalışma, art arda hata sayılır
+      open      : failure_threshold hataya ulaşıldı; cooldown boyunca çağrı yapılmaz
+      half-open : cooldown doldu; tek bir deneme çağrısına izin verilir,
+                  başarılıysa kapanır, başarısızsa tekrar açılır
+    """
+
+    def __init__(self, provider: str,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = CIRCUIT_COOLDOWN):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """
+        Çağrı yapılabilir mi; yapılamıyorsa CircuitOpenError fırlatır.
+        True dönerse bu çağrı yarı açık devrenin tek deneme (probe) çağrısıdır.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(now)
+            if state == "closed":
+                return False
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            retry_in = max(0.0, self.opened_at + self.cooldown - now)
+        raise CircuitOpenError(self.provider, retry_in)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if DEBUG and self.opened_at is None:
+                    print(f"[RETRY] {self.provider}: devre kesici açıldı ({self.failures} art arda hata).")
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def cancel_probe(self) -> None:
+        """
+        Deneme çağrısı sonuçlanmadan kesildi (ör. KeyboardInterrupt); sonraki çağrı
+        yeniden deneme hakkı alır. Devrenin durumu değişmez.
+        """
+        with self._lock:
+            self._probing = False
+
+    def describe(self) -> Dict[str, object]:
+        with self._lock:
+            return {"state": self._state(time.monotonic()), "failures": self.failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker(provider)
+        return breaker
+
+
+def get_breaker_states() -> Dict[str, Dict[str, object]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.provider: breaker.describe() for breaker in breakers}
+
+
+# ============================================================
+#  SAĞLAYICI BAŞINA EŞZAMANLILIK SINIRI
+# ============================================================
+
+_limits: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def set_concurrency_limit(provider: str, limit: Optional[int]) -> None:
+    """
+    Sağlayıcıya aynı anda en fazla `limit` istek gider (None / 0: sınırsız).
+    Sınır her denemeyi kapsar; tekrar öncesi beklemelerde yer tutulmaz.
+    Akış isteklerinde yer cevap başlıkları gelene kadar tutulur.
+    """
+    if limit:
+        _limits[provider] = threading.BoundedSemaphore(limit)
+    else:
+        _limits.pop(provider, None)
+
+
+# ============================================================
+#  TEKRAR DENEME
+# ============================================================
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After başlığı: saniye ("12") ya da HTTP tarihi. Anlaşılamazsa None.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, HTTPStatusError):
+        return error.code in RETRY_STATUS_CODES
+    # Bağlantı kurulamadı / koptu / zaman aşımı: ConnectionError ve
+    # TimeoutError (socket.timeout) OSError alt sınıflarıdır
+    return isinstance(error, OSError)
+
+
+def _retry_delay(error: BaseException, retry: int) -> float:
+    """
+    n. tekrar öncesi beklenecek süre: Retry-After varsa o, yoksa
+    [0, BASE * 2^n] aralığında rastgele (full jitter).
+    """
+    if isinstance(error, HTTPStatusError):
+        retry_after = parse_retry_after(error.headers.get("retry-after"))
+        if retry_after is not None:
+            return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0.0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** retry)))
+
+
+def estimate_request_tokens(prompt_tokens: int) -> int:
+    """
+    Rate limit kovasından peşin düşülecek token: prompt + tahmini çıktı. prompt_tokens'ı
+    çağıran mesajlardan token_counter ile (sağlayıcı profiline göre) hesaplar; JSON
+    gövdesinin bayt boyu ASCII kaçışları (\\uXXXX) yüzünden Türkçe metni birkaç kat fazla sayar.
+    """
+    return prompt_tokens + RATE_LIMIT_OUTPUT_TOKENS
+
+
+def _observe_rate_limits(provider: str, headers: Dict[str, str]) -> None:
+    limiter = get_rate_limiter(provider)
+    if limiter is not None:
+        limiter.observe(headers)
+
+
+def call_with_retry(
+    provider: str,
+    fn: Callable[[], T],
+    attempts: int = RETRY_ATTEMPTS,
+    sleep: Callable[[float], None] = time.sleep,
+    tokens: int = 0,
+) -> T:
+    """
+    fn()'i sağlayıcının devre kesicisi arkasında çalıştırır; geçici hatalarda
+    (429 / 5xx / bağlantı / zaman aşımı) bekleyip en fazla `attempts` kez tekrar dener.
+    Tüm denemeler başarısız olursa son hata fırlatılır ve devre kesiciye bir hata yazılır.
+    Her deneme önce sağlayıcının rate limit kuyruğunda (tokens kadar) sırasını bekler.
+    """
+    breaker = get_breaker(provider)
+    probe = breaker.before_call()
+    finished = False
+    try:
+        limiter = get_rate_limiter(provider)
+
+        retry = 0
+        while True:
+            slot = _limits.get(provider)
+            try:
+                if limiter is not None:
+                    with span("rate_limit_wait", provider, tokens=tokens):
+                        limiter.acquire(tokens)
+                if slot is not None:
+                    with span("provider_wait", provider):
+                        slot.acquire()
+                try:
+                    with span("http", provider, attempt=retry + 1):
+                        result = fn()
+                finally:
+                    if slot is not None:
+                        slot.release()
+            except Exception as e:
+                if isinstance(e, HTTPStatusError) and limiter is not None:
+                    limiter.observe(e.headers)
+                    if e.code == 429:
+                        # Aynı sağlayıcıyı bekleyen tüm istekler de dursun (tekrar fırtınası olmasın)
+                        retry_after = parse_retry_after(e.headers.get("retry-after"))
+                        limiter.penalize(RATE_LIMIT_RETRY_AFTER if retry_after is None else retry_after)
+                if retry < attempts and _is_retryable(e):
+                    delay = _retry_delay(e, retry)
+                    if DEBUG:
+                        print(f"[RETRY] {provider}: {e} -> {delay:.1f} sn sonra tekrar ({retry + 1}/{attempts})")
+                    sleep(delay)
+                    retry += 1
+                    continue
+                finished = True
+                # 4xx (429 hariç): sunucu ayakta, hata isteğin kendisinde; devre kesiciyi açmaz
+                if isinstance(e, HTTPStatusError) and e.code < 500 and e.code != 429:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+                raise
+            finished = True
+            breaker.record_success()
+            return result
+    finally:
+        if probe and not finished:
+            # Deneme çağrısı sonuç yazılmadan kesildiyse devre yeni denemeye kapalı kalmasın
+            breaker.cancel_probe()
+
+
+def resilient_post(provider: str, url: str, data: bytes, headers: Dict[str, str], prompt_tokens: int) -> str:
+    """
+    get_transport().post() + rate limit kuyruğu + tekrar deneme + devre kesici.
+    """
+    def send():
+        resp = get_transport().request("POST", url, body=data, headers=headers)
+        text = resp.text()
+        if resp.status >= 400:
+            raise HTTPStatusError(resp.status, resp.reason, resp.headers, text)
+        _observe_rate_limits(provider, resp.headers)
+        return text
+
+    return call_with_retry(provider, send, tokens=estimate_request_tokens(prompt_tokens))
+
+
+def resilient_request(provider: str, method: str, url: str, data: bytes, headers: Dict[str, str],
+                      prompt_tokens: int):
+    """
+    Akış istekleri için: cevap başlıkları gelene kadarki kısım tekrar denenir,
+    4xx/5xx gövdesiyle HTTPStatusError'a çevrilir. Dönen cevabın gövdesi henüz okunmamıştır;
+    akış başladıktan sonraki kopmalar tekrar denenmez.
+    """
+    def send():
+        resp = get_transport().request(method, url, body=data, headers=headers)
+        if resp.status >= 400:
+            raise HTTPStatusError(resp.status, resp.reason, resp.headers, resp.text())
+        _observe_rate_limits(provider, resp.headers)
+        return resp
+
+    return call_with_retry(provider, send, tokens=estimate_request_tokens(prompt_tokens))
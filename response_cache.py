@@ -0,0 +1,244 @@
+# response_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config import (
+    DEBUG,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_DIR,
+    RESPONSE_CACHE_DISK_MAX_BYTES,
+)
+
+
+def _normalize_content(text: str) -> str:
+    # Satır sonu farkları ve satır sonundaki boşluklar anlamı değiştirmez
+    text = text.replace("\r\n", "\n").strip()
+    return "\n".join(line.rstrip() for line in text.split("\n"))
+
+
+def make_cache_key(provider: str, model: str, messages: List[Dict[str, str]], params: Dict) -> str:
+    """
+    (sağlayıcı, model, normalize edilmiş mesajlar, parametreler) için SHA-256 anahtarı.
+    """
+    normalized = [
+        {"role": m.get("role", "user"), "content": _normalize_content(m.get("content", ""))}
+        for m in messages
+    ]
+    canonical = json.dumps(
+        {"provider": provider, "model": model, "messages": normalized, "params": params},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Sağlayıcı cevapları için iki katmanlı önbellek.
+      - Bellek: LRU (en fazla max_entries kayıt / max_bytes bayt)
+      - Disk (opsiyonel): disk_dir altında anahtar başına bir JSON dosyası,
+        toplam boyut disk_max_bytes'ı aşınca en eski dosyalar silinir.
+    Her iki katmanda da ttl saniyeden eski kayıtlar geçersizdir.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        ttl: float = RESPONSE_CACHE_TTL,
+        disk_dir: Optional[str] = RESPONSE_CACHE_DIR,
+        disk_max_bytes: int = RESPONSE_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        # anahtar -> (oluşturulma zamanı, değer, bayt)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "puts": 0,
+            "evictions": 0,
+            "expired": 0,
+            "disk_evictions": 0,
+        }
+
+    # ---------------- bellek katmanı ----------------
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                created, value, size = item
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                self._drop(key)
+                self._counters["expired"] += 1
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._insert(key, value, now)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._counters["puts"] += 1
+            self._insert(key, value, now)
+        self._disk_put(key, value, now)
+
+    def _insert(self, key: str, value: str, created: float) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._memory:
+            self._drop(key)
+        self._memory[key] = (created, value, size)
+        self._memory_bytes += size
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop(oldest)
+            self._counters["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._memory.pop(key)
+        self._memory_bytes -= size
+
+    # ---------------- disk katmanı ----------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                obj = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - obj.get("created", 0) > self.ttl:
+            self._disk_remove(path)
+            with self._lock:
+                self._counters["expired"] += 1
+            return None
+        try:
+            # Okunan dosya LRU sıralamasında öne geçsin
+            os.utime(path)
+        except OSError:
+            pass
+        return obj.get("value")
+
+    def _disk_put(self, key: str, value: str, now: float) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        data = json.dumps({"created": now, "value": value}, ensure_ascii=False).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            # Aynı anahtarın eski dosyası değiştiriliyorsa boyutu toplamdan düşülür
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if DEBUG:
+                print("[CACHE] Disk önbelleğine yazılamadı:", e)
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += len(data) - old_size
+            if self._disk_bytes > self.disk_max_bytes:
+                self._disk_evict()
+
+    def _disk_files(self):
+        for root, _dirs, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, path
+
+    def _disk_evict(self) -> None:
+        """
+        En eski (en uzun süredir okunmamış) dosyaları hedefin %90'ına inene kadar siler.
+        """
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        for _, size, path in files:
+            if total <= target:
+                break
+            if self._disk_remove(path):
+                total -= size
+                self._counters["disk_evictions"] += 1
+        self._disk_bytes = total
+
+    @staticmethod
+    def _disk_remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    # ---------------- metrikler ----------------
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            return stats
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Paylaşılan önbelleği döndürür; RESPONSE_CACHE_ENABLED=False ise None.
+    """
+    global _cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,382 @@
+# session_store.py
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from config import (
+    DEBUG,
+    SESSION_DIR,
+    SESSION_MAX_IN_MEMORY,
+    SESSION_MAX_MEMORY_BYTES,
+    SESSION_MAX_STORED,
+    SESSION_RETENTION,
+)
+from multi_agent import Orchestrator
+
+_SNAPSHOT_VERSION = 1
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_SNAPSHOT_SUFFIX = ".json.gz"
+
+
+class SessionLimitError(RuntimeError):
+    """Diskteki oturum sayısı SESSION_MAX_STORED'a ulaştı; yeni oturum açılamaz."""
+
+
+class StoredSession:
+    """
+    Depodaki bir oturum.
+      orchestrator : geçmiş, doküman bağlamı ve özet burada
+      meta         : snapshot'a yazılan küçük ek bilgiler (ör. doküman yolu, ilk tur mu)
+      runtime      : diske yazılmayan nesneler (ör. parça indeksi); oturum bellekten
+                     atılırken close() metodu olanlar kapatılır
+    """
+
+    def __init__(self, session_id: str, orchestrator: Orchestrator, meta: Optional[Dict] = None):
+        self.session_id = session_id
+        self.orchestrator = orchestrator
+        self.meta: Dict = dict(meta or {})
+        self.runtime: Dict[str, object] = {}
+        self.size = 0
+        self.in_use = 0
+        self.deleted = False
+        self.last_used = time.monotonic()
+
+    def snapshot(self) -> bytes:
+        state = self.orchestrator.export_state()
+        state.update(
+            version=_SNAPSHOT_VERSION,
+            session_id=self.session_id,
+            meta=self.meta,
+            saved_at=time.time(),
+        )
+        return json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def close(self) -> None:
+        for value in self.runtime.values():
+            close = getattr(value, "close", None)
+            if callable(close):
+                close()
+        self.runtime.clear()
+
+
+class SessionStore:
+    """
+    Oturumlar için bellek + disk deposu.
+
+      - Her oturum kaydedildiğinde (save / release) directory altına <id>.json.gz olarak
+        yazılır (geçici dosya + os.replace); süreç çökse de son tamamlanan tur kaybolmaz.
+      - Bellekte LRU sırasıyla en fazla max_sessions oturum ve toplam max_bytes (snapshot
+        boyutuyla tahmin edilir) tutulur; aşılınca en uzun süredir kullanılmayan oturum
+        bellekten atılır. Kullanımdaki (acquire edilmiş) oturumlar atılmaz.
+      - Bellekte olmayan oturum ilk acquire'da diskten yüklenir. Yükleme depo kilidinin
+        dışında yapılır; aynı oturumu isteyen diğer çağrılar sadece o yüklemeyi bekler.
+      - Diskte en fazla max_stored oturum tutulur; retention saniyedir kaydedilmeyen
+        snapshot'lar purge_expired() ile silinir.
+    """
+
+    def __init__(
+        self,
+        directory: str = SESSION_DIR,
+        max_sessions: int = SESSION_MAX_IN_MEMORY,
+        max_bytes: int = SESSION_MAX_MEMORY_BYTES,
+        max_stored: int = SESSION_MAX_STORED,
+        retention: float = SESSION_RETENTION,
+    ):
+        self.directory = directory
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_stored = max_stored
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, StoredSession]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._deleted_while_loading: Set[str] = set()
+        self._bytes = 0
+        self._stored = len(self._snapshot_ids())
+        self._counters = {"created": 0, "loaded": 0, "saved": 0, "evicted": 0, "deleted": 0, "expired": 0}
+
+    # ---------------- dosyalar ----------------
+
+    def _path(self, session_id: str) -> str:
+        if not _SESSION_ID_RE.match(session_id):
+            raise KeyError(session_id)
+        return os.path.join(self.directory, session_id + _SNAPSHOT_SUFFIX)
+
+    def _snapshot_ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [name[:-len(_SNAPSHOT_SUFFIX)] for name in names if name.endswith(_SNAPSHOT_SUFFIX)]
+
+    def _write_tmp(self, session: StoredSession) -> Tuple[str, int]:
+        """
+        Snapshot'ı geçici dosyaya yazar; (geçici yol, boyut). Yerine koymak os.replace ile.
+        """
+        data = session.snapshot()
+        path = self._path(session.session_id)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(gzip.compress(data, compresslevel=5))
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_path, len(data)
+
+    def _write(self, session: StoredSession) -> int:
+        tmp_path, size = self._write_tmp(session)
+        os.replace(tmp_path, self._path(session.session_id))
+        return size
+
+    def _read(self, session_id: str) -> StoredSession:
+        try:
+            with open(self._path(session_id), "rb") as f:
+                data = gzip.decompress(f.read())
+        except FileNotFoundError:
+            raise KeyError(session_id)
+        state = json.loads(data)
+        if state.get("version") != _SNAPSHOT_VERSION:
+            raise ValueError(f"Desteklenmeyen oturum snapshot sürümü: {state.get('version')}")
+        session = StoredSession(session_id, Orchestrator.from_state(state), state.get("meta"))
+        session.size = len(data)
+        return session
+
+    # ---------------- oturumlar ----------------
+
+    def create(self, providers: Optional[List[str]] = None, use_memory: bool = True,
+               meta: Optional[Dict] = None) -> StoredSession:
+        """
+        Yeni oturum açar ve kullanımda (acquire edilmiş) olarak döndürür; işi bitince release().
+        Diskteki oturum sayısı max_stored'a ulaştıysa (süresi dolanlar silindikten sonra
+        da) SessionLimitError.
+        """
+        if self._stored >= self.max_stored:
+            self.purge_expired()
+        session = StoredSession(uuid.uuid4().hex, Orchestrator(providers=providers, use_memory=use_memory), meta)
+        session.in_use = 1
+        with self._lock:
+            if self._stored >= self.max_stored:
+                raise SessionLimitError(f"oturum sınırına ulaşıldı ({self.max_stored})")
+            # Yer yazmadan önce ayrılır: eşzamanlı create'ler sınırı aşmasın
+            self._stored += 1
+        try:
+            session.size = self._write(session)
+        except BaseException:
+            with self._lock:
+                self._stored -= 1
+            raise
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._bytes += session.size
+            self._counters["created"] += 1
+            self._evict()
+        return session
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id in self._sessions:
+                return True
+        try:
+            return os.path.exists(self._path(session_id))
+        except KeyError:
+            return False
+
+    def acquire(self, session_id: str) -> StoredSession:
+        """
+        Oturumu (gerekirse diskten yükleyip) kullanımda işaretler. Yoksa KeyError.
+        Aynı oturum birden fazla kez acquire edilebilir; sıralama çağıranın işidir.
+        """
+        while True:
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    self._mark_used(session)
+                    return session
+                # Aynı oturum iki kez yüklenip iki kopya oluşmasın: ilk çağıran yükler,
+                # diğerleri onun sonucunu bekleyip baştan bakar
+                pending = self._loading.get(session_id)
+                loading = pending is None
+                if loading:
+                    pending = self._loading[session_id] = Future()
+            if not loading:
+                pending.result()
+                continue
+            return self._load(session_id, pending)
+
+    def _load(self, session_id: str, pending: Future) -> StoredSession:
+        # Açma / JSON çözme / Orchestrator kurma kilit dışında: soğuk yükleme diğer oturumları bekletmez
+        try:
+            session = self._read(session_id)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[session_id]
+                self._deleted_while_loading.discard(session_id)
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[session_id]
+            if session_id in self._deleted_while_loading:
+                self._deleted_while_loading.discard(session_id)
+                error = KeyError(session_id)
+            else:
+                error = None
+                self._sessions[session_id] = session
+                self._bytes += session.size
+                self._counters["loaded"] += 1
+                self._mark_used(session)
+        if error is not None:
+            pending.set_exception(error)
+            raise error
+        pending.set_result(None)
+        return session
+
+    def _mark_used(self, session: StoredSession) -> None:
+        self._sessions.move_to_end(session.session_id)
+        session.in_use += 1
+        session.last_used = time.monotonic()
+        self._evict()
+
+    def save(self, session: StoredSession) -> None:
+        if session.deleted:
+            return
+        tmp_path, size = self._write_tmp(session)
+        with self._lock:
+            # Yazarken silinmiş olabilir; kontrol ve yerine koyma delete() ile aynı kilit
+            # altında, yoksa silinen snapshot geri gelir
+            if session.deleted:
+                os.remove(tmp_path)
+                return
+            os.replace(tmp_path, self._path(session.session_id))
+            if self._sessions.get(session.session_id) is session:
+                self._bytes += size - session.size
+            session.size = size
+            self._counters["saved"] += 1
+            self._evict()
+
+    def release(self, session: StoredSession, save: bool = True) -> None:
+        try:
+            if save:
+                self.save(session)
+        finally:
+            with self._lock:
+                session.in_use -= 1
+                session.last_used = time.monotonic()
+                self._evict()
+
+    @contextmanager
+    def use(self, session_id: str) -> Iterator[StoredSession]:
+        session = self.acquire(session_id)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes -= session.size
+                session.deleted = True
+                session.close()
+            if session_id in self._loading:
+                self._deleted_while_loading.add(session_id)
+            self._counters["deleted"] += 1
+        try:
+            self._remove_snapshot(session_id)
+            return True
+        except (OSError, KeyError):
+            return session is not None
+
+    def _remove_snapshot(self, session_id: str) -> None:
+        os.remove(self._path(session_id))
+        with self._lock:
+            self._stored -= 1
+
+    # ---------------- bellekten atma ----------------
+
+    def _evict(self) -> None:
+        """
+        Sınırlar aşıldıysa en eski, kullanımda olmayan oturumları bellekten atar.
+        Oturumlar her release'te kaydedildiği için atarken diske yazmak gerekmez.
+        """
+        if len(self._sessions) <= self.max_sessions and self._bytes <= self.max_bytes:
+            return
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions and self._bytes <= self.max_bytes:
+                break
+            if self._sessions[session_id].in_use:
+                continue
+            self._drop(session_id)
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size
+        session.close()
+        self._counters["evicted"] += 1
+
+    def evict_idle(self, max_idle: float) -> int:
+        """
+        max_idle saniyedir kullanılmayan oturumları bellekten atar (disktekiler kalır).
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                session_id for session_id, session in self._sessions.items()
+                if not session.in_use and now - session.last_used > max_idle
+            ]
+            for session_id in idle:
+                self._drop(session_id)
+        if idle and DEBUG:
+            print(f"[SESSION] {len(idle)} boşta oturum bellekten atıldı.")
+        return len(idle)
+
+    def purge_expired(self, retention: Optional[float] = None) -> int:
+        """
+        retention (verilmezse self.retention) saniyedir kaydedilmemiş snapshot'ları siler;
+        kullanımdaki oturumlara dokunmaz. Silinen oturum sayısını döndürür.
+        """
+        retention = self.retention if retention is None else retention
+        cutoff = time.time() - retention
+        expired = 0
+        for session_id in self._snapshot_ids():
+            # Kontrol ve silme kilit altında: arada oturum yüklenip kullanılmaya başlanmasın
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is not None and session.in_use:
+                    continue
+                try:
+                    path = self._path(session_id)
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    os.remove(path)
+                except (OSError, KeyError):
+                    continue
+                if session is not None:
+                    self._drop(session_id)
+                    session.deleted = True
+                if session_id in self._loading:
+                    self._deleted_while_loading.add(session_id)
+                self._stored -= 1
+                self._counters["expired"] += 1
+            expired += 1
+        if expired and DEBUG:
+            print(f"[SESSION] Süresi dolan {expired} oturum diskten silindi.")
+        return expired
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["stored"] = self._stored
+            stats["in_memory"] = len(self._sessions)
+            stats["in_use"] = sum(1 for session in self._sessions.values() if session.in_use)
+            stats["memory_bytes"] = self._bytes
+            return stats
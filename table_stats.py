@@ -0,0 +1,365 @@
+# table_stats.py
+
+import math
+import random
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    TABLE_SAMPLE_ROWS,
+    QUANTILE_SKETCH_K,
+    HLL_PRECISION,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# ============================================================
+#  TEK GEÇİŞTE (ONLINE) İSTATİSTİKLER
+# ============================================================
+
+class RunningStats:
+    """
+    count / mean / std / min / max için Welford-Chan algoritması.
+    Parçalar (numpy dizileri) tek seferde eklenir; iki örnek merge() ile birleşir.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        other = RunningStats()
+        other.count = int(values.size)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: "RunningStats") -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        # pandas describe() ile aynı: örneklem standart sapması (ddof=1)
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+class QuantileSketch:
+    """
+    Birleştirilebilir (mergeable) KLL tarzı kantil özeti.
+    Seviye i'deki her eleman 2^i ağırlıklıdır; dolan seviye sıralanıp
+    rastgele ofsetle yarıya indirilerek bir üst seviyeye aktarılır.
+    Bellek O(k log(n/k)); hiç sıkıştırma olmadıysa sonuç pandas ile birebir aynıdır.
+    """
+
+    def __init__(self, k: int = QUANTILE_SKETCH_K, seed: Optional[int] = None):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(8, int(self.k * (2.0 / 3.0) ** depth))
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.levels[0] = np.concatenate([self.levels[0], values.astype(float)])
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for i, items in enumerate(other.levels):
+            self.levels[i] = np.concatenate([self.levels[i], items])
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[-1:] if items.size % 2 else items[:0]
+                pairs = items[: items.size - keep.size]
+                promoted = pairs[self._rng.randint(0, 1)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = keep
+            level += 1
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def quantile(self, q: float) -> float:
+        if self.is_exact:
+            if self.levels[0].size == 0:
+                return math.nan
+            return float(np.quantile(self.levels[0], q))
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.size, 2 ** i) for i, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, weights = values[order], weights[order]
+        cumulative = np.cumsum(weights)
+        target = q * (cumulative[-1] - 1)
+        return float(values[min(np.searchsorted(cumulative, target + 1), values.size - 1)])
+
+
+class HyperLogLog:
+    """
+    Farklı değer sayısı tahmini (2^p kayıt; p=12 için ~%1.6 standart hata).
+    Kayıtlar eleman bazında max ile birleştirilir.
+    """
+
+    def __init__(self, p: int = HLL_PRECISION):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """
+        64 bitlik hash dizisini ekler (ör. pandas.util.hash_pandas_object çıktısı).
+        """
+        if hashes.size == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = ((hashes >> np.uint64(32 - self.p)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        # 32 bitlik kalan kısımda baştaki sıfır sayısı + 1
+        rank = np.where(rest > 0, 32 - np.floor(np.log2(np.maximum(rest, 1))), 33).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / float(np.sum(np.power(2.0, -self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return int(round(self.m * math.log(self.m / zeros)))
+        return int(round(raw))
+
+
+class ReservoirSample:
+    """
+    Tüm satırlar arasından eşit olasılıklı k satırlık örnek (Algorithm R).
+    Rastgele pozisyonlar parça başına numpy ile tek seferde üretilir.
+    """
+
+    def __init__(self, k: int = TABLE_SAMPLE_ROWS, seed: Optional[int] = None):
+        self.k = k
+        self.seen = 0
+        self.rows: List[Tuple] = []
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: "pd.DataFrame") -> None:
+        n = len(chunk)
+        if n == 0 or self.k <= 0:
+            return
+        start = self.seen
+        self.seen += n
+
+        # j. satır (0 tabanlı, tüm dosyada) k'dan küçükse doğrudan, değilse
+        # [0, j] aralığından çekilen pozisyon k'dan küçükse o pozisyona yazılır
+        positions = np.arange(start, start + n)
+        draws = np.floor(self._rng.random(n) * (positions + 1)).astype(np.int64)
+        targets = np.where(positions < self.k, positions, draws)
+        hits = np.nonzero(targets < self.k)[0]
+        if hits.size == 0:
+            return
+
+        # Aynı pozisyona birden fazla satır düşerse sonuncusu kalır (sıralı işleme ile aynı)
+        picks: Dict[int, int] = {}
+        for i in hits:
+            picks[int(targets[i])] = int(i)
+        wanted = sorted(set(picks.values()))
+        records = dict(zip(wanted, chunk.iloc[wanted].itertuples(index=False, name=None)))
+        for position in sorted(picks):
+            row = records[picks[position]]
+            if position < len(self.rows):
+                self.rows[position] = row
+            else:
+                self.rows.append(row)
+
+
+# ============================================================
+#  PARÇA PARÇA TABLO ÖZETLEYİCİ
+# ============================================================
+
+class StreamingTableSummarizer:
+    """
+    DataFrame parçalarını (chunk) tek geçişte işleyip summarize_dataframe ile aynı
+    biçimde (ön izleme, istatistik) metin üretir. Bellek kullanımı dosya boyutundan
+    bağımsızdır: sadece ilk satırlar, rezervuar örneği ve kolon başına özetler tutulur.
+    """
+
+    def __init__(self, max_rows_preview: int = 20, max_cols_preview: int = 10):
+        self.max_rows_preview = max_rows_preview
+        self.max_cols_preview = max_cols_preview
+        self.columns: List = []
+        self.n_rows = 0
+        self.head: Optional["pd.DataFrame"] = None
+        self.dtypes: Dict = {}
+        self.numeric: Dict = {}        # kolon -> (RunningStats, QuantileSketch)
+        self.distinct: Dict = {}       # kolon -> HyperLogLog
+        self.sample = ReservoirSample()
+
+    def update(self, chunk: "pd.DataFrame") -> None:
+        import pandas as pd
+
+        if not self.columns:
+            self.columns = list(chunk.columns)
+        if self.head is None or len(self.head) < self.max_rows_preview:
+            need = self.max_rows_preview - (0 if self.head is None else len(self.head))
+            part = chunk.iloc[:need]
+            self.head = part if self.head is None else pd.concat([self.head, part])
+
+        self.n_rows += len(chunk)
+        self.sample.update(chunk)
+
+        for col in chunk.columns:
+            series = chunk[col]
+            self._track_dtype(col, series.dtype)
+
+            if col not in self.distinct:
+                self.distinct[col] = HyperLogLog()
+            non_null = series.dropna()
+            self.distinct[col].update_hashes(
+                pd.util.hash_pandas_object(non_null, index=False).to_numpy()
+            )
+
+            if self._is_numeric(self.dtypes[col]):
+                stats, sketch = self.numeric.setdefault(col, (RunningStats(), QuantileSketch()))
+                values = series.to_numpy(dtype=float, na_value=np.nan)
+                stats.update(values)
+                sketch.update(values)
+            else:
+                # Önceki parçalarda sayısal görünen kolon artık sayısal değil
+                self.numeric.pop(col, None)
+
+    def _track_dtype(self, col, dtype) -> None:
+        import pandas as pd
+
+        previous = self.dtypes.get(col)
+        if previous is None or previous == dtype:
+            self.dtypes[col] = dtype
+        elif self._is_numeric(previous) and self._is_numeric(dtype):
+            # int + float parçaları -> float64 (tüm dosyayı tek seferde okuyunca olacağı gibi)
+            self.dtypes[col] = np.result_type(previous, dtype)
+        elif self._is_numeric(previous):
+            # Sayısal kolonda metin çıktı -> kolon metin tipine geçer
+            self.dtypes[col] = dtype
+        elif not self._is_numeric(dtype):
+            self.dtypes[col] = pd.api.types.pandas_dtype(object)
+
+    @staticmethod
+    def _is_numeric(dtype) -> bool:
+        import pandas as pd
+
+        return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+    # ---------------- çıktı ----------------
+
+    def render(self) -> Tuple[str, str]:
+        import pandas as pd
+
+        n_cols = len(self.columns)
+        info_lines = [
+            f"Tablo boyutu: {self.n_rows} satır x {n_cols} kolon",
+        ]
+
+        col_names = list(self.columns)
+        if len(col_names) > self.max_cols_preview:
+            shown_cols = col_names[:self.max_cols_preview]
+            info_lines.append(
+                f"İlk {self.max_cols_preview} kolon: {shown_cols} ... (toplam {len(col_names)} kolon)"
+            )
+        else:
+            info_lines.append(f"Tüm kolonlar: {col_names}")
+
+        dtypes_str = ", ".join([f"{col}: {self.dtypes.get(col)}" for col in col_names])
+        info_lines.append(f"Kolon veri tipleri: {dtypes_str}")
+
+        try:
+            preview_df = self.head.iloc[:self.max_rows_preview, :self.max_cols_preview]
+            preview_text = preview_df.to_string(index=False)
+        except Exception:
+            preview_text = "[Ön izleme oluşturulurken hata oluştu]"
+
+        preview_block = (
+            "\n".join(info_lines)
+            + "\n\nTablonun ilk satırlarından ön izleme:\n\n"
+            + preview_text
+        )
+
+        if self.sample.rows and self.n_rows > self.max_rows_preview:
+            sample_df = pd.DataFrame(self.sample.rows, columns=self.columns)
+            preview_block += (
+                f"\n\nTüm tablodan rastgele {len(sample_df)} örnek satır (reservoir sampling):\n\n"
+                + sample_df.iloc[:, :self.max_cols_preview].to_string(index=False)
+            )
+
+        extra_lines = []
+        numeric_cols = [col for col in col_names if col in self.numeric]
+
+        if not numeric_cols:
+            extra_lines.append("Sayısal kolon bulunamadı.")
+        else:
+            rows = []
+            for col in numeric_cols:
+                stats, sketch = self.numeric[col]
+                rows.append([
+                    float(stats.count),
+                    stats.mean if stats.count else math.nan,
+                    stats.std,
+                    stats.min if stats.count else math.nan,
+                    sketch.quantile(0.25),
+                    sketch.quantile(0.50),
+                    sketch.quantile(0.75),
+                    stats.max if stats.count else math.nan,
+                ])
+            desc = pd.DataFrame(
+                rows,
+                index=numeric_cols,
+                columns=["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+            )
+            extra_lines.append(
+                "Sayısal kolonlar için temel istatistikler (count, mean, std, min, 25%, 50%, 75%, max):\n"
+            )
+            extra_lines.append(desc.to_string())
+
+        distinct = ", ".join(f"{col}: ~{self.distinct[col].estimate()}" for col in col_names if col in self.distinct)
+        if distinct:
+            extra_lines.append(f"\nTahmini farklı değer sayıları (HyperLogLog): {distinct}")
+
+        extra_block = "\n".join(extra_lines)
+
+        return preview_block, extra_block
@@ -0,0 +1,29 @@
+# text_search.py
+
+import math
+import re
+from typing import List
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# BM25 parametreleri (Okapi BM25 varsayılanları)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Metni küçük harfli kelimelere böler (Türkçe İ/I dönüşümü dahil).
+    Noktalama işaretleri kelimeye yapışık kalmaz: "nasılsın?" -> "nasılsın".
+    """
+    text = text.replace("İ", "i").replace("I", "ı").lower()
+    return _TOKEN_RE.findall(text)
+
+
+def bm25_idf(n_docs: int, df: int) -> float:
+    return math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+
+def bm25_term_score(tf: int, doc_len: int, avg_doc_len: float, idf: float) -> float:
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len / (avg_doc_len or 1.0))
+    return idf * tf * (BM25_K1 + 1.0) / (tf + norm)
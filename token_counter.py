@@ -0,0 +1,141 @@
+# token_counter.py
+
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+# Çevrim dışı, yaklaşık token sayacı. Gerçek tokenizer'lar (tiktoken vb.) gerekmez.
+# Metin parçalara ayrılır ve her parça türü için sağlayıcıya özgü oran kullanılır:
+#   ascii : İngilizce/ASCII kelimeler (BPE sözlüklerinde verimli)
+#   other : Türkçe karakterli ve diğer Unicode kelimeler (daha fazla parçaya bölünür)
+#   digits: rakamlar genelde 1-3 hanelik gruplar halinde token olur
+# message_overhead: sohbet formatında her mesajın rol/ayraç maliyeti
+PROVIDER_PROFILES: Dict[str, Dict[str, float]] = {
+    "openai": {"ascii": 4.2, "other": 2.8, "digits": 3.0, "message_overhead": 4},
+    "grok": {"ascii": 4.0, "other": 2.7, "digits": 3.0, "message_overhead": 4},
+    "claude": {"ascii": 3.6, "other": 2.4, "digits": 1.0, "message_overhead": 5},
+    "gemini": {"ascii": 4.4, "other": 3.2, "digits": 1.0, "message_overhead": 3},
+}
+DEFAULT_PROVIDER = "openai"
+
+# Bundan uzun metinler (ör. doküman gövdesi) önbelleğe alınmaz
+_CACHE_MAX_CHARS = 200_000
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|[0-9]+|[^\W\d_]+|\n+|\s+|.", re.UNICODE)
+
+
+def _profile(provider: str) -> Dict[str, float]:
+    return PROVIDER_PROFILES.get(provider, PROVIDER_PROFILES[DEFAULT_PROVIDER])
+
+
+def _piece_cost(piece: str, profile: Dict[str, float]) -> float:
+    first = piece[0]
+    if first.isspace():
+        # Boşluklar bir sonraki kelimeye yapışır; satır sonu dizileri ayrı token
+        if first == "\n":
+            return 1.0
+        return len(piece) / 4 if len(piece) > 1 else 0.0
+    if first.isascii() and first.isalpha():
+        return max(1.0, len(piece) / profile["ascii"])
+    if first.isdigit():
+        return max(1.0, len(piece) / profile["digits"])
+    if first.isalpha():
+        return max(1.0, len(piece) / profile["other"])
+    return 1.0
+
+
+def _count(text: str, provider: str) -> int:
+    profile = _profile(provider)
+    return int(sum(_piece_cost(piece, profile) for piece in _PIECE_RE.findall(text)) + 0.5)
+
+
+@lru_cache(maxsize=8192)
+def _count_cached(text: str, provider: str) -> int:
+    return _count(text, provider)
+
+
+def count_tokens(text: str, provider: str = DEFAULT_PROVIDER) -> int:
+    """
+    Metnin `provider` tokenizer'ındaki yaklaşık token sayısı.
+    Mesaj boyutundaki metinlerin sonucu önbellekte tutulur; geçmiş mesajları
+    her turda yeniden sayılmaz.
+    """
+    if not text:
+        return 0
+    if len(text) > _CACHE_MAX_CHARS:
+        return _count(text, provider)
+    return _count_cached(text, provider)
+
+
+def count_message_tokens(messages: List[Dict[str, str]], provider: str = DEFAULT_PROVIDER) -> int:
+    overhead = int(_profile(provider)["message_overhead"])
+    return sum(count_tokens(m.get("content", ""), provider) + overhead for m in messages) + 3
+
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    provider: str = DEFAULT_PROVIDER,
+    suffix: str = "",
+) -> str:
+    """
+    Metni (suffix dahil) en fazla max_tokens token olacak şekilde kırpar.
+    Kesme noktası metin üzerinde tek geçişte bulunur, mümkünse satır/kelime sonuna çekilir.
+    """
+    if count_tokens(text, provider) <= max_tokens:
+        return text
+
+    budget = max_tokens - count_tokens(suffix, provider)
+    if budget <= 0:
+        return ""
+
+    # Parça parça ilerleyip bütçenin bittiği karakteri bul (tek geçiş)
+    profile = _profile(provider)
+    used = 0.0
+    lo = 0
+    for match in _PIECE_RE.finditer(text):
+        used += _piece_cost(match.group(), profile)
+        if used > budget + 0.5:
+            break
+        lo = match.end()
+
+    cut = text[:lo]
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > lo * 0.8:
+        cut = cut[:boundary]
+    return cut + suffix
+
+
+def trim_messages(
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    provider: str = DEFAULT_PROVIDER,
+) -> List[Dict[str, str]]:
+    """
+    Mesaj listesini bütçeye sığdırır:
+      1) baştaki system mesajları ve son mesaj korunur, aradakiler eskiden yeniye atılır;
+      2) hâlâ sığmıyorsa son mesajın içeriği kırpılır.
+    """
+    if count_message_tokens(messages, provider) <= max_tokens:
+        return messages
+
+    head = 0
+    while head < len(messages) - 1 and messages[head].get("role") == "system":
+        head += 1
+    fixed_head = messages[:head]
+    middle = list(messages[head:-1])
+    last = messages[-1]
+
+    overhead = int(_profile(provider)["message_overhead"])
+    total = count_message_tokens(fixed_head + middle + [last], provider)
+    while middle and total > max_tokens:
+        total -= count_tokens(middle.pop(0).get("content", ""), provider) + overhead
+
+    trimmed = fixed_head + middle + [last]
+    excess = count_message_tokens(trimmed, provider) - max_tokens
+    if excess > 0:
+        content = last.get("content", "")
+        keep = max(0, count_tokens(content, provider) - excess)
+        last = dict(last, content=truncate_to_tokens(content, keep, provider, "\n\n...[kısaltıldı]..."))
+        trimmed = fixed_head + middle + [last]
+    return trimmed
@@ -0,0 +1,52 @@
+# trace_report.py
+#
+# tracing.py'nin yazdığı JSONL dosyasından aşama / sağlayıcı bazında süre özeti.
+#
+#   python trace_report.py                          # config.TRACE_JSONL_PATH
+#   python trace_report.py traces.jsonl --stage think
+#   python trace_report.py --prom panel_metrics.prom  # Prometheus metin dosyası da yaz
+
+import argparse
+import os
+import sys
+
+from config import TRACE_JSONL_PATH
+from tracing import format_prometheus, format_summary, stats_from_jsonl
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Panel izleme (tracing) özeti: p50/p95/p99")
+    parser.add_argument("path", nargs="?", default=TRACE_JSONL_PATH)
+    parser.add_argument("--stage", action="append", default=None,
+                        help="sadece bu aşama(lar); birden fazla verilebilir")
+    parser.add_argument("--provider", action="append", default=None,
+                        help="sadece bu sağlayıcı(lar)")
+    parser.add_argument("--prom", default=None, help="Prometheus metin çıktısının yazılacağı dosya")
+    args = parser.parse_args()
+
+    if not args.path or not os.path.exists(args.path):
+        print(f"İzleme dosyası bulunamadı: {args.path} (config.TRACE_ENABLED açık mı?)")
+        return 1
+
+    stats = stats_from_jsonl(args.path)
+    stats = {
+        (stage, provider): st
+        for (stage, provider), st in stats.items()
+        if (not args.stage or stage in args.stage)
+        and (not args.provider or provider in args.provider)
+    }
+    if not stats:
+        print("Eşleşen span yok.")
+        return 1
+
+    print(format_summary(stats))
+
+    if args.prom:
+        with open(args.prom, "w", encoding="utf-8") as f:
+            f.write(format_prometheus(stats))
+        print(f"\nPrometheus çıktısı yazıldı: {args.prom}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+# tracing.py
+
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from config import TRACE_ENABLED, TRACE_JSONL_PATH, TRACE_PROM_PATH, TRACE_WINDOW
+
+T = TypeVar("T")
+
+# Özet tablolarında ve Prometheus çıktısında verilen yüzdelikler
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (aşama, sağlayıcı)
+StageKey = Tuple[str, str]
+
+_ids = itertools.count(1)
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    """
+    Tek bir aşamanın süresi. Aynı soru içindeki span'ler aynı trace_id'yi taşır;
+    parent_id iç içe çağrıları (ask_panel -> think -> http) bağlar.
+    """
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "provider",
+                 "attrs", "start", "duration", "error", "_token", "_t0")
+
+    def __init__(self, name: str, provider: str, attrs: Dict[str, object]):
+        parent = _current.get()
+        self.span_id = next(_ids)
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.provider = provider
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def fail(self, message: str) -> None:
+        # İstisna fırlatmadan hata metni döndüren çağrılar (ör. "[HATA] ...") için
+        self.error = message[:300]
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        get_recorder().record(self)
+
+    def to_dict(self) -> Dict[str, object]:
+        entry = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "stage": self.name,
+            "provider": self.provider,
+            "start": round(self.start, 6),
+            "ms": round(self.duration * 1000.0, 3),
+        }
+        if self.error:
+            entry["error"] = self.error
+        if self.attrs:
+            entry["attrs"] = self.attrs
+        return entry
+
+
+class _NoopSpan:
+    # İzleme kapalıyken her span() çağrısı bu tek nesneyi döndürür
+    def set(self, **attrs) -> None:
+        pass
+
+    def fail(self, message: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, provider: str = "", **attrs):
+    """
+    with span("think", provider="openai", agent="OpenAI Expert") as s: ...
+    İzleme kapalıysa maliyeti bir fonksiyon çağrısıdır.
+    """
+    if not TRACE_ENABLED:
+        return _NOOP
+    return Span(name, provider, attrs)
+
+
+def record_span(name: str, provider: str, seconds: float, **attrs) -> None:
+    """
+    with bloğuna sığmayan ölçümler için (ör. akıştaki tüm SSE olaylarının toplam
+    JSON çözme süresi): süresi dışarıda hesaplanmış bir span'i kaydeder.
+    """
+    if not TRACE_ENABLED:
+        return
+    s = Span(name, provider, attrs)
+    s.start -= seconds
+    s.duration = seconds
+    get_recorder().record(s)
+
+
+def bind_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    Thread havuzuna verilen işin span'leri, işi gönderen span'in altına düşsün diye
+    o anki contextvars kopyasında çalıştırılır.
+    """
+    if not TRACE_ENABLED:
+        return fn
+    return _ContextRunner(fn)
+
+
+class _ContextRunner:
+    __slots__ = ("ctx", "fn")
+
+    def __init__(self, fn: Callable):
+        self.ctx = contextvars.copy_context()
+        self.fn = fn
+
+    def __call__(self, *args, **kwargs):
+        return self.ctx.run(self.fn, *args, **kwargs)
+
+
+# ============================================================
+#  KAYIT / ÖZET
+# ============================================================
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+
+class StageStats:
+    """
+    Aşama/sağlayıcı başına: toplam sayı, toplam süre, hata sayısı ve
+    yüzdelikler için son `window` ölçüm.
+    """
+
+    __slots__ = ("count", "total", "errors", "samples")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float, error: bool = False) -> None:
+        self.count += 1
+        self.total += seconds
+        self.errors += int(error)
+        self.samples.append(seconds)
+
+    def copy(self) -> "StageStats":
+        other = StageStats(self.samples.maxlen or 0)
+        other.count, other.total, other.errors = self.count, self.total, self.errors
+        other.samples.extend(self.samples)
+        return other
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {}
+        return {q: percentile(ordered, q) for q in QUANTILES}
+
+
+class TraceRecorder:
+    """
+    Biten span'leri toplar; TRACE_JSONL_PATH verilmişse her span'i bir satır olarak ekler.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = TRACE_JSONL_PATH, window: int = TRACE_WINDOW):
+        self.jsonl_path = jsonl_path
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats: Dict[StageKey, StageStats] = {}
+        self._file = None
+
+    def record(self, s: Span) -> None:
+        line = json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" if self.jsonl_path else None
+        with self._lock:
+            stats = self._stats.get((s.name, s.provider))
+            if stats is None:
+                stats = self._stats[(s.name, s.provider)] = StageStats(self.window)
+            stats.add(s.duration, s.error is not None)
+            if line is not None:
+                try:
+                    if self._file is None:
+                        self._file = open(self.jsonl_path, "a", encoding="utf-8")
+                    self._file.write(line)
+                except OSError:
+                    # İzleme dosyası yazılamıyorsa panel çalışmaya devam eder
+                    self.jsonl_path = None
+
+    def stats(self) -> Dict[StageKey, StageStats]:
+        # Kopya: yüzdelikler hesaplanırken başka thread'ler kayıt eklemeye devam edebilir
+        with self._lock:
+            return {key: st.copy() for key, st in self._stats.items()}
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_recorder: Optional[TraceRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> TraceRecorder:
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = TraceRecorder()
+            atexit.register(_at_exit)
+        return _recorder
+
+
+def _at_exit() -> None:
+    if _recorder is None:
+        return
+    _recorder.close()
+    if TRACE_PROM_PATH:
+        try:
+            write_prometheus(TRACE_PROM_PATH, _recorder.stats())
+        except OSError:
+            pass
+
+
+def stats_from_jsonl(path: str, window: int = 1_000_000) -> Dict[StageKey, StageStats]:
+    """
+    JSONL izleme dosyasından aşama/sağlayıcı istatistiklerini yeniden kurar.
+    """
+    result: Dict[StageKey, StageStats] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = (entry.get("stage", ""), entry.get("provider", ""))
+            stats = result.get(key)
+            if stats is None:
+                stats = result[key] = StageStats(window)
+            stats.add(entry.get("ms", 0.0) / 1000.0, "error" in entry)
+    return result
+
+
+def format_summary(stats: Dict[StageKey, StageStats]) -> str:
+    """
+    Aşama ve sağlayıcı başına sayı, hata ve p50/p95/p99 süre tablosu (ms).
+    """
+    header = f"{'aşama':<16} {'sağlayıcı':<10} {'sayı':>7} {'hata':>5}" + "".join(
+        f" {'p' + format(q * 100, 'g'):>9}" for q in QUANTILES
+    ) + f" {'toplam':>10}"
+    lines = [header, "-" * len(header)]
+    for (stage, provider), st in sorted(stats.items(), key=lambda item: -item[1].total):
+        qs = st.quantiles()
+        lines.append(
+            f"{stage:<16} {provider or '-':<10} {st.count:>7} {st.errors:>5}"
+            + "".join(f" {qs.get(q, 0.0) * 1000:>7.1f}ms" for q in QUANTILES)
+            + f" {st.total:>9.2f}s"
+        )
+    return "\n".join(lines)
+
+
+def _prom_labels(stage: str, provider: str, extra: str = "") -> str:
+    labels = f'stage="{stage}",provider="{provider}"'
+    return "{" + labels + (("," + extra) if extra else "") + "}"
+
+
+def format_prometheus(stats: Dict[StageKey, StageStats]) -> str:
+    """
+    Prometheus metin formatı (node_exporter textfile collector ile okunabilir).
+    """
+    out: List[str] = [
+        "# HELP panel_stage_duration_seconds Panel aşama süreleri.",
+        "# TYPE panel_stage_duration_seconds summary",
+    ]
+    errors: List[str] = [
+        "# HELP panel_stage_errors_total Hata ile biten span sayısı.",
+        "# TYPE panel_stage_errors_total counter",
+    ]
+    for (stage, provider), st in sorted(stats.items()):
+        for q, value in st.quantiles().items():
+            labels = _prom_labels(stage, provider, 'quantile="%g"' % q)
+            out.append(f"panel_stage_duration_seconds{labels} {value:.6f}")
+        out.append(f"panel_stage_duration_seconds_sum{_prom_labels(stage, provider)} {st.total:.6f}")
+        out.append(f"panel_stage_duration_seconds_count{_prom_labels(stage, provider)} {st.count}")
+        errors.append(f"panel_stage_errors_total{_prom_labels(stage, provider)} {st.errors}")
+    return "\n".join(out + errors) + "\n"
+
+
+def write_prometheus(path: str, stats: Optional[Dict[StageKey, StageStats]] = None) -> None:
+    """
+    Dosyayı yarım okunmasın diye geçici dosyaya yazıp yerine taşır.
+    """
+    if stats is None:
+        stats = get_recorder().stats()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(format_prometheus(stats))
+    os.replace(tmp, path)
+
+
+def get_trace_summary() -> str:
+    return format_summary(get_recorder().stats())
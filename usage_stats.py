@@ -0,0 +1,91 @@
+# usage_stats.py
+
+import threading
+from typing import Dict, Optional
+
+from config import DEBUG
+
+# Sağlayıcı cevaplarındaki "usage" alanlarından toplanan gerçek token sayıları.
+#   prompt_tokens       : toplam girdi token'ı (önbellekten okunanlar dahil)
+#   cached_tokens       : sağlayıcı tarafı prompt önbelleğinden okunan girdi token'ı
+#   cache_write_tokens  : önbelleğe yazılan girdi token'ı (Anthropic)
+#   output_tokens       : üretilen token
+_FIELDS = ("requests", "prompt_tokens", "cached_tokens", "cache_write_tokens", "output_tokens")
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def record_usage(
+    provider: str,
+    prompt_tokens: int = 0,
+    cached_tokens: int = 0,
+    cache_write_tokens: int = 0,
+    output_tokens: int = 0,
+) -> None:
+    with _lock:
+        stats = _stats.setdefault(provider, dict.fromkeys(_FIELDS, 0))
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+        stats["cache_write_tokens"] += cache_write_tokens
+        stats["output_tokens"] += output_tokens
+
+    if DEBUG:
+        print(
+            f"[USAGE] {provider}: girdi={prompt_tokens} (önbellekten={cached_tokens}, "
+            f"önbelleğe yazılan={cache_write_tokens}), çıktı={output_tokens}"
+        )
+
+
+def record_openai_usage(provider: str, usage: Optional[Dict]) -> None:
+    """
+    OpenAI / xAI: {"prompt_tokens", "completion_tokens",
+                   "prompt_tokens_details": {"cached_tokens"}}
+    """
+    if not usage:
+        return
+    details = usage.get("prompt_tokens_details") or {}
+    record_usage(
+        provider,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        cached_tokens=details.get("cached_tokens", 0),
+        output_tokens=usage.get("completion_tokens", 0),
+    )
+
+
+def record_claude_usage(usage: Optional[Dict]) -> None:
+    """
+    Anthropic: input_tokens önbellek dışı kısımdır; cache_read_input_tokens ve
+    cache_creation_input_tokens ayrıca gelir.
+    """
+    if not usage:
+        return
+    cache_read = usage.get("cache_read_input_tokens") or 0
+    cache_write = usage.get("cache_creation_input_tokens") or 0
+    record_usage(
+        "claude",
+        prompt_tokens=(usage.get("input_tokens") or 0) + cache_read + cache_write,
+        cached_tokens=cache_read,
+        cache_write_tokens=cache_write,
+        output_tokens=usage.get("output_tokens") or 0,
+    )
+
+
+def record_gemini_usage(meta: Optional[Dict]) -> None:
+    """
+    Gemini: usageMetadata {"promptTokenCount", "cachedContentTokenCount", "candidatesTokenCount"}
+    """
+    if not meta:
+        return
+    record_usage(
+        "gemini",
+        prompt_tokens=meta.get("promptTokenCount", 0),
+        cached_tokens=meta.get("cachedContentTokenCount", 0),
+        output_tokens=meta.get("candidatesTokenCount", 0),
+    )
+
+
+def get_usage_stats() -> Dict[str, Dict[str, int]]:
+    with _lock:
+        return {provider: dict(stats) for provider, stats in _stats.items()}